@@ -0,0 +1,46 @@
+"""
+Бенчмарк: поштучное создание задач против пакетного create_many.
+
+Запуск: python benchmarks/bench_bulk_insert.py
+"""
+import time
+
+from common import use_temp_database, create_user
+
+db_path = use_temp_database()
+
+from src.db.database import Database
+from src.patterns.repository import TaskRepository
+from src.patterns.task_factory import SimpleTaskCreator
+
+BATCH = 2000
+
+
+def main():
+    if not Database().initialize():
+        raise SystemExit("Не удалось инициализировать базу данных")
+    user_id = create_user()
+    repository = TaskRepository()
+    creator = SimpleTaskCreator()
+
+    print(f"База данных: {db_path}")
+    tasks = [creator.create_task(user_id, f"Задача {i}") for i in range(BATCH)]
+    start = time.perf_counter()
+    for task in tasks:
+        repository.create(task)
+    single = BATCH / (time.perf_counter() - start)
+    print(f"{'create (транзакция на строку)':<45} {single:>12,.0f} строк/с")
+
+    tasks = [creator.create_task(user_id, f"Задача {i}") for i in range(BATCH)]
+    start = time.perf_counter()
+    created = repository.create_many(tasks)
+    batched = BATCH / (time.perf_counter() - start)
+    print(f"{'create_many (одна транзакция)':<45} {batched:>12,.0f} строк/с")
+    print(f"{'ускорение':<45} {batched / single:>12.1f}x")
+
+    assert [task.id for task in created] == list(range(created[0].id, created[0].id + BATCH))
+    Database.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Бенчмарк: соединение на каждый вызов против пула соединений Database.
+
+Запуск: python benchmarks/bench_connection.py
+"""
+import sqlite3
+
+from common import use_temp_database, create_user, measure, report_speedup
+
+db_path = use_temp_database()
+
+from src.db.database import Database
+from src.db.models import TaskStatus
+from src.db.mappers import TASK_COLUMNS, decode_task, select_columns
+from src.patterns.repository import TableRepository, TaskRepository
+from src.patterns.task_factory import SimpleTaskCreator
+
+ITERATIONS = 5000
+
+
+def seed(user_id: int, count: int = 50) -> int:
+    """Наполнение базы задачами, возвращает ID одной из них"""
+    repository = TaskRepository()
+    creator = SimpleTaskCreator()
+    task = None
+    for i in range(count):
+        task = repository.create(creator.create_task(user_id, f"Задача {i}"))
+    return task.id
+
+
+def legacy_get_by_id(task_id: int):
+    """Прежнее поведение: открытие, PRAGMA, запрос и закрытие на каждый вызов"""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA foreign_keys = ON")
+        cursor.execute(f'SELECT {select_columns(TASK_COLUMNS)} FROM tasks WHERE id = ?', (task_id,))
+        decode_task(cursor, cursor.fetchone())
+        cursor.close()
+    finally:
+        conn.close()
+
+
+def legacy_update_status(task_id: int, status: TaskStatus):
+    """Прежний update_task_status: два соединения (чтение и запись всех полей)"""
+    legacy_get_by_id(task_id)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute('UPDATE tasks SET status = ? WHERE id = ?', (status, task_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def main():
+    if not Database().initialize():
+        raise SystemExit("Не удалось инициализировать базу данных")
+    user_id = create_user()
+    task_id = seed(user_id)
+    repository = TaskRepository()
+
+    # Замеряется пул соединений, поэтому чтение идет в обход кэша задач
+    def pooled_get_by_id():
+        return TableRepository.get_by_id(repository, task_id)
+
+    def pooled_get_all():
+        repository.cache.clear()
+        return repository.get_all(user_id)
+
+    print(f"База данных: {db_path}")
+    print("Чтение задачи по ID")
+    legacy = measure("  соединение на вызов", lambda: legacy_get_by_id(task_id), ITERATIONS)
+    pooled = measure("  пул соединений", pooled_get_by_id, ITERATIONS)
+    report_speedup(legacy, pooled)
+
+    print("Список задач пользователя")
+    measure("  пул соединений (get_all)", pooled_get_all, ITERATIONS // 5)
+
+    def pooled_update_status():
+        task = pooled_get_by_id()
+        task.status = TaskStatus.COMPLETED
+        repository.update(task)
+
+    print("Обновление статуса (чтение + запись)")
+    legacy = measure("  соединение на вызов",
+                     lambda: legacy_update_status(task_id, TaskStatus.COMPLETED), ITERATIONS // 5)
+    pooled = measure("  пул соединений", pooled_update_status, ITERATIONS // 5)
+    report_speedup(legacy, pooled)
+
+    Database.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Бенчмарк: сравнение профилей PRAGMA из Config.DB_PROFILES
+на множестве мелких транзакций записи и на чтении.
+
+Запуск: python benchmarks/bench_db_profiles.py
+"""
+import os
+import tempfile
+
+from common import use_temp_database, create_user, describe_profile, measure
+
+use_temp_database()
+
+from src.config import Config
+from src.db.database import Database
+from src.patterns.repository import TaskRepository
+from src.patterns.task_factory import SimpleTaskCreator
+
+ITERATIONS = 1000
+
+
+def run_profile(profile: str):
+    """Замер для одного профиля на отдельном файле базы данных"""
+    Config.DB_PROFILE = profile
+    Config.DB_PATH = os.path.join(tempfile.mkdtemp(prefix="life_manager_bench_"), "bench.db")
+    if not Database().initialize():
+        raise SystemExit("Не удалось инициализировать базу данных")
+
+    user_id = create_user()
+    repository = TaskRepository()
+    creator = SimpleTaskCreator()
+    task = repository.create(creator.create_task(user_id, "Задача"))
+
+    print(f"Профиль: {describe_profile(profile)}")
+    measure("  create (commit на строку)",
+            lambda: repository.create(creator.create_task(user_id, "Задача")), ITERATIONS)
+    measure("  patch статуса", lambda: repository.patch(task.id, status="completed"), ITERATIONS)
+    measure("  query (первые 50)", lambda: repository.query(user_id, limit=50), ITERATIONS)
+    Database.close_all()
+
+
+def main():
+    for profile in Config.DB_PROFILES:
+        run_profile(profile)
+
+
+if __name__ == "__main__":
+    main()
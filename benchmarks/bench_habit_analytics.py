@@ -0,0 +1,91 @@
+"""
+Бенчмарк: аналитика привычек за 10 лет для 500 привычек,
+NumPy против реализации на битовых строках целых чисел Python.
+
+Запуск: python benchmarks/bench_habit_analytics.py
+"""
+import random
+import time
+from datetime import date, timedelta
+
+from common import use_temp_database, create_user
+
+db_path = use_temp_database()
+
+from src.db.database import Database
+from src.db.mappers import to_day, to_timestamp
+from src.services.habit_analytics import HabitAnalytics, np
+
+HABITS = 500
+YEARS = 10
+CHECKIN_PROBABILITY = 0.6
+
+
+def seed(user_id: int, start: date, days: int):
+    """Наполнение базы привычками и случайными отметками"""
+    random.seed(42)
+    first = to_day(start)
+    with Database().transaction() as cursor:
+        cursor.executemany(
+            'INSERT INTO habits (user_id, name, frequency, created_at) VALUES (?, ?, 0, ?)',
+            [(user_id, f"Привычка {i}", to_timestamp(start)) for i in range(HABITS)]
+        )
+        cursor.execute('SELECT id FROM habits WHERE user_id = ?', (user_id,))
+        habit_ids = [row[0] for row in cursor.fetchall()]
+        cursor.executemany(
+            'INSERT INTO habit_checkins (habit_id, day, created_at) VALUES (?, ?, 0)',
+            ((habit_id, first + day) for habit_id in habit_ids
+             for day in range(days) if random.random() < CHECKIN_PROBABILITY)
+        )
+
+
+def timed(name: str, operation):
+    """Однократный замер операции в миллисекундах"""
+    start = time.perf_counter()
+    result = operation()
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"  {name:<43} {elapsed:>10,.1f} мс")
+    return result, elapsed
+
+
+def run(analytics: HabitAnalytics, user_id: int, start: date, end: date) -> float:
+    """Загрузка матрицы и расчет всех показателей, возвращает общее время"""
+    matrix, total = timed("загрузка отметок", lambda: analytics.load(user_id, start, end))
+    for name, operation in (
+        ("самые длинные серии", lambda: analytics.longest_streaks(matrix)),
+        ("текущие серии", lambda: analytics.current_streaks(matrix)),
+        ("скользящая доля за 30 дней", lambda: analytics.rolling_rates(matrix, 30)),
+        ("профиль по дням недели", lambda: analytics.weekday_profiles(matrix)),
+        (f"тепловая карта {end.year} года", lambda: analytics.heatmap(matrix, end.year)),
+    ):
+        _, elapsed = timed(name, operation)
+        total += elapsed
+    print(f"  {'всего':<43} {total:>10,.1f} мс")
+    return total
+
+
+def main():
+    if not Database().initialize():
+        raise SystemExit("Не удалось инициализировать базу данных")
+    user_id = create_user()
+    end = date.today()
+    start = end - timedelta(days=365 * YEARS - 1)
+    days = (end - start).days + 1
+
+    print(f"База данных: {db_path}")
+    print(f"Наполнение: {HABITS} привычек x {days} дней...")
+    seed(user_id, start, days)
+
+    print("Целые числа Python (без NumPy):")
+    python_total = run(HabitAnalytics(use_numpy=False), user_id, start, end)
+
+    if np is None:
+        print("NumPy не установлен, векторная реализация не замерялась")
+        return
+    print(f"NumPy {np.__version__}:")
+    numpy_total = run(HabitAnalytics(use_numpy=True), user_id, start, end)
+    print(f"{'ускорение':<45} {python_total / numpy_total:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
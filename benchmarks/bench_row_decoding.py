@@ -0,0 +1,60 @@
+"""
+Бенчмарк: разбор строк в модели Task через datetime.strptime
+против скомпилированного row_factory с целочисленным временем,
+а также память, занимаемая списком задач.
+
+Запуск: python benchmarks/bench_row_decoding.py
+"""
+import tracemalloc
+from datetime import datetime, timedelta
+
+from common import measure, report_speedup
+
+from src.db.mappers import decode_task, to_timestamp
+from src.db.models import Task, TaskStatus
+
+ROWS = 10000
+start = datetime(2025, 1, 1)
+legacy_rows = [
+    (i, 1, f"Задача {i}", "", "new", 1, None,
+     (start + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S'))
+    for i in range(ROWS)
+]
+epoch_rows = [row[:4] + (TaskStatus.NEW.value,) + row[5:7] + (to_timestamp(start + timedelta(minutes=i)),)
+              for i, row in enumerate(legacy_rows)]
+
+
+def legacy_decode():
+    """Прежнее построчное создание Task с разбором строки времени"""
+    return [Task(
+        id=row[0],
+        user_id=row[1],
+        title=row[2],
+        description=row[3],
+        status=row[4],
+        priority=row[5],
+        color=row[6],
+        created_at=datetime.strptime(row[7], '%Y-%m-%d %H:%M:%S')
+    ) for row in legacy_rows]
+
+
+def compiled_decode():
+    """Скомпилированный декодер строк с целочисленным временем"""
+    return [decode_task(None, row) for row in epoch_rows]
+
+
+def main():
+    print(f"Декодирование {ROWS} строк tasks (списков в секунду)")
+    legacy = measure("  strptime", legacy_decode, 20)
+    compiled = measure("  decode_task + epoch", compiled_decode, 20)
+    report_speedup(legacy, compiled)
+
+    tracemalloc.start()
+    tasks = compiled_decode()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{'память на задачу (__slots__)':<45} {size / len(tasks):>12,.0f} байт")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Общие утилиты для бенчмарков: временная база данных и замер операций в секунду
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+# Добавляем корень проекта в путь поиска модулей
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from src.config import Config
+
+
+def use_temp_database() -> str:
+    """
+    Переключение Config.DB_PATH на временный файл,
+    чтобы бенчмарки не трогали рабочую базу данных
+    """
+    db_dir = tempfile.mkdtemp(prefix="life_manager_bench_")
+    Config.DB_PATH = os.path.join(db_dir, "bench.db")
+
+    # Профиль PRAGMA можно выбрать переменной окружения BENCH_DB_PROFILE
+    Config.DB_PROFILE = os.environ.get("BENCH_DB_PROFILE", Config.DB_PROFILE)
+    print(f"Профиль БД: {describe_profile(Config.DB_PROFILE)}")
+    return Config.DB_PATH
+
+
+def describe_profile(profile: str) -> str:
+    """Строка с названием и настройками профиля PRAGMA"""
+    pragmas = Config.DB_PROFILES.get(profile, {})
+    settings = ", ".join(f"{name}={value}" for name, value in pragmas.items())
+    return f"{profile} ({settings})"
+
+
+def create_user(username: str = "bench", password: str = "benchmark") -> int:
+    """Создание пользователя для бенчмарка, возвращает его ID"""
+    import hashlib
+    from src.db.database import Database
+
+    password_hash = hashlib.sha256(password.encode()).hexdigest()
+    with Database().transaction() as cursor:
+        cursor.execute(
+            'INSERT INTO users (username, password_hash) VALUES (?, ?)',
+            (username, password_hash)
+        )
+        return cursor.lastrowid
+
+
+def measure(name: str, operation: Callable[[], object], iterations: int) -> float:
+    """
+    Замер количества операций в секунду
+
+    Args:
+        name: Название замера для вывода
+        operation: Замеряемая операция
+        iterations: Количество повторов
+
+    Returns:
+        float: Операций в секунду
+    """
+    # Прогрев
+    for _ in range(min(iterations // 10, 100)):
+        operation()
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        operation()
+    elapsed = time.perf_counter() - start
+
+    ops = iterations / elapsed if elapsed else float("inf")
+    print(f"{name:<45} {ops:>12,.0f} оп/с")
+    return ops
+
+
+def report_speedup(baseline: float, optimized: float):
+    """Вывод ускорения относительно базового варианта"""
+    print(f"{'ускорение':<45} {optimized / baseline:>12.1f}x")
@@ -4,6 +4,60 @@ class Config:
     """
     # Параметры базы данных
     DB_PATH = "life_manager.db"
+    DB_FETCH_BATCH_SIZE = 200  # строк за одно чтение при потоковой выборке
+
+    # Профили настроек SQLite (PRAGMA), применяются к каждому новому соединению
+    DB_PROFILE = "performance"
+    DB_PROFILES = {
+        # Журнал отката и синхронная запись на каждый commit (поведение SQLite по умолчанию)
+        "safe": {
+            "busy_timeout": 5000,
+            "journal_mode": "DELETE",
+            "synchronous": "FULL",
+            "cache_size": -2000,  # отрицательное значение - размер в КиБ
+            "mmap_size": 0,
+            "temp_store": "DEFAULT"
+        },
+        # WAL: читатели не блокируют писателя, fsync только при контрольной точке
+        "performance": {
+            "busy_timeout": 5000,
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "cache_size": -16000,
+            "mmap_size": 64 * 1024 * 1024,
+            "temp_store": "MEMORY"
+        }
+    }
+    DB_MAINTENANCE_INTERVAL = 600  # PRAGMA optimize и контрольная точка WAL, в секундах
+
+    # Кэш репозиториев: задачи по ID и результаты выборок списков
+    REPOSITORY_CACHE_SIZE = 5000
+    REPOSITORY_QUERY_CACHE_SIZE = 128
+
+    # Фоновое выполнение: размер пула потоков и период опроса результатов (мс)
+    EXECUTOR_WORKERS = 4
+    EXECUTOR_POLL_INTERVAL = 15
+    PROCESS_POOL_WORKERS = None  # None - по числу процессоров
+
+    # Отложенная запись позиции чтения книг, в секундах
+    READING_POSITION_FLUSH_DELAY = 5
+
+    # Кэш текста страниц PDF: страниц в памяти и уровень сжатия zlib в БД
+    PAGE_CACHE_SIZE = 64
+    PAGE_CACHE_COMPRESSION_LEVEL = 6
+    PDF_PREFETCH_DEPTH = 3  # страниц вперед, извлекаемых в фоне при чтении
+
+    # Добавление книг: извлекать ли текст всех страниц сразу и сколько страниц в одной задаче
+    PDF_PREEXTRACT_TEXT = True
+    PDF_EXTRACT_CHUNK_SIZE = 25
+
+    # Импорт папки с книгами: ожидание разбора одного файла (в секундах)
+    # и сколько файлов разбирается в пуле процессов одновременно
+    PDF_IMPORT_TIMEOUT = 30
+    PDF_IMPORT_WINDOW = 16
+
+    # Полнотекстовый поиск по книгам: максимальное количество результатов
+    BOOK_SEARCH_LIMIT = 50
 
     # Параметры UI
     WINDOW_WIDTH = 1200
@@ -71,9 +125,13 @@ class Config:
         "height": 45
     }
 
+    # Сводка привычек: окно доли выполнения, в днях
+    HABIT_RATE_WINDOW = 30
+
+    # Уведомления: окно объединения в сводку (в секундах) и размер очереди
+    NOTIFICATION_COALESCE_WINDOW = 1.0
+    NOTIFICATION_QUEUE_SIZE = 100
+
     # Параметры AI сервиса
     AI_HOST = "http://localhost"
-    AI_PORT = 11434
-
-    # Параметры для напоминаний
-    NOTIFICATION_CHECK_INTERVAL = 60  # в секундах
\ No newline at end of file
+    AI_PORT = 11434
\ No newline at end of file
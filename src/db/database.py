@@ -1,16 +1,161 @@
 import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
 from src.config import Config
+from src.db.migrations import LATEST_VERSION, apply_migrations, get_schema_version
 import os
 
+def _py_lower(value):
+    """Приведение к нижнему регистру с поддержкой Unicode"""
+    return value.lower() if isinstance(value, str) else value
+
+
+class ConnectionManager:
+    """
+    Менеджер соединений с SQLite: держит одно настроенное соединение на поток,
+    чтобы не открывать и не настраивать соединение при каждом обращении к БД.
+
+    Соединение потока общее для всех экземпляров Database, поэтому глубина
+    захвата считается здесь же: транзакция, начатая одним экземпляром,
+    не откатывается, когда другой экземпляр возвращает соединение внутри нее
+    """
+    _managers: Dict[str, "ConnectionManager"] = {}
+    _managers_lock = threading.Lock()
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self._generation = 0
+
+    @classmethod
+    def for_path(cls, db_path: str) -> "ConnectionManager":
+        """Получение общего менеджера для файла базы данных"""
+        with cls._managers_lock:
+            manager = cls._managers.get(db_path)
+            if manager is None:
+                manager = cls(db_path)
+                cls._managers[db_path] = manager
+            return manager
+
+    @classmethod
+    def close_all_managers(cls):
+        """Закрытие соединений всех менеджеров (при завершении приложения)"""
+        with cls._managers_lock:
+            managers = list(cls._managers.values())
+        for manager in managers:
+            manager.close_all()
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Захват соединения текущего потока (создается при первом обращении).
+        Каждому acquire() должен соответствовать release()
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.generation != self._generation:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            try:
+                self._configure(conn)
+            except sqlite3.Error:
+                conn.close()
+                raise
+
+            with self._lock:
+                self._connections.append(conn)
+                self._local.conn = conn
+                self._local.generation = self._generation
+                self._local.depth = 0
+
+        self._local.depth += 1
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        """
+        Возврат соединения в пул. После последнего захвата в потоке
+        незавершенная транзакция откатывается, как это происходило бы
+        при закрытии соединения
+        """
+        if getattr(self._local, "conn", None) is not conn:
+            # Соединение закрыто close_all(), пока было захвачено
+            return
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+        self._local.depth = 0
+        if conn.in_transaction:
+            conn.rollback()
+
+    def close_all(self):
+        """Закрытие всех соединений менеджера"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._generation += 1
+        for conn in connections:
+            try:
+                # Рекомендуемое SQLite обновление статистики перед закрытием
+                conn.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def maintenance(self):
+        """
+        Периодическое обслуживание: обновление статистики планировщика
+        и перенос WAL-журнала в основной файл без блокировки читателей
+        """
+        conn = self.acquire()
+        try:
+            conn.execute("PRAGMA optimize")
+            if conn.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal":
+                conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        finally:
+            self.release(conn)
+
+    def _configure(self, conn: sqlite3.Connection):
+        """Однократная настройка нового соединения"""
+        # Профиль производительности из конфигурации
+        for name, value in Config.DB_PROFILES.get(Config.DB_PROFILE, {}).items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        # Включаем поддержку внешних ключей
+        conn.execute("PRAGMA foreign_keys = ON")
+        # Встроенная lower() в SQLite понимает только ASCII,
+        # поэтому для поиска без учета регистра используем str.lower
+        conn.create_function("py_lower", 1, _py_lower, deterministic=True)
+
+
 class Database:
     """
-    Класс для работы с базой данных SQLite
+    Класс для работы с базой данных SQLite.
+
+    Соединения берутся из общего ConnectionManager: connect()/close()
+    лишь захватывают и возвращают соединение текущего потока, поэтому
+    их вызов на каждую операцию больше не стоит открытия файла и PRAGMA.
     """
     def __init__(self):
         self.db_path = Config.DB_PATH
-        self.conn = None
-        self.cursor = None
         self._ensure_db_directory()
+        self._manager = ConnectionManager.for_path(self.db_path)
+        self._local = threading.local()
+
+    @property
+    def conn(self):
+        """Соединение, захваченное текущим потоком (или None)"""
+        return getattr(self._local, "conn", None)
+
+    @property
+    def cursor(self):
+        """Курсор соединения текущего потока (или None)"""
+        return getattr(self._local, "cursor", None)
+
+    @classmethod
+    def close_all(cls):
+        """Закрытие всех соединений пула"""
+        ConnectionManager.close_all_managers()
 
     def _ensure_db_directory(self):
         """Проверка и создание директории для базы данных"""
@@ -19,32 +164,115 @@ class Database:
             os.makedirs(db_dir)
 
     def connect(self):
-        """Установка соединения с базой данных"""
+        """Захват соединения текущего потока"""
         if self.conn is not None:
+            self._local.depth += 1
             return True
 
         try:
-            self.conn = sqlite3.connect(self.db_path)
-            self.cursor = self.conn.cursor()
-            # Включаем поддержку внешних ключей
-            self.cursor.execute("PRAGMA foreign_keys = ON")
+            conn = self._manager.acquire()
+            self._local.conn = conn
+            self._local.cursor = conn.cursor()
+            self._local.depth = 1
             return True
         except sqlite3.Error as e:
             print(f"Ошибка при подключении к БД: {e}")
-            self.close()
+            self._local.conn = None
+            self._local.cursor = None
             return False
 
     def close(self):
-        """Закрытие соединения с базой данных"""
+        """Возврат соединения в пул (после последнего вложенного close)"""
+        conn = self.conn
+        if conn is None:
+            return
+
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+
         if self.cursor:
             self.cursor.close()
-        if self.conn:
+        try:
+            self._manager.release(conn)
+        except sqlite3.Error:
+            pass
+        self._local.cursor = None
+        self._local.conn = None
+
+    @contextmanager
+    def session(self):
+        """
+        Область использования соединения: выдает отдельный курсор
+        и возвращает соединение в пул по выходу из блока
+        """
+        if not self.connect():
+            raise sqlite3.OperationalError("Не удалось установить соединение с базой данных")
+        cursor = self.conn.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+            self.close()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Область транзакции: фиксирует изменения при успешном выходе
+        и откатывает их при исключении. Вложенные области
+        выполняются в рамках внешней транзакции
+        """
+        with self.session() as cursor:
+            conn = self.conn
+            owner = not conn.in_transaction
+            if owner:
+                # IMMEDIATE сразу берет блокировку записи, чтобы конкурирующие
+                # писатели ждали busy_timeout, а не получали SQLITE_BUSY посреди транзакции
+                conn.execute("BEGIN IMMEDIATE")
             try:
-                self.conn.close()
-            except sqlite3.Error:
-                pass
-        self.cursor = None
-        self.conn = None
+                yield cursor
+                if owner:
+                    conn.commit()
+            except BaseException:
+                if owner:
+                    conn.rollback()
+                raise
+
+    def stream(self, sql: str, parameters: Sequence = (),
+               batch_size: Optional[int] = None,
+               row_factory: Optional[Callable] = None) -> Iterator:
+        """
+        Ленивое чтение результата запроса порциями по batch_size строк.
+        Соединение удерживается, пока генератор не исчерпан или не закрыт
+        """
+        batch_size = batch_size or Config.DB_FETCH_BATCH_SIZE
+        with self.session() as cursor:
+            cursor.row_factory = row_factory
+            cursor.execute(sql, parameters)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+
+    def insert_many(self, sql: str, rows: Sequence[Sequence]) -> List[int]:
+        """
+        Пакетная вставка строк одним executemany в одной транзакции
+
+        Строки вставляются одной транзакцией без других писателей, поэтому
+        таблица с AUTOINCREMENT выдает им подряд идущие ID, заканчивающиеся
+        на last_insert_rowid().
+
+        Returns:
+            List[int]: ID вставленных строк в порядке rows
+        """
+        if not rows:
+            return []
+
+        with self.transaction() as cursor:
+            cursor.executemany(sql, rows)
+            last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+        return list(range(last_id - len(rows) + 1, last_id + 1))
 
     def begin_transaction(self):
         """Начало транзакции"""
@@ -67,7 +295,7 @@ class Database:
 
     def execute(self, sql, parameters=None):
         """Выполнение SQL запроса"""
-        if not self.connect():
+        if self.conn is None and not self.connect():
             print("Не удалось установить соединение с базой данных")
             return None
 
@@ -81,78 +309,32 @@ class Database:
             print(f"Параметры: {parameters}")
             return None
 
+    def maintenance(self) -> bool:
+        """Периодическое обслуживание базы данных (PRAGMA optimize, контрольная точка WAL)"""
+        try:
+            self._manager.maintenance()
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при обслуживании БД: {e}")
+            return False
+
     def initialize(self):
-        """Инициализация структуры базы данных"""
+        """
+        Инициализация структуры базы данных.
+
+        Если схема уже актуальна, выполняется только чтение
+        PRAGMA user_version; иначе применяются недостающие миграции
+        """
         if not self.connect():
             return False
 
         try:
-            self.begin_transaction()
-            # Создание таблиц
-            self.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-
-            self.execute('''
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    title TEXT NOT NULL,
-                    description TEXT,
-                    status TEXT,
-                    priority INTEGER,
-                    color TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            ''')
-
-            self.execute('''
-                CREATE TABLE IF NOT EXISTS habits (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    name TEXT NOT NULL,
-                    frequency TEXT,
-                    reminder_time TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            ''')
-
-            self.execute('''
-                CREATE TABLE IF NOT EXISTS books (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    title TEXT NOT NULL,
-                    author TEXT,
-                    file_path TEXT,
-                    current_page INTEGER DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            ''')
-
-            self.execute('''
-                CREATE TABLE IF NOT EXISTS notes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    book_id INTEGER,
-                    page_number INTEGER,
-                    content TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (book_id) REFERENCES books (id)
-                )
-            ''')
-
-            self.commit()
+            if get_schema_version(self.conn) >= LATEST_VERSION:
+                return True
+            apply_migrations(self.conn)
             return True
         except sqlite3.Error as e:
             print(f"Ошибка при инициализации БД: {e}")
-            self.rollback()
             return False
         finally:
-            self.close()
\ No newline at end of file
+            self.close()
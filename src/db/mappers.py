@@ -0,0 +1,150 @@
+import calendar
+import json
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Optional, Sequence, Tuple, Type, Union
+from src.db.models import User, Task, Habit, Book, Note, TaskStatus, HabitFrequency
+
+# Время хранится в БД целым числом секунд от эпохи. Наивное локальное время
+# приложения переводится в секунды как есть (как если бы оно было UTC), так же,
+# как это делает strftime('%s', ...) в SQLite, поэтому преобразование обратимо.
+_EPOCH = datetime(1970, 1, 1)
+_LEGACY_FORMAT = '%Y-%m-%d %H:%M:%S'
+_EPOCH_DAY = _EPOCH.toordinal()
+
+TimestampValue = Union[int, str, None]
+
+
+def to_timestamp(value: datetime) -> int:
+    """Преобразование datetime в целое число секунд для записи в БД"""
+    return calendar.timegm(value.timetuple())
+
+
+def from_timestamp(value: TimestampValue) -> Optional[datetime]:
+    """
+    Преобразование значения времени из БД в datetime.
+    Строки старого формата ('%Y-%m-%d %H:%M:%S') поддерживаются для совместимости
+    """
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return _EPOCH + timedelta(seconds=value)
+    return datetime.strptime(value, _LEGACY_FORMAT)
+
+
+def to_day(value: date) -> int:
+    """Преобразование даты в число дней от 1970-01-01 для записи в БД"""
+    return value.toordinal() - _EPOCH_DAY
+
+
+def from_day(value: Optional[int]) -> Optional[date]:
+    """Преобразование числа дней от 1970-01-01 в дату"""
+    return None if value is None else date.fromordinal(value + _EPOCH_DAY)
+
+
+def to_json(value: Optional[dict]) -> Optional[str]:
+    """Сериализация словаря для записи в TEXT-колонку"""
+    return None if value is None else json.dumps(value, ensure_ascii=False)
+
+
+def from_json(value: Optional[str]) -> Optional[dict]:
+    """Чтение словаря из TEXT-колонки"""
+    return None if value is None else json.loads(value)
+
+
+def compile_row_decoder(model: Type, columns: Sequence[str],
+                        converters: Dict[str, Callable]) -> Callable:
+    """
+    Компиляция функции row_factory, создающей модель из строки результата
+
+    Тело функции генерируется один раз для модели: поля передаются
+    позиционно, а преобразование применяется только к колонкам из converters.
+
+    Args:
+        model: Класс модели
+        columns: Колонки в порядке SELECT (совпадает с порядком полей модели)
+        converters: Преобразователи значений по имени колонки
+
+    Returns:
+        Callable: Функция (cursor, row) -> модель для sqlite3 row_factory
+    """
+    namespace = {"_model": model}
+    arguments = []
+    for index, column in enumerate(columns):
+        if column in converters:
+            namespace[f"_convert_{column}"] = converters[column]
+            arguments.append(f"_convert_{column}(row[{index}])")
+        else:
+            arguments.append(f"row[{index}]")
+
+    source = f"def decode(cursor, row):\n    return _model({', '.join(arguments)})\n"
+    exec(source, namespace)
+    decoder = namespace["decode"]
+    decoder.__qualname__ = f"decode_{model.__name__.lower()}"
+    return decoder
+
+
+def compile_row_encoder(columns: Sequence[str],
+                        converters: Dict[str, Callable]) -> Callable:
+    """
+    Компиляция функции, собирающей из модели кортеж параметров запроса
+
+    Обратная операция к compile_row_decoder: атрибуты читаются в порядке
+    columns, а преобразование применяется только к колонкам из converters.
+
+    Args:
+        columns: Колонки в порядке параметров запроса
+        converters: Преобразователи значений по имени колонки
+
+    Returns:
+        Callable: Функция модель -> tuple
+    """
+    namespace = {}
+    values = []
+    for column in columns:
+        if column in converters:
+            namespace[f"_convert_{column}"] = converters[column]
+            values.append(f"_convert_{column}(item.{column})")
+        else:
+            values.append(f"item.{column}")
+
+    source = f"def encode(item):\n    return ({', '.join(values)},)\n"
+    exec(source, namespace)
+    return namespace["encode"]
+
+
+def select_columns(columns: Sequence[str]) -> str:
+    """Список колонок для SELECT в порядке полей модели"""
+    return ", ".join(columns)
+
+
+USER_COLUMNS: Tuple[str, ...] = ("id", "username", "password_hash", "created_at")
+TASK_COLUMNS: Tuple[str, ...] = ("id", "user_id", "title", "description", "status",
+                                 "priority", "color", "created_at")
+HABIT_COLUMNS: Tuple[str, ...] = ("id", "user_id", "name", "frequency",
+                                  "reminder_time", "created_at")
+BOOK_COLUMNS: Tuple[str, ...] = ("id", "user_id", "title", "author", "file_path",
+                                 "current_page", "created_at", "page_count", "file_size",
+                                 "file_mtime", "content_hash", "pdf_metadata")
+NOTE_COLUMNS: Tuple[str, ...] = ("id", "book_id", "page_number", "content", "created_at")
+
+# Коды перечислений идут подряд с нуля, поэтому декодер берет
+# единственный экземпляр значения из кортежа по индексу без вызова Enum
+_TASK_STATUSES: Tuple[TaskStatus, ...] = tuple(TaskStatus)
+_HABIT_FREQUENCIES: Tuple[HabitFrequency, ...] = tuple(HabitFrequency)
+
+_TIMESTAMPS = {"created_at": from_timestamp}
+
+decode_user = compile_row_decoder(User, USER_COLUMNS, _TIMESTAMPS)
+decode_task = compile_row_decoder(Task, TASK_COLUMNS, {
+    **_TIMESTAMPS,
+    "status": _TASK_STATUSES.__getitem__
+})
+decode_habit = compile_row_decoder(Habit, HABIT_COLUMNS, {
+    **_TIMESTAMPS,
+    "frequency": _HABIT_FREQUENCIES.__getitem__
+})
+decode_book = compile_row_decoder(Book, BOOK_COLUMNS, {
+    **_TIMESTAMPS,
+    "pdf_metadata": from_json
+})
+decode_note = compile_row_decoder(Note, NOTE_COLUMNS, _TIMESTAMPS)
@@ -0,0 +1,485 @@
+import sqlite3
+from dataclasses import dataclass
+from typing import List, Tuple
+
+@dataclass(frozen=True)
+class Migration:
+    """Версионированная миграция схемы базы данных"""
+    version: int
+    description: str
+    statements: Tuple[str, ...]
+
+# Миграции применяются строго по порядку версий, каждая ровно один раз.
+# Номер последней примененной миграции хранится в PRAGMA user_version.
+MIGRATIONS: List[Migration] = [
+    Migration(
+        version=1,
+        description="Начальная схема",
+        statements=(
+            '''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                title TEXT NOT NULL,
+                description TEXT,
+                status TEXT,
+                priority INTEGER,
+                color TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS habits (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                name TEXT NOT NULL,
+                frequency TEXT,
+                reminder_time TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS books (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                title TEXT NOT NULL,
+                author TEXT,
+                file_path TEXT,
+                current_page INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS notes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                book_id INTEGER,
+                page_number INTEGER,
+                content TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (book_id) REFERENCES books (id)
+            )
+            ''',
+        )
+    ),
+    Migration(
+        version=2,
+        description="Вторичные индексы для выборок по пользователю, времени и книге",
+        statements=(
+            'CREATE INDEX IF NOT EXISTS idx_tasks_user_id ON tasks (user_id)',
+            'CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks (created_at)',
+            'CREATE INDEX IF NOT EXISTS idx_habits_user_id ON habits (user_id)',
+            'CREATE INDEX IF NOT EXISTS idx_habits_reminder_time ON habits (reminder_time)',
+            'CREATE INDEX IF NOT EXISTS idx_books_user_id ON books (user_id)',
+            'CREATE INDEX IF NOT EXISTS idx_notes_book_page ON notes (book_id, page_number)',
+        )
+    ),
+    Migration(
+        version=3,
+        description="Составные индексы для фильтрации и сортировки задач",
+        statements=(
+            'CREATE INDEX IF NOT EXISTS idx_tasks_user_priority ON tasks (user_id, priority)',
+            'CREATE INDEX IF NOT EXISTS idx_tasks_user_created_at ON tasks (user_id, created_at)',
+            'CREATE INDEX IF NOT EXISTS idx_tasks_user_status_priority ON tasks (user_id, status, priority)',
+            'CREATE INDEX IF NOT EXISTS idx_tasks_user_status_created_at ON tasks (user_id, status, created_at)',
+            # Покрывается индексами выше по префиксу user_id
+            'DROP INDEX IF EXISTS idx_tasks_user_id',
+        )
+    ),
+    Migration(
+        version=4,
+        description="Счетчики задач по статусу и приоритету, поддерживаемые триггерами",
+        statements=(
+            '''
+            CREATE TABLE IF NOT EXISTS task_counters (
+                user_id INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, status, priority)
+            ) WITHOUT ROWID
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_tasks_counters_insert
+            AFTER INSERT ON tasks
+            BEGIN
+                INSERT INTO task_counters (user_id, status, priority, count)
+                VALUES (NEW.user_id, IFNULL(NEW.status, ''), IFNULL(NEW.priority, 0), 1)
+                ON CONFLICT (user_id, status, priority) DO UPDATE SET count = count + 1;
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_tasks_counters_delete
+            AFTER DELETE ON tasks
+            BEGIN
+                UPDATE task_counters SET count = count - 1
+                WHERE user_id = OLD.user_id
+                  AND status = IFNULL(OLD.status, '')
+                  AND priority = IFNULL(OLD.priority, 0);
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_tasks_counters_update
+            AFTER UPDATE OF user_id, status, priority ON tasks
+            WHEN OLD.user_id IS NOT NEW.user_id
+              OR OLD.status IS NOT NEW.status
+              OR OLD.priority IS NOT NEW.priority
+            BEGIN
+                UPDATE task_counters SET count = count - 1
+                WHERE user_id = OLD.user_id
+                  AND status = IFNULL(OLD.status, '')
+                  AND priority = IFNULL(OLD.priority, 0);
+                INSERT INTO task_counters (user_id, status, priority, count)
+                VALUES (NEW.user_id, IFNULL(NEW.status, ''), IFNULL(NEW.priority, 0), 1)
+                ON CONFLICT (user_id, status, priority) DO UPDATE SET count = count + 1;
+            END
+            ''',
+            '''
+            INSERT OR REPLACE INTO task_counters (user_id, status, priority, count)
+            SELECT user_id, IFNULL(status, ''), IFNULL(priority, 0), COUNT(*)
+            FROM tasks
+            WHERE user_id IS NOT NULL
+            GROUP BY user_id, IFNULL(status, ''), IFNULL(priority, 0)
+            ''',
+        )
+    ),
+    Migration(
+        version=5,
+        description="Время создания в виде целого числа секунд от эпохи",
+        statements=(
+            '''
+            UPDATE users SET created_at = CAST(strftime('%s', created_at) AS INTEGER)
+            WHERE typeof(created_at) = 'text' AND strftime('%s', created_at) IS NOT NULL
+            ''',
+            '''
+            UPDATE tasks SET created_at = CAST(strftime('%s', created_at) AS INTEGER)
+            WHERE typeof(created_at) = 'text' AND strftime('%s', created_at) IS NOT NULL
+            ''',
+            '''
+            UPDATE habits SET created_at = CAST(strftime('%s', created_at) AS INTEGER)
+            WHERE typeof(created_at) = 'text' AND strftime('%s', created_at) IS NOT NULL
+            ''',
+            '''
+            UPDATE books SET created_at = CAST(strftime('%s', created_at) AS INTEGER)
+            WHERE typeof(created_at) = 'text' AND strftime('%s', created_at) IS NOT NULL
+            ''',
+            '''
+            UPDATE notes SET created_at = CAST(strftime('%s', created_at) AS INTEGER)
+            WHERE typeof(created_at) = 'text' AND strftime('%s', created_at) IS NOT NULL
+            ''',
+        )
+    ),
+    Migration(
+        version=6,
+        description="Целочисленные коды статуса задач и частоты привычек",
+        statements=(
+            # Тип колонки в SQLite не меняется без пересоздания таблицы
+            '''
+            CREATE TABLE tasks_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                title TEXT NOT NULL,
+                description TEXT,
+                status INTEGER NOT NULL DEFAULT 0,
+                priority INTEGER,
+                color TEXT,
+                created_at INTEGER,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+            ''',
+            '''
+            INSERT INTO tasks_new (id, user_id, title, description, status, priority, color, created_at)
+            SELECT id, user_id, title, description,
+                   CASE status
+                       WHEN 'in_progress' THEN 1
+                       WHEN 'completed' THEN 2
+                       WHEN 'cancelled' THEN 3
+                       WHEN 'postponed' THEN 4
+                       ELSE 0
+                   END,
+                   priority, color, created_at
+            FROM tasks
+            ''',
+            # Сохраняем счетчик AUTOINCREMENT, чтобы ID удаленных задач не переиспользовались
+            # (строки счетчика для пустой таблицы еще нет - создаем ее)
+            '''
+            INSERT INTO sqlite_sequence (name, seq)
+            SELECT 'tasks_new', 0
+            WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'tasks_new')
+            ''',
+            '''
+            UPDATE sqlite_sequence
+            SET seq = MAX(seq, IFNULL((SELECT seq FROM sqlite_sequence WHERE name = 'tasks'), 0))
+            WHERE name = 'tasks_new'
+            ''',
+            'DROP TABLE tasks',
+            'ALTER TABLE tasks_new RENAME TO tasks',
+            'CREATE INDEX idx_tasks_created_at ON tasks (created_at)',
+            'CREATE INDEX idx_tasks_user_priority ON tasks (user_id, priority)',
+            'CREATE INDEX idx_tasks_user_created_at ON tasks (user_id, created_at)',
+            'CREATE INDEX idx_tasks_user_status_priority ON tasks (user_id, status, priority)',
+            'CREATE INDEX idx_tasks_user_status_created_at ON tasks (user_id, status, created_at)',
+            'DROP TABLE task_counters',
+            '''
+            CREATE TABLE task_counters (
+                user_id INTEGER NOT NULL,
+                status INTEGER NOT NULL,
+                priority INTEGER NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, status, priority)
+            ) WITHOUT ROWID
+            ''',
+            '''
+            CREATE TRIGGER trg_tasks_counters_insert
+            AFTER INSERT ON tasks
+            BEGIN
+                INSERT INTO task_counters (user_id, status, priority, count)
+                VALUES (NEW.user_id, NEW.status, IFNULL(NEW.priority, 0), 1)
+                ON CONFLICT (user_id, status, priority) DO UPDATE SET count = count + 1;
+            END
+            ''',
+            '''
+            CREATE TRIGGER trg_tasks_counters_delete
+            AFTER DELETE ON tasks
+            BEGIN
+                UPDATE task_counters SET count = count - 1
+                WHERE user_id = OLD.user_id
+                  AND status = OLD.status
+                  AND priority = IFNULL(OLD.priority, 0);
+            END
+            ''',
+            '''
+            CREATE TRIGGER trg_tasks_counters_update
+            AFTER UPDATE OF user_id, status, priority ON tasks
+            WHEN OLD.user_id IS NOT NEW.user_id
+              OR OLD.status IS NOT NEW.status
+              OR OLD.priority IS NOT NEW.priority
+            BEGIN
+                UPDATE task_counters SET count = count - 1
+                WHERE user_id = OLD.user_id
+                  AND status = OLD.status
+                  AND priority = IFNULL(OLD.priority, 0);
+                INSERT INTO task_counters (user_id, status, priority, count)
+                VALUES (NEW.user_id, NEW.status, IFNULL(NEW.priority, 0), 1)
+                ON CONFLICT (user_id, status, priority) DO UPDATE SET count = count + 1;
+            END
+            ''',
+            '''
+            INSERT INTO task_counters (user_id, status, priority, count)
+            SELECT user_id, status, IFNULL(priority, 0), COUNT(*)
+            FROM tasks
+            WHERE user_id IS NOT NULL
+            GROUP BY user_id, status, IFNULL(priority, 0)
+            ''',
+            '''
+            CREATE TABLE habits_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                name TEXT NOT NULL,
+                frequency INTEGER NOT NULL DEFAULT 0,
+                reminder_time TEXT,
+                created_at INTEGER,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+            ''',
+            '''
+            INSERT INTO habits_new (id, user_id, name, frequency, reminder_time, created_at)
+            SELECT id, user_id, name,
+                   CASE frequency
+                       WHEN 'weekly' THEN 1
+                       WHEN 'monthly' THEN 2
+                       ELSE 0
+                   END,
+                   reminder_time, created_at
+            FROM habits
+            ''',
+            # Переносим счетчик AUTOINCREMENT (и для пустой таблицы)
+            '''
+            INSERT INTO sqlite_sequence (name, seq)
+            SELECT 'habits_new', 0
+            WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'habits_new')
+            ''',
+            '''
+            UPDATE sqlite_sequence
+            SET seq = MAX(seq, IFNULL((SELECT seq FROM sqlite_sequence WHERE name = 'habits'), 0))
+            WHERE name = 'habits_new'
+            ''',
+            'DROP TABLE habits',
+            'ALTER TABLE habits_new RENAME TO habits',
+            'CREATE INDEX idx_habits_user_id ON habits (user_id)',
+            'CREATE INDEX idx_habits_reminder_time ON habits (reminder_time)',
+        )
+    ),
+    Migration(
+        version=7,
+        description="Кэш извлеченного текста страниц книг",
+        statements=(
+            # Текст хранится сжатым zlib; file_size и file_mtime (нс) - отпечаток
+            # файла, из которого он извлечен, для сброса кэша при изменении файла
+            '''
+            CREATE TABLE book_pages (
+                book_id INTEGER NOT NULL,
+                page_number INTEGER NOT NULL,
+                file_size INTEGER NOT NULL,
+                file_mtime INTEGER NOT NULL,
+                content BLOB NOT NULL,
+                PRIMARY KEY (book_id, page_number),
+                FOREIGN KEY (book_id) REFERENCES books (id) ON DELETE CASCADE
+            ) WITHOUT ROWID
+            ''',
+        )
+    ),
+    Migration(
+        version=8,
+        description="Сведения о файле книги: число страниц, размер, время изменения, хеш, метаданные PDF",
+        statements=(
+            'ALTER TABLE books ADD COLUMN page_count INTEGER',
+            'ALTER TABLE books ADD COLUMN file_size INTEGER',
+            'ALTER TABLE books ADD COLUMN file_mtime INTEGER',
+            'ALTER TABLE books ADD COLUMN content_hash TEXT',
+            'ALTER TABLE books ADD COLUMN pdf_metadata TEXT',
+            'CREATE INDEX idx_books_user_hash ON books (user_id, content_hash)',
+        )
+    ),
+    Migration(
+        version=9,
+        description="Полнотекстовый индекс FTS5 по тексту страниц книг",
+        statements=(
+            '''
+            CREATE VIRTUAL TABLE book_pages_fts USING fts5(
+                book_id UNINDEXED,
+                page_number UNINDEXED,
+                content,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+            ''',
+            # Отпечаток файла, по которому построен индекс книги
+            '''
+            CREATE TABLE book_fts_state (
+                book_id INTEGER PRIMARY KEY,
+                file_size INTEGER NOT NULL,
+                file_mtime INTEGER NOT NULL,
+                FOREIGN KEY (book_id) REFERENCES books (id) ON DELETE CASCADE
+            )
+            ''',
+            '''
+            CREATE TRIGGER trg_books_fts_delete AFTER DELETE ON books
+            BEGIN
+                DELETE FROM book_pages_fts WHERE book_id = old.id;
+            END
+            ''',
+        )
+    ),
+    Migration(
+        version=10,
+        description="Журнал выполнения привычек и сводка серий",
+        statements=(
+            # День - число дней от 1970-01-01; первичный ключ служит индексом (habit_id, day)
+            '''
+            CREATE TABLE habit_checkins (
+                habit_id INTEGER NOT NULL,
+                day INTEGER NOT NULL,
+                created_at INTEGER NOT NULL,
+                PRIMARY KEY (habit_id, day),
+                FOREIGN KEY (habit_id) REFERENCES habits (id) ON DELETE CASCADE
+            ) WITHOUT ROWID
+            ''',
+            # Сводка обновляется при каждой отметке: период - день, неделя или месяц
+            # в зависимости от частоты, recent_mask - отметки последних дней (бит i - день last_day - i)
+            '''
+            CREATE TABLE habit_stats (
+                habit_id INTEGER PRIMARY KEY,
+                frequency INTEGER NOT NULL,
+                current_streak INTEGER NOT NULL,
+                longest_streak INTEGER NOT NULL,
+                last_period INTEGER,
+                last_day INTEGER,
+                total_checkins INTEGER NOT NULL,
+                recent_mask INTEGER NOT NULL,
+                FOREIGN KEY (habit_id) REFERENCES habits (id) ON DELETE CASCADE
+            )
+            ''',
+        )
+    ),
+    Migration(
+        version=11,
+        description="rowid полнотекстового индекса из ID книги и номера страницы",
+        statements=(
+            # rowid = (book_id << 20) + page_number: страницы книги занимают
+            # непрерывный диапазон rowid и удаляются по нему, а не просмотром
+            # всего индекса по колонке UNINDEXED
+            '''
+            CREATE VIRTUAL TABLE book_pages_fts_new USING fts5(
+                book_id UNINDEXED,
+                page_number UNINDEXED,
+                content,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+            ''',
+            '''
+            INSERT INTO book_pages_fts_new (rowid, book_id, page_number, content)
+            SELECT (book_id << 20) + page_number, book_id, page_number, content
+            FROM book_pages_fts
+            WHERE page_number BETWEEN 0 AND 1048575
+            ''',
+            'DROP TRIGGER trg_books_fts_delete',
+            'DROP TABLE book_pages_fts',
+            'ALTER TABLE book_pages_fts_new RENAME TO book_pages_fts',
+            '''
+            CREATE TRIGGER trg_books_fts_delete AFTER DELETE ON books
+            BEGIN
+                DELETE FROM book_pages_fts
+                WHERE rowid BETWEEN old.id << 20 AND (old.id << 20) + 1048575;
+            END
+            ''',
+        )
+    ),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Получение текущей версии схемы"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(conn: sqlite3.Connection) -> int:
+    """
+    Применение всех еще не примененных миграций
+
+    Каждая миграция выполняется в отдельной транзакции вместе
+    с обновлением user_version, поэтому прерванный запуск
+    продолжится с той же миграции.
+
+    Returns:
+        int: Версия схемы после применения миграций
+    """
+    version = get_schema_version(conn)
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+
+        conn.execute("BEGIN")
+        try:
+            for statement in migration.statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {migration.version:d}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+        print(f"Применена миграция {migration.version}: {migration.description}")
+        version = migration.version
+    return version
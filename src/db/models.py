@@ -1,8 +1,50 @@
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from enum import IntEnum
+from typing import Dict, List, Optional, Union
 
-@dataclass
+class CodedEnum(IntEnum):
+    """
+    Перечисление, которое хранится в БД целым кодом,
+    а в интерфейсе и API задается строковым названием
+    """
+    @property
+    def label(self) -> str:
+        """Строковое название значения ('completed', 'daily', ...)"""
+        return self.name.lower()
+
+    @classmethod
+    def parse(cls, value: Union["CodedEnum", str, int]):
+        """
+        Получение значения по самому значению, коду или названию
+
+        Raises:
+            ValueError: Если значение неизвестно
+        """
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, str):
+            try:
+                return cls[value.upper()]
+            except KeyError:
+                raise ValueError(f"Неизвестное значение {cls.__name__}: {value}") from None
+        return cls(value)
+
+class TaskStatus(CodedEnum):
+    """Статус задачи"""
+    NEW = 0
+    IN_PROGRESS = 1
+    COMPLETED = 2
+    CANCELLED = 3
+    POSTPONED = 4
+
+class HabitFrequency(CodedEnum):
+    """Частота выполнения привычки"""
+    DAILY = 0
+    WEEKLY = 1
+    MONTHLY = 2
+
+@dataclass(slots=True)
 class User:
     """Модель пользователя"""
     id: Optional[int]
@@ -10,29 +52,39 @@ class User:
     password_hash: str
     created_at: datetime
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     """Модель задачи"""
     id: Optional[int]
     user_id: int
     title: str
     description: Optional[str]
-    status: str  # new, completed, cancelled, postponed
+    status: TaskStatus
     priority: int
     color: Optional[str]
     created_at: datetime
 
-@dataclass
+@dataclass(slots=True)
 class Habit:
     """Модель привычки"""
     id: Optional[int]
     user_id: int
     name: str
-    frequency: str  # daily, weekly, monthly
+    frequency: HabitFrequency
     reminder_time: Optional[str]
     created_at: datetime
 
-@dataclass
+@dataclass(slots=True)
+class HabitSummary:
+    """Сводка выполнения привычки"""
+    habit_id: int
+    current_streak: int
+    longest_streak: int
+    last_checkin: Optional[date]
+    total_checkins: int
+    completion_rate: float  # выполнение за последние дни, %
+
+@dataclass(slots=True)
 class Book:
     """Модель книги"""
     id: Optional[int]
@@ -42,8 +94,14 @@ class Book:
     file_path: str
     current_page: int
     created_at: datetime
+    # Сведения о файле, записанные при добавлении книги
+    page_count: Optional[int] = None
+    file_size: Optional[int] = None
+    file_mtime: Optional[int] = None  # время изменения файла, нс
+    content_hash: Optional[str] = None  # SHA-256 содержимого файла
+    pdf_metadata: Optional[Dict[str, str]] = None
 
-@dataclass
+@dataclass(slots=True)
 class Note:
     """Модель заметки к книге"""
     id: Optional[int]
@@ -51,3 +109,17 @@ class Note:
     page_number: int
     content: str
     created_at: datetime
+
+@dataclass(slots=True)
+class SearchHit:
+    """Результат полнотекстового поиска по книгам"""
+    book: Book
+    page_number: int
+    snippet: str
+
+@dataclass(slots=True)
+class PageMatches:
+    """Совпадения на одной просмотренной странице при поиске в открытой книге"""
+    page_number: int
+    page_count: int
+    snippets: List[str]
@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple
+from src.db.mappers import to_timestamp
+
+def keyset_condition(columns: Sequence[str], after: Optional[Sequence[Any]],
+                     descending: bool = False) -> Tuple[str, list]:
+    """
+    Условие keyset-пагинации: строки строго после ключа after
+
+    Сравнение кортежей (col1, col2) > (?, ?) обслуживается тем же индексом,
+    что и ORDER BY col1, col2, поэтому стоимость страницы не зависит
+    от того, насколько далеко она от начала выборки.
+
+    Args:
+        columns: Колонки ключа сортировки (последняя должна быть уникальной, обычно id)
+        after: Значения ключа последней строки предыдущей страницы (или None)
+        descending: Сортировка по убыванию
+
+    Returns:
+        Tuple[str, list]: SQL-фрагмент (пустой, если after не задан) и параметры
+    """
+    if after is None:
+        return "", []
+
+    if len(after) != len(columns):
+        raise ValueError(f"Ключ пагинации должен содержать {len(columns)} значения")
+
+    operator = "<" if descending else ">"
+    placeholders = ", ".join("?" for _ in columns)
+    condition = f"({', '.join(columns)}) {operator} ({placeholders})"
+    return condition, [to_db_value(value) for value in after]
+
+
+def to_db_value(value: Any) -> Any:
+    """Приведение значения ключа к виду, в котором оно хранится в БД"""
+    if isinstance(value, datetime):
+        return to_timestamp(value)
+    return value
@@ -12,6 +12,8 @@ try:
     import customtkinter as ctk
     from src.ui.main_window import MainWindow
     from src.db.database import Database
+    from src.services.executor import BackgroundExecutor
+    from src.services.reminder_scheduler import ReminderScheduler
     from src.config import Config
     print("Все необходимые модули импортированы успешно")
 except ImportError as e:
@@ -47,6 +49,12 @@ def main():
 
         print("Запуск главного цикла приложения...")
         app.mainloop()
+
+        # Останавливаем фоновые потоки и закрываем соединения пула
+        # после завершения главного цикла
+        ReminderScheduler().stop()
+        BackgroundExecutor().shutdown()
+        Database.close_all()
     except Exception as e:
         print(f"Критическая ошибка: {e}")
         import traceback
@@ -1,4 +1,8 @@
 # Patterns package initialization
-from .observer import Observer, Subject, NotificationManager
-from .repository import Repository, TaskRepository
+from .observer import (Observer, Subject, NotificationManager, ChangeKind, ChangeEvent,
+                       ChangeObserver, EventBus)
+from .cache import LRUCache
+from .write_behind import WriteBehindBuffer
+from .repository import (Repository, RepositoryCache, TableRepository, TaskRepository,
+                         HabitRepository, BookRepository, NoteRepository)
 from .task_factory import TaskCreator, SimpleTaskCreator, UrgentTaskCreator, TaskFactory
\ No newline at end of file
@@ -1,5 +1,11 @@
+import threading
+import weakref
 from abc import ABC, abstractmethod
-from typing import List
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from src.config import Config
 
 class Observer(ABC):
     """
@@ -12,33 +18,218 @@ class Observer(ABC):
 class Subject:
     """
     Субъект, за которым наблюдают (например, система напоминаний)
+
+    Наблюдатели хранятся слабыми ссылками: уничтоженный фрейм не удерживается
+    субъектом и пропадает из списка сам. Наблюдатель может подписаться только
+    на нужные темы сообщений.
     """
     def __init__(self):
-        self._observers: List[Observer] = []
+        self._observers: List[Tuple[weakref.ref, Optional[FrozenSet[str]]]] = []
+        self._observers_lock = threading.Lock()
+
+    def attach(self, observer: Observer, topics: Optional[Iterable[str]] = None):
+        """
+        Добавление наблюдателя
 
-    def attach(self, observer: Observer):
-        """Добавление наблюдателя"""
-        if observer not in self._observers:
-            self._observers.append(observer)
+        Args:
+            observer: Наблюдатель
+            topics: Темы сообщений, которые он получает (по умолчанию - все)
+        """
+        with self._observers_lock:
+            self._observers = [(ref, subscribed) for ref, subscribed in self._observers
+                               if ref() is not None and ref() is not observer]
+            self._observers.append((weakref.ref(observer),
+                                    None if topics is None else frozenset(topics)))
 
     def detach(self, observer: Observer):
         """Удаление наблюдателя"""
-        self._observers.remove(observer)
+        with self._observers_lock:
+            self._observers = [(ref, subscribed) for ref, subscribed in self._observers
+                               if ref() is not None and ref() is not observer]
 
-    def notify(self, message: str):
-        """Уведомление всех наблюдателей"""
-        for observer in self._observers:
+    def notify(self, message: str, topic: Optional[str] = None):
+        """Уведомление наблюдателей, подписанных на тему сообщения"""
+        for observer in self._subscribers(topic):
             observer.update(message)
 
+    def _subscribers(self, topic: Optional[str], *aliases: str) -> List[Observer]:
+        """
+        Живые наблюдатели, подписанные на тему или один из ее синонимов
+        (ссылки на удаленные объекты отбрасываются)
+        """
+        with self._observers_lock:
+            alive = [(ref(), subscribed) for ref, subscribed in self._observers]
+            self._observers = [(ref, subscribed) for ref, subscribed in self._observers
+                               if ref() is not None]
+        return [observer for observer, subscribed in alive
+                if observer is not None and (subscribed is None or topic is None
+                                             or topic in subscribed
+                                             or not subscribed.isdisjoint(aliases))]
+
 class NotificationManager(Subject):
     """
     Менеджер уведомлений, реализующий паттерн Observer
+
+    add_notification можно вызывать из любого потока: сообщения копятся
+    в ограниченной очереди (при переполнении отбрасываются самые старые),
+    и через Config.NOTIFICATION_COALESCE_WINDOW секунд после первого
+    сообщения все накопленные сообщения одной темы доставляются
+    наблюдателям одной сводкой. Доставка выполняется через dispatch,
+    например в потоке Tk через BackgroundExecutor.post.
     """
-    def __init__(self):
+    def __init__(self, dispatch: Optional[Callable[[Callable], None]] = None):
+        """
+        Args:
+            dispatch: Функция, выполняющая доставку в нужном потоке
+                (по умолчанию - в потоке таймера)
+        """
         super().__init__()
-        self._notifications = []
+        self.dispatch = dispatch
+        self.window = Config.NOTIFICATION_COALESCE_WINDOW
+        self._pending: Deque[Tuple[Optional[str], str]] = deque(maxlen=Config.NOTIFICATION_QUEUE_SIZE)
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def add_notification(self, message: str, topic: Optional[str] = None):
+        """
+        Добавление нового уведомления
+
+        Args:
+            message: Текст уведомления
+            topic: Тема (наблюдатели без подписки на нее уведомление не получат)
+        """
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped += 1
+            self._pending.append((topic, message))
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self._schedule_flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Немедленная доставка накопленных уведомлений (в текущем потоке)"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._pending = list(self._pending), deque(maxlen=self._pending.maxlen)
+            dropped, self._dropped = self._dropped, 0
+
+        by_topic: Dict[Optional[str], List[str]] = {}
+        for topic, message in pending:
+            by_topic.setdefault(topic, []).append(message)
+        for topic, messages in by_topic.items():
+            self.notify(self._digest(messages, dropped), topic)
+            dropped = 0
+
+    def _schedule_flush(self):
+        """Окончание окна накопления: доставка в потоке dispatch"""
+        with self._lock:
+            self._timer = None
+        if self.dispatch is None:
+            self.flush()
+        else:
+            self.dispatch(self.flush)
+
+    @staticmethod
+    def _digest(messages: List[str], dropped: int) -> str:
+        """Одно сообщение или сводка нескольких"""
+        if len(messages) == 1 and not dropped:
+            return messages[0]
+        lines = [f"Уведомлений: {len(messages) + dropped}"]
+        lines += [f"• {message}" for message in messages]
+        if dropped:
+            lines.append(f"(и еще {dropped} более ранних)")
+        return "\n".join(lines)
+
+
+class ChangeKind(Enum):
+    """Вид изменения сущности"""
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+@dataclass(frozen=True, slots=True)
+class ChangeEvent:
+    """
+    Изменение сущности в базе данных
+
+    entity - вид сущности ("task", "habit", "book", "note"), owner_id -
+    владелец записи (пользователь, для заметок - книга; None, если
+    неизвестен), changes - новые значения измененных полей, item -
+    состояние сущности после изменения, если оно известно
+    """
+    entity: str
+    kind: ChangeKind
+    id: int
+    owner_id: Optional[int] = None
+    changes: Dict[str, Any] = field(default_factory=dict)
+    item: Any = None
+
+    @property
+    def topic(self) -> str:
+        """Тема события, например task_created"""
+        return f"{self.entity}_{self.kind.value}"
+
+class ChangeObserver(ABC):
+    """
+    Абстрактный наблюдатель изменений сущностей
+    """
+    @abstractmethod
+    def on_change(self, event: ChangeEvent):
+        pass
+
+class EventBus(Subject):
+    """
+    Шина изменений сущностей (Singleton)
+
+    Репозитории и сервисы публикуют события после фиксации транзакции,
+    фреймы подписываются на вид сущности ("task") или отдельную тему
+    ("task_deleted") и обновляют только затронутые строки. Пачка событий
+    доставляется через dispatch одним вызовом - главное окно направляет
+    ее в поток Tk через BackgroundExecutor.post; без dispatch события
+    доставляются сразу в потоке публикации.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            Subject.__init__(cls._instance)
+            cls._instance.dispatch = None
+        return cls._instance
+
+    def __init__(self):
+        """
+        __new__ уже инициализировал все необходимые атрибуты
+        """
+        pass
+
+    def publish(self, events: Iterable[ChangeEvent]):
+        """
+        Публикация событий (из любого потока)
+
+        Args:
+            events: События в порядке изменений
+        """
+        if not self._observers:
+            # Без подписчиков (скрипты, бенчмарки) события даже не создаются
+            return
+        events = list(events)
+        if not events:
+            return
+        if self.dispatch is None:
+            self.deliver(events)
+        else:
+            self.dispatch(self.deliver, events)
 
-    def add_notification(self, message: str):
-        """Добавление нового уведомления"""
-        self._notifications.append(message)
-        self.notify(message)
+    def deliver(self, events: List[ChangeEvent]):
+        """Доставка событий подписчикам (в потоке dispatch)"""
+        for event in events:
+            for observer in self._subscribers(event.topic, event.entity):
+                try:
+                    observer.on_change(event)
+                except Exception as e:
+                    print(f"Ошибка при обработке события {event.topic}: {e}")
@@ -1,11 +1,25 @@
+import sqlite3
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Optional, TypeVar, Generic
-from src.db.database import Database
-from src.db.models import Task, Habit, Book, Note
+from copy import copy
 from datetime import datetime
+from typing import (Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional,
+                    Set, TypeVar, Generic, Tuple)
+from src.config import Config
+from src.db.database import Database
+from src.db.pagination import keyset_condition
+from src.db.mappers import (TASK_COLUMNS, HABIT_COLUMNS, BOOK_COLUMNS, NOTE_COLUMNS,
+                             decode_task, decode_habit, decode_book, decode_note,
+                             compile_row_encoder, select_columns, to_json, to_timestamp)
+from src.db.models import Task, TaskStatus, Habit, HabitFrequency, Book, Note
+from src.patterns.cache import LRUCache
+from src.patterns.observer import ChangeEvent, ChangeKind, EventBus
 
 T = TypeVar('T')
 
+# Размер пачки значений в одном запросе IN (...) (ниже лимита параметров SQLite)
+HASH_LOOKUP_BATCH = 500
+
 class Repository(ABC, Generic[T]):
     """
     Абстрактный базовый класс для репозиториев
@@ -38,119 +52,711 @@ class Repository(ABC, Generic[T]):
         """Удаляет элемент"""
         pass
 
-class TaskRepository(Repository[Task]):
+class RepositoryCache(Generic[T]):
     """
-    Репозиторий для работы с задачами
+    Кэш чтения для репозитория: identity map объектов по ID
+    и результаты выборок списков по пользователю.
+
+    Выборка хранится как кортеж ID, а объекты берутся из identity map,
+    поэтому одна и та же запись хранится один раз. Модели изменяемы,
+    поэтому кэш сохраняет и выдает копии: изменение полученного объекта
+    не влияет на кэш. Если хотя бы один объект выборки уже вытеснен,
+    выборка считается промахом.
+
+    Каждый сброс увеличивает version: результат чтения, начатого до сброса,
+    не сохраняется, чтобы устаревшие данные не попали в кэш из другого потока.
     """
-    def create(self, task: Task) -> Optional[Task]:
-        try:
-            if not self.db.connect():
-                return None
+    def __init__(self, max_items: int, max_queries: int):
+        self.items: LRUCache[int, T] = LRUCache(max_items)
+        self.queries: LRUCache[Tuple[int, Hashable], Tuple[int, ...]] = LRUCache(max_queries)
+        self.version = 0
+        self._lock = threading.Lock()
 
-            cursor = self.db.cursor
-            cursor.execute('''
-                INSERT INTO tasks (user_id, title, description, status, priority, color, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (task.user_id, task.title, task.description, task.status, 
-                  task.priority, task.color, task.created_at.strftime('%Y-%m-%d %H:%M:%S')))
+    def get(self, id: int) -> Optional[T]:
+        """Копия объекта по ID (None при промахе)"""
+        item = self.items.get(id)
+        return copy(item) if item is not None else None
 
-            task_id = cursor.lastrowid
-            self.db.conn.commit()
+    def put(self, id: int, item: T, version: int):
+        """Запоминание объекта, прочитанного при указанной версии кэша"""
+        with self._lock:
+            if version == self.version:
+                self.items.put(id, copy(item))
 
-            task.id = task_id
-            return task
+    def get_list(self, user_id: int, key: Hashable) -> Optional[List[T]]:
+        """Копии объектов выборки пользователя (None при промахе)"""
+        ids = self.queries.peek((user_id, key))
+        result = [] if ids is not None else None
+        for id in ids or ():
+            item = self.items.peek(id)
+            if item is None:
+                self.queries.pop((user_id, key))
+                result = None
+                break
+            result.append(copy(item))
+        self.queries.record(result is not None)
+        return result
+
+    def put_list(self, user_id: int, key: Hashable, items: List[T], version: int):
+        """Запоминание результата выборки пользователя вместе с его объектами"""
+        with self._lock:
+            if version != self.version:
+                return
+            for item in items:
+                self.items.put(item.id, copy(item))
+            self.queries.put((user_id, key), tuple(item.id for item in items))
+
+    def invalidate(self, user_id: Optional[int], ids: Iterable[int] = ()):
+        """Сброс объектов с указанными ID и всех выборок пользователя"""
+        with self._lock:
+            self.version += 1
+            for id in ids:
+                self.items.pop(id)
+            self.queries.discard_where(lambda key: key[0] == user_id)
+
+    def clear(self):
+        """Полная очистка кэша"""
+        with self._lock:
+            self.version += 1
+            self.items.clear()
+            self.queries.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Счетчики попаданий и промахов для мониторинга"""
+        return {"items": self.items.stats(), "queries": self.queries.stats()}
+
+class TableRepository(Repository[T]):
+    """
+    Репозиторий таблицы, описанной метаданными.
+
+    Подкласс задает таблицу, колонки в порядке полей модели и декодер строк,
+    а INSERT/SELECT/UPDATE/DELETE и функции сборки параметров строятся
+    один раз при объявлении класса. Все сущности получают одинаковые
+    пакетные и потоковые операции. После фиксации изменений в EventBus
+    публикуются события сущности ENTITY.
+    """
+    # Метаданные таблицы, задаются в подклассе
+    TABLE: str = ""
+    ENTITY: str = ""  # вид сущности в событиях изменений
+    COLUMNS: Tuple[str, ...] = ()  # колонки в порядке полей модели, первая - id
+    OWNER_COLUMN = "user_id"  # колонка владельца для выборки списков
+    ORDER_COLUMNS: Tuple[str, ...] = ("id",)  # порядок списков и ключ keyset-пагинации
+    UPDATE_COLUMNS: Tuple[str, ...] = ()  # колонки, которые изменяет update()
+    ENCODERS: Dict[str, Callable] = {"created_at": to_timestamp}
+    decoder: Callable = None
+    ID_BATCH_SIZE = 500  # максимум ID в одном условии IN (...)
+
+    # Сгенерированные при объявлении подкласса запросы
+    SELECT_SQL = INSERT_SQL = UPDATE_SQL = UPDATE_MANY_SQL = DELETE_SQL = ""
+    SELECT_UPDATE_COLUMNS_SQL = ""
+
+    def __init__(self):
+        super().__init__()
+        self.events = EventBus()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.TABLE:
+            cls._compile_statements()
+
+    @classmethod
+    def _compile_statements(cls):
+        """Построение запросов и функций сборки параметров по метаданным"""
+        insert_columns = cls.COLUMNS[1:]
+        placeholders = ", ".join("?" for _ in insert_columns)
+        assignments = ", ".join(f"{column} = ?" for column in cls.UPDATE_COLUMNS)
+
+        cls.SELECT_SQL = f"SELECT {select_columns(cls.COLUMNS)} FROM {cls.TABLE}"
+        cls.INSERT_SQL = (f"INSERT INTO {cls.TABLE} ({', '.join(insert_columns)}) "
+                          f"VALUES ({placeholders})")
+        cls.UPDATE_SQL = (f"UPDATE {cls.TABLE} SET {assignments} "
+                          f"WHERE id = ? RETURNING {cls.OWNER_COLUMN}")
+        # Пакетный вариант без RETURNING: с ним executemany не считает rowcount
+        cls.UPDATE_MANY_SQL = f"UPDATE {cls.TABLE} SET {assignments} WHERE id = ?"
+        cls.SELECT_UPDATE_COLUMNS_SQL = (f"SELECT id, {', '.join(cls.UPDATE_COLUMNS)} "
+                                         f"FROM {cls.TABLE} WHERE id IN")
+        cls.DELETE_SQL = f"DELETE FROM {cls.TABLE} WHERE id = ? RETURNING {cls.OWNER_COLUMN}"
+        cls._encode_insert = staticmethod(compile_row_encoder(insert_columns, cls.ENCODERS))
+        cls._encode_update = staticmethod(
+            compile_row_encoder((*cls.UPDATE_COLUMNS, "id"), cls.ENCODERS)
+        )
+
+    def create(self, item: T) -> Optional[T]:
+        try:
+            with self.db.transaction() as cursor:
+                cursor.execute(self.INSERT_SQL, self._encode_insert(item))
+                item.id = cursor.lastrowid
+            self._changed((getattr(item, self.OWNER_COLUMN),), ())
+            self._publish_items(ChangeKind.CREATED, (item,))
+            return item
         except Exception as e:
-            print(f"Ошибка при создании задачи: {e}")
+            print(f"Ошибка при создании записи в {self.TABLE}: {e}")
             return None
-        finally:
-            self.db.close()
 
-    def get_by_id(self, id: int) -> Optional[Task]:
+    def create_many(self, items: List[T]) -> List[T]:
+        """
+        Пакетное создание записей одним executemany в одной транзакции
+
+        Returns:
+            List[T]: Созданные записи с назначенными ID (пустой список при ошибке)
+        """
         try:
-            if not self.db.connect():
-                return None
-
-            cursor = self.db.cursor
-            cursor.execute('SELECT * FROM tasks WHERE id = ?', (id,))
-            task_data = cursor.fetchone()
-
-            if task_data:
-                return Task(
-                    id=task_data[0],
-                    user_id=task_data[1],
-                    title=task_data[2],
-                    description=task_data[3],
-                    status=task_data[4],
-                    priority=task_data[5],
-                    color=task_data[6],
-                    created_at=datetime.strptime(task_data[7], '%Y-%m-%d %H:%M:%S')
-                )
-            return None
+            ids = self.db.insert_many(self.INSERT_SQL, [self._encode_insert(item) for item in items])
+            for item, item_id in zip(items, ids):
+                item.id = item_id
+            self._changed({getattr(item, self.OWNER_COLUMN) for item in items}, ())
+            self._publish_items(ChangeKind.CREATED, items)
+            return items
+        except Exception as e:
+            print(f"Ошибка при пакетном создании записей в {self.TABLE}: {e}")
+            return []
+
+    def get_by_id(self, id: int) -> Optional[T]:
+        try:
+            with self.db.session() as cursor:
+                cursor.row_factory = self.decoder
+                cursor.execute(f"{self.SELECT_SQL} WHERE id = ?", (id,))
+                return cursor.fetchone()
         except Exception as e:
-            print(f"Ошибка при получении задачи: {e}")
+            print(f"Ошибка при получении записи из {self.TABLE}: {e}")
             return None
-        finally:
-            self.db.close()
 
-    def get_all(self, user_id: int) -> List[Task]:
+    def get_all(self, owner_id: int, after: Optional[Tuple] = None,
+                limit: Optional[int] = None) -> List[T]:
+        """
+        Записи владельца в порядке ORDER_COLUMNS (постранично, если задан limit)
+
+        Args:
+            owner_id: Значение OWNER_COLUMN
+            after: Ключ последней записи предыдущей страницы, см. page_key() (опционально)
+            limit: Размер страницы (опционально)
+        """
+        sql, params = self._build_list_query(owner_id, after, limit)
+        return self._fetch_all(sql, params)
+
+    def iter_all(self, owner_id: int, after: Optional[Tuple] = None) -> Iterator[T]:
+        """
+        Ленивый перебор записей владельца: строки читаются из курсора порциями
+        """
+        sql, params = self._build_list_query(owner_id, after, None)
+        return self.db.stream(sql, params, row_factory=self.decoder)
+
+    def page_key(self, item: T) -> Tuple:
+        """Ключ записи для параметра after следующей страницы"""
+        return tuple(getattr(item, column) for column in self.ORDER_COLUMNS)
+
+    def update(self, item: T) -> bool:
+        try:
+            values = self._encode_update(item)
+            with self.db.transaction() as cursor:
+                previous = self._previous_values(cursor, [item.id])
+                cursor.execute(self.UPDATE_SQL, values)
+                owners = [row[0] for row in cursor.fetchall()]
+            self._changed(owners, (item.id,))
+            if owners:
+                self._publish_updated([(item, values, previous.get(item.id))])
+            return True
+        except Exception as e:
+            print(f"Ошибка при обновлении записи в {self.TABLE}: {e}")
+            return False
+
+    def update_many(self, items: List[T]) -> int:
+        """
+        Пакетное обновление записей одним executemany в одной транзакции
+
+        Returns:
+            int: Количество измененных строк
+        """
+        if not items:
+            return 0
+        try:
+            encoded = [self._encode_update(item) for item in items]
+            with self.db.transaction() as cursor:
+                previous = self._previous_values(cursor, [item.id for item in items])
+                cursor.executemany(self.UPDATE_MANY_SQL, encoded)
+                updated = cursor.rowcount
+            self._changed({getattr(item, self.OWNER_COLUMN) for item in items},
+                          [item.id for item in items])
+            self._publish_updated([(item, values, previous[item.id])
+                                   for item, values in zip(items, encoded) if item.id in previous])
+            return updated
+        except Exception as e:
+            print(f"Ошибка при пакетном обновлении записей в {self.TABLE}: {e}")
+            return 0
+
+    def delete(self, id: int) -> bool:
+        try:
+            with self.db.transaction() as cursor:
+                cursor.execute(self.DELETE_SQL, (id,))
+                owners = [row[0] for row in cursor.fetchall()]
+            self._changed(owners, (id,))
+            self.events.publish(ChangeEvent(self.ENTITY, ChangeKind.DELETED, id, owner)
+                                for owner in owners)
+            return True
+        except Exception as e:
+            print(f"Ошибка при удалении записи из {self.TABLE}: {e}")
+            return False
+
+    def _changed(self, owners: Iterable[int], ids: Iterable[int]):
+        """
+        Вызывается после фиксации изменений: владельцы затронутых записей
+        и ID измененных или удаленных записей. Подклассы с кэшем сбрасывают его здесь
+        """
+
+    def _publish_items(self, kind: ChangeKind, items: Iterable[T]):
+        """Публикация событий создания записей (после фиксации)"""
+        self.events.publish(
+            ChangeEvent(self.ENTITY, kind, item.id, getattr(item, self.OWNER_COLUMN), {}, item)
+            for item in items
+        )
+
+    def _publish_updated(self, updates: Iterable[Tuple[T, tuple, Optional[tuple]]]):
+        """
+        Публикация событий обновления записей (после фиксации)
+
+        Args:
+            updates: Запись, записанные значения UPDATE_COLUMNS и прежние значения
+                (None, если неизвестны). В changes попадают только поля, значения
+                которых изменились, а при неизвестных прежних значениях - все поля
+        """
+        events = []
+        for item, values, old in updates:
+            if old is None:
+                columns = self.UPDATE_COLUMNS
+            else:
+                columns = [column for column, new, was in zip(self.UPDATE_COLUMNS, values, old)
+                           if new != was]
+            events.append(ChangeEvent(self.ENTITY, ChangeKind.UPDATED, item.id,
+                                      getattr(item, self.OWNER_COLUMN),
+                                      {column: getattr(item, column) for column in columns}, item))
+        self.events.publish(events)
+
+    def _previous_values(self, cursor: sqlite3.Cursor, ids: List[int]) -> Dict[int, tuple]:
+        """Значения UPDATE_COLUMNS записей до изменения (читаются в транзакции изменения)"""
+        previous = {}
+        for start in range(0, len(ids), self.ID_BATCH_SIZE):
+            chunk = ids[start:start + self.ID_BATCH_SIZE]
+            placeholders = ", ".join("?" for _ in chunk)
+            cursor.execute(f"{self.SELECT_UPDATE_COLUMNS_SQL} ({placeholders})", chunk)
+            previous.update((row[0], tuple(row[1:])) for row in cursor.fetchall())
+        return previous
+
+    def _fetch_all(self, sql: str, params: list) -> List[T]:
+        """Выполнение SELECT с декодированием строк в модели"""
         try:
-            if not self.db.connect():
-                return []
-
-            cursor = self.db.cursor
-            cursor.execute('SELECT * FROM tasks WHERE user_id = ?', (user_id,))
-
-            tasks = []
-            for row in cursor.fetchall():
-                tasks.append(Task(
-                    id=row[0],
-                    user_id=row[1],
-                    title=row[2],
-                    description=row[3],
-                    status=row[4],
-                    priority=row[5],
-                    color=row[6],
-                    created_at=datetime.strptime(row[7], '%Y-%m-%d %H:%M:%S')
-                ))
+            return self._select(sql, params)
+        except Exception as e:
+            print(f"Ошибка при чтении записей из {self.TABLE}: {e}")
+            return []
+
+    def _select(self, sql: str, params: list) -> List[T]:
+        """Выполнение SELECT без перехвата ошибок"""
+        with self.db.session() as cursor:
+            cursor.row_factory = self.decoder
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def _build_list_query(self, owner_id: int, after: Optional[Tuple],
+                          limit: Optional[int]) -> Tuple[str, list]:
+        """Построение запроса списка записей владельца с keyset-пагинацией"""
+        sql = f"{self.SELECT_SQL} WHERE {self.OWNER_COLUMN} = ?"
+        params: list = [owner_id]
+
+        keyset, keyset_params = keyset_condition(self.ORDER_COLUMNS, after)
+        if keyset:
+            sql += f" AND {keyset}"
+            params.extend(keyset_params)
+
+        sql += f" ORDER BY {', '.join(self.ORDER_COLUMNS)}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params
+
+class TaskRepository(TableRepository[Task]):
+    """
+    Репозиторий для работы с задачами
+    """
+    TABLE = "tasks"
+    ENTITY = "task"
+    COLUMNS = TASK_COLUMNS
+    UPDATE_COLUMNS = ("title", "description", "status", "priority", "color")
+    ENCODERS = {**TableRepository.ENCODERS, "status": TaskStatus.parse}
+    decoder = staticmethod(decode_task)
+
+    # Допустимые поля сортировки (подставляются в SQL только из этого словаря)
+    SORT_COLUMNS = {
+        "priority": "priority",
+        "created_at": "created_at"
+    }
+
+    # Поля, которые можно изменять частичным обновлением
+    PATCHABLE_COLUMNS = ("title", "description", "status", "priority", "color")
+
+    # Максимум ID в одном условии IN (...)
+    PATCH_BATCH_SIZE = 500
+
+    # Общие для всех экземпляров кэши по файлу базы данных: вкладки создают
+    # свои сервисы, но должны видеть одни и те же данные, а после смены
+    # Config.DB_PATH данные прежнего файла не должны выдаваться
+    caches: Dict[str, RepositoryCache[Task]] = {}
+    _caches_lock = threading.Lock()
+
+    def __init__(self):
+        super().__init__()
+        with self._caches_lock:
+            cache = self.caches.get(self.db.db_path)
+            if cache is None:
+                cache = RepositoryCache(Config.REPOSITORY_CACHE_SIZE,
+                                        Config.REPOSITORY_QUERY_CACHE_SIZE)
+                self.caches[self.db.db_path] = cache
+        self.cache = cache
+
+    def get_by_id(self, id: int) -> Optional[Task]:
+        task = self.cache.get(id)
+        if task is not None:
+            return task
+        version = self.cache.version
+        task = super().get_by_id(id)
+        if task is not None:
+            self.cache.put(task.id, task, version)
+        return task
+
+    def patch(self, task_id: int, **fields) -> int:
+        """
+        Частичное обновление задачи одним UPDATE только по переданным полям
+
+        Args:
+            task_id: ID задачи
+            **fields: Новые значения полей из PATCHABLE_COLUMNS
+
+        Returns:
+            int: Количество измененных строк (0, если задача не найдена)
+
+        Raises:
+            ValueError: Если передано поле, которое нельзя изменять
+        """
+        return self.patch_many((task_id,), **fields)
+
+    def patch_many(self, task_ids: Iterable[int], **fields) -> int:
+        """
+        Частичное обновление нескольких задач в одной транзакции
+
+        Args:
+            task_ids: ID задач
+            **fields: Новые значения полей из PATCHABLE_COLUMNS
+
+        Returns:
+            int: Количество измененных строк
+
+        Raises:
+            ValueError: Если передано поле, которое нельзя изменять
+        """
+        assignments, changes = self._build_assignments(fields)
+        ids = list(task_ids)
+        if not ids:
+            return 0
+
+        try:
+            tasks: List[Task] = []
+            with self.db.transaction() as cursor:
+                # Измененные задачи возвращаются целиком для событий изменений
+                cursor.row_factory = self.decoder
+                for start in range(0, len(ids), self.PATCH_BATCH_SIZE):
+                    chunk = ids[start:start + self.PATCH_BATCH_SIZE]
+                    placeholders = ", ".join("?" for _ in chunk)
+                    cursor.execute(
+                        f'UPDATE tasks SET {assignments} WHERE id IN ({placeholders}) '
+                        f'RETURNING {select_columns(self.COLUMNS)}',
+                        (*changes.values(), *chunk)
+                    )
+                    tasks.extend(cursor.fetchall())
+            self._changed((task.user_id for task in tasks), ids)
+            self.events.publish(ChangeEvent(self.ENTITY, ChangeKind.UPDATED, task.id, task.user_id,
+                                            changes, task)
+                                for task in tasks)
+            return len(tasks)
+        except Exception as e:
+            print(f"Ошибка при обновлении задач: {e}")
+            return 0
+
+    def get_all(self, user_id: int, after: Optional[Tuple] = None,
+                limit: Optional[int] = None) -> List[Task]:
+        sql, params = self._build_list_query(user_id, after, limit)
+        return self._fetch_cached(user_id, sql, params)
+
+    def _fetch_cached(self, user_id: int, sql: str, params: list) -> List[Task]:
+        """Выборка задач пользователя через кэш выборок (ключ - текст запроса и параметры)"""
+        key = (sql, tuple(params))
+        tasks = self.cache.get_list(user_id, key)
+        if tasks is not None:
             return tasks
+        version = self.cache.version
+        try:
+            tasks = self._select(sql, params)
         except Exception as e:
             print(f"Ошибка при получении задач: {e}")
             return []
-        finally:
-            self.db.close()
+        self.cache.put_list(user_id, key, tasks, version)
+        return tasks
+
+    def _changed(self, owners: Iterable[int], ids: Iterable[int]):
+        """
+        Сброс кэша после фиксации изменений: задач с указанными ID
+        и выборок их владельцев. Сброс выполняется после транзакции, чтобы
+        параллельное чтение не успело закэшировать незафиксированное состояние
+        """
+        ids = tuple(ids)
+        users = set(owners)
+        if not users:
+            self.cache.invalidate(None, ids)
+        for user_id in users:
+            self.cache.invalidate(user_id, ids)
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Счетчики попаданий и промахов кэша задач"""
+        return self.cache.stats()
+
+    def _build_assignments(self, fields: dict) -> Tuple[str, Dict[str, Any]]:
+        """Построение SET-части UPDATE и новых значений полей в ее порядке"""
+        if not fields:
+            raise ValueError("Не указаны поля для обновления")
+
+        unknown = set(fields) - set(self.PATCHABLE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Недопустимые поля для обновления: {', '.join(sorted(unknown))}")
+
+        if "status" in fields:
+            fields = {**fields, "status": TaskStatus.parse(fields["status"])}
+
+        columns = [column for column in self.PATCHABLE_COLUMNS if column in fields]
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        return assignments, {column: fields[column] for column in columns}
+
+    def query(self, user_id: int, status: Optional[str] = None,
+              search_query: Optional[str] = None,
+              sort_by: str = "priority",
+              sort_order: str = "desc",
+              limit: Optional[int] = None,
+              after: Optional[Tuple[Any, int]] = None) -> List[Task]:
+        """
+        Выборка задач пользователя с фильтрацией, поиском и сортировкой на стороне SQLite
+
+        Args:
+            user_id: ID пользователя
+            status: Статус для фильтрации (опционально)
+            search_query: Подстрока названия без учета регистра (опционально)
+            sort_by: Поле для сортировки ('priority', 'created_at')
+            sort_order: Порядок сортировки ('asc', 'desc')
+            limit: Максимальное количество задач (опционально)
+            after: Ключ последней задачи предыдущей страницы, см. page_key() (опционально)
+        """
+        sql, params = self._build_query(user_id, status, search_query,
+                                        sort_by, sort_order, limit, after)
+        return self._fetch_cached(user_id, sql, params)
+
+    def iter_query(self, user_id: int, status: Optional[str] = None,
+                   search_query: Optional[str] = None,
+                   sort_by: str = "priority",
+                   sort_order: str = "desc",
+                   after: Optional[Tuple[Any, int]] = None) -> Iterator[Task]:
+        """
+        Потоковый вариант query(): задачи читаются из курсора порциями
+        и создаются по мере перебора
+        """
+        sql, params = self._build_query(user_id, status, search_query,
+                                        sort_by, sort_order, None, after)
+        return self.db.stream(sql, params, row_factory=self.decoder)
+
+    def find_created_between(self, user_id: int, start: datetime, end: datetime) -> List[Task]:
+        """
+        Задачи пользователя, созданные в промежутке [start, end)
+        (диапазон по индексу idx_tasks_user_created_at)
+        """
+        return self._fetch_all(
+            f"{self.SELECT_SQL} WHERE user_id = ? AND created_at BETWEEN ? AND ? "
+            f"ORDER BY priority DESC, id DESC",
+            [user_id, to_timestamp(start), to_timestamp(end) - 1]
+        )
+
+    def get_counts(self, user_id: int) -> List[Tuple[TaskStatus, int, int]]:
+        """
+        Количество задач пользователя по парам (статус, приоритет).
+        Читается из таблицы task_counters, которую поддерживают триггеры,
+        поэтому стоимость не зависит от числа задач
+        """
+        try:
+            with self.db.session() as cursor:
+                cursor.execute('''
+                    SELECT status, priority, count FROM task_counters
+                    WHERE user_id = ? AND count > 0
+                ''', (user_id,))
+                return [(TaskStatus(status), priority, count)
+                        for status, priority, count in cursor.fetchall()]
+        except Exception as e:
+            print(f"Ошибка при подсчете задач: {e}")
+            return []
+
+    def page_key(self, task: Task, sort_by: str = "priority") -> Tuple[Any, int]:
+        """Ключ задачи для параметра after следующей страницы"""
+        column = self.SORT_COLUMNS.get(sort_by)
+        if column is None:
+            return (task.id,)
+        return (getattr(task, column), task.id)
+
+    def _build_query(self, user_id: int, status: Optional[str],
+                     search_query: Optional[str], sort_by: str,
+                     sort_order: str, limit: Optional[int],
+                     after: Optional[Tuple[Any, int]] = None) -> Tuple[str, list]:
+        """Построение параметризованного SELECT для query()"""
+        conditions = ["user_id = ?"]
+        params: list = [user_id]
+
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(TaskStatus.parse(status))
+
+        if search_query:
+            conditions.append("instr(py_lower(title), ?) > 0")
+            params.append(search_query.lower())
+
+        descending = sort_order == "desc"
+        direction = "DESC" if descending else "ASC"
+        column = self.SORT_COLUMNS.get(sort_by)
+        # id в том же направлении делает порядок однозначным
+        # и позволяет SQLite обойти составной индекс без сортировки
+        if column:
+            key_columns = (column, "id")
+            order_by = f"{column} {direction}, id {direction}"
+        else:
+            key_columns = ("id",)
+            descending = False
+            order_by = "id ASC"
+
+        keyset, keyset_params = keyset_condition(key_columns, after, descending)
+        if keyset:
+            conditions.append(keyset)
+            params.extend(keyset_params)
+
+        sql = f"{self.SELECT_SQL} WHERE {' AND '.join(conditions)} ORDER BY {order_by}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params
+
+class HabitRepository(TableRepository[Habit]):
+    """
+    Репозиторий для работы с привычками
+    """
+    TABLE = "habits"
+    ENTITY = "habit"
+    COLUMNS = HABIT_COLUMNS
+    UPDATE_COLUMNS = ("name", "frequency", "reminder_time")
+    ENCODERS = {**TableRepository.ENCODERS, "frequency": HabitFrequency.parse}
+    decoder = staticmethod(decode_habit)
+
+    def find_by_reminder_time(self, reminder_time: str) -> List[Habit]:
+        """Привычки всех пользователей с напоминанием на указанное время ('ЧЧ:ММ')"""
+        return self._fetch_all(f"{self.SELECT_SQL} WHERE reminder_time = ?", [reminder_time])
+
+    def find_with_reminders(self) -> List[Habit]:
+        """Привычки всех пользователей, для которых задано время напоминания"""
+        return self._fetch_all(f"{self.SELECT_SQL} WHERE reminder_time IS NOT NULL "
+                               f"AND reminder_time != ''", [])
+
+class BookRepository(TableRepository[Book]):
+    """
+    Репозиторий для работы с книгами
+    """
+    TABLE = "books"
+    ENTITY = "book"
+    COLUMNS = BOOK_COLUMNS
+    UPDATE_COLUMNS = ("title", "author", "file_path", "current_page", "page_count",
+                      "file_size", "file_mtime", "content_hash", "pdf_metadata")
+    ENCODERS = {**TableRepository.ENCODERS, "pdf_metadata": to_json}
+    decoder = staticmethod(decode_book)
+
+    # Поля, которые сохраняет update_file_info()
+    FILE_INFO_COLUMNS = ("page_count", "file_size", "file_mtime", "content_hash", "pdf_metadata")
 
-    def update(self, task: Task) -> bool:
+    def update_current_page(self, book_id: int, page: int) -> bool:
+        """Сохранение текущей страницы книги"""
+        return self.update_current_pages({book_id: page})
+
+    def update_current_pages(self, positions: Dict[int, int]) -> bool:
+        """
+        Сохранение текущих страниц нескольких книг в одной транзакции
+
+        Args:
+            positions: Номер страницы по ID книги
+        """
         try:
-            if not self.db.connect():
-                return False
-
-            cursor = self.db.cursor
-            cursor.execute('''
-                UPDATE tasks 
-                SET title = ?, description = ?, status = ?, priority = ?, color = ?
-                WHERE id = ?
-            ''', (task.title, task.description, task.status, 
-                  task.priority, task.color, task.id))
-
-            self.db.conn.commit()
+            owners = {}
+            with self.db.transaction() as cursor:
+                # Владелец нужен событиям изменений, поэтому UPDATE с RETURNING
+                # выполняется по книге (книг в отложенной записи единицы)
+                for book_id, page in positions.items():
+                    cursor.execute('UPDATE books SET current_page = ? WHERE id = ? RETURNING user_id',
+                                   (page, book_id))
+                    row = cursor.fetchone()
+                    if row is not None:
+                        owners[book_id] = row[0]
+            self.events.publish(ChangeEvent(self.ENTITY, ChangeKind.UPDATED, book_id, user_id,
+                                            {"current_page": positions[book_id]})
+                                for book_id, user_id in owners.items())
             return True
         except Exception as e:
-            print(f"Ошибка при обновлении задачи: {e}")
+            print(f"Ошибка при обновлении страницы: {e}")
             return False
-        finally:
-            self.db.close()
 
-    def delete(self, id: int) -> bool:
-        try:
-            if not self.db.connect():
-                return False
+    def find_hashes(self, user_id: int, hashes: Iterable[str]) -> Set[str]:
+        """
+        Хеши содержимого из переданных, которые уже есть у книг пользователя
+        (поиск по индексу idx_books_user_hash, пачками по HASH_LOOKUP_BATCH)
+        """
+        hashes = list(hashes)
+        found: Set[str] = set()
+        with self.db.session() as cursor:
+            for start in range(0, len(hashes), HASH_LOOKUP_BATCH):
+                batch = hashes[start:start + HASH_LOOKUP_BATCH]
+                cursor.execute(f'''
+                    SELECT content_hash FROM books
+                    WHERE user_id = ? AND content_hash IN ({", ".join("?" * len(batch))})
+                ''', (user_id, *batch))
+                found.update(row[0] for row in cursor.fetchall())
+        return found
 
-            cursor = self.db.cursor
-            cursor.execute('DELETE FROM tasks WHERE id = ?', (id,))
-            self.db.conn.commit()
+    def update_file_info(self, book: Book) -> bool:
+        """
+        Сохранение сведений о файле книги (число страниц, отпечаток, хеш, метаданные)
+        без перезаписи остальных полей, в том числе текущей страницы
+        """
+        try:
+            with self.db.transaction() as cursor:
+                cursor.execute('''
+                    UPDATE books
+                    SET page_count = ?, file_size = ?, file_mtime = ?,
+                        content_hash = ?, pdf_metadata = ?
+                    WHERE id = ?
+                ''', (book.page_count, book.file_size, book.file_mtime,
+                      book.content_hash, to_json(book.pdf_metadata), book.id))
+            self.events.publish((ChangeEvent(
+                self.ENTITY, ChangeKind.UPDATED, book.id, book.user_id,
+                {column: getattr(book, column) for column in self.FILE_INFO_COLUMNS}, book
+            ),))
             return True
         except Exception as e:
-            print(f"Ошибка при удалении задачи: {e}")
+            print(f"Ошибка при обновлении сведений о файле книги: {e}")
             return False
-        finally:
-            self.db.close()
\ No newline at end of file
+
+class NoteRepository(TableRepository[Note]):
+    """
+    Репозиторий для работы с заметками к книгам
+    """
+    TABLE = "notes"
+    ENTITY = "note"
+    COLUMNS = NOTE_COLUMNS
+    OWNER_COLUMN = "book_id"
+    ORDER_COLUMNS = ("page_number", "id")
+    UPDATE_COLUMNS = ("page_number", "content")
+    decoder = staticmethod(decode_note)
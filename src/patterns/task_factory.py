@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from src.db.models import Task
+from src.db.models import Task, TaskStatus
 from datetime import datetime
 from typing import Optional
 
@@ -32,7 +32,7 @@ class SimpleTaskCreator(TaskCreator):
             user_id=user_id,
             title=title,
             description=description or "",
-            status="new",
+            status=TaskStatus.NEW,
             priority=1,
             color=None,
             created_at=datetime.now()
@@ -48,7 +48,7 @@ class UrgentTaskCreator(TaskCreator):
             user_id=user_id,
             title=title,
             description=description or "",
-            status="new",
+            status=TaskStatus.NEW,
             priority=3,
             color="#ff0000",
             created_at=datetime.now()
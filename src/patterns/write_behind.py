@@ -0,0 +1,94 @@
+import atexit
+import threading
+from typing import Callable, Dict, Generic, Hashable, Iterable, Optional, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+class WriteBehindBuffer(Generic[K, V]):
+    """
+    Буфер отложенной записи: значения копятся по ключу (новое значение
+    заменяет старое) и записываются одной пачкой через delay секунд
+    после первого изменения, по запросу flush() и при завершении процесса.
+
+    Запись выполняет один фоновый поток, поэтому у буфера одно соединение с БД.
+    Если запись не удалась, значения остаются в буфере до следующей попытки.
+    """
+    def __init__(self, writer: Callable[[Dict[K, V]], bool], delay: float):
+        """
+        Args:
+            writer: Функция записи пачки значений {ключ: значение}, возвращает True при успехе
+            delay: Задержка записи после первого изменения, в секундах
+        """
+        self.writer = writer
+        self.delay = delay
+        self._pending: Dict[K, V] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        atexit.register(self.close)
+
+    def put(self, key: K, value: V):
+        """Запоминание значения для отложенной записи"""
+        with self._lock:
+            self._pending[key] = value
+            if self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """Еще не записанное значение (или default)"""
+        with self._lock:
+            return self._pending.get(key, default)
+
+    def flush(self, keys: Optional[Iterable[K]] = None) -> int:
+        """
+        Немедленная запись накопленных значений
+
+        Args:
+            keys: Записать только эти ключи (по умолчанию - все)
+
+        Returns:
+            int: Количество записанных значений
+        """
+        with self._flush_lock:
+            with self._lock:
+                if keys is None:
+                    batch, self._pending = self._pending, {}
+                else:
+                    batch = {key: self._pending.pop(key) for key in keys if key in self._pending}
+            if not batch:
+                return 0
+
+            try:
+                written = self.writer(batch)
+            except Exception as e:
+                print(f"Ошибка при отложенной записи: {e}")
+                written = False
+
+            if not written:
+                with self._lock:
+                    # Более новые значения, пришедшие во время записи, не затираем
+                    for key, value in batch.items():
+                        self._pending.setdefault(key, value)
+                return 0
+            return len(batch)
+
+    def close(self):
+        """Остановка фонового потока и запись оставшихся значений"""
+        atexit.unregister(self.close)
+        self._stop.set()
+        self._wakeup.set()
+        self.flush()
+
+    def _run(self):
+        """Фоновый поток: запись через delay секунд после первого изменения"""
+        while not self._stop.is_set():
+            self._wakeup.wait()
+            self._wakeup.clear()
+            # Изменения, пришедшие за время ожидания, попадут в ту же пачку
+            self._stop.wait(self.delay)
+            self.flush()
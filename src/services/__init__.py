@@ -3,4 +3,6 @@ from .auth_service import AuthService
 from .task_service import TaskService
 from .habit_service import HabitService
 from .library_service import LibraryService
-from .ai_service import AIService
\ No newline at end of file
+from .ai_service import AIService
+from .executor import BackgroundExecutor
+from .reminder_scheduler import ReminderScheduler
\ No newline at end of file
@@ -4,6 +4,9 @@ from datetime import datetime
 from typing import Optional
 from src.db.database import Database
 from src.db.models import User
+from src.db.mappers import USER_COLUMNS, decode_user, select_columns, to_timestamp
+
+USER_SELECT = select_columns(USER_COLUMNS)
 
 class AuthService:
     """
@@ -43,8 +46,8 @@ class AuthService:
             password_hash = self._hash_password(password)
 
             result = self.db.execute(
-                'INSERT INTO users (username, password_hash) VALUES (?, ?)',
-                (username, password_hash)
+                'INSERT INTO users (username, password_hash, created_at) VALUES (?, ?, ?)',
+                (username, password_hash, to_timestamp(datetime.now()))
             )
 
             if result:
@@ -73,7 +76,7 @@ class AuthService:
 
             password_hash = self._hash_password(password)
             result = self.db.execute(
-                'SELECT * FROM users WHERE username = ? AND password_hash = ?',
+                f'SELECT {USER_SELECT} FROM users WHERE username = ? AND password_hash = ?',
                 (username, password_hash)
             )
 
@@ -82,12 +85,7 @@ class AuthService:
 
             user_data = result.fetchone()
             if user_data:
-                self.current_user = User(
-                    id=user_data[0],
-                    username=user_data[1],
-                    password_hash=user_data[2],
-                    created_at=datetime.strptime(user_data[3], '%Y-%m-%d %H:%M:%S')
-                )
+                self.current_user = decode_user(result, user_data)
                 print(f"Пользователь {username} успешно вошел в систему")
                 return True
             return False
@@ -0,0 +1,159 @@
+import os
+import re
+import threading
+from typing import Iterable, List, Optional
+from src.db.database import Database
+from src.db.mappers import BOOK_COLUMNS, decode_book
+from src.db.models import Book, SearchHit
+from src.patterns.repository import BookRepository
+from src.services.book_ingestion import BookIngestion, ProgressCallback
+from src.services.page_cache import FileStamp, PageCache, file_stamp
+
+# Колонки книги с префиксом таблицы для запроса поиска
+_BOOK_SELECT = ", ".join(f"b.{column}" for column in BOOK_COLUMNS)
+
+# rowid страницы в book_pages_fts: (book_id << FTS_PAGE_BITS) + номер страницы
+# (см. миграцию 11), поэтому страницы книги - непрерывный диапазон rowid
+FTS_PAGE_BITS = 20
+FTS_MAX_PAGE = (1 << FTS_PAGE_BITS) - 1
+
+
+def fts_rowid_range(book_id: int) -> tuple:
+    """Диапазон rowid страниц книги в book_pages_fts (включительно)"""
+    first = book_id << FTS_PAGE_BITS
+    return first, first + FTS_MAX_PAGE
+
+
+def build_match_query(text: str) -> str:
+    """
+    Преобразование введенного текста в запрос FTS5: каждое слово берется
+    в кавычки (спецсимволы синтаксиса FTS5 не интерпретируются),
+    последнее слово ищется как префикс, чтобы поиск работал во время набора
+    """
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+class BookIndexer:
+    """
+    Полнотекстовый индекс текста страниц книг (таблица FTS5 book_pages_fts)
+
+    Текст страниц берется из кэша book_pages, недостающие страницы
+    извлекаются в пуле процессов. Для каждой книги запоминается отпечаток
+    файла, по которому построен индекс, поэтому повторная индексация
+    выполняется только после изменения файла.
+    """
+    def __init__(self, books: BookRepository, page_cache: PageCache, ingestion: BookIngestion):
+        self.db = Database()
+        self.books = books
+        self.page_cache = page_cache
+        self.ingestion = ingestion
+        self._lock = threading.Lock()
+
+    def index_book(self, book: Book, progress: Optional[ProgressCallback] = None) -> bool:
+        """
+        Индексация книги (если индекс отсутствует или устарел)
+
+        Args:
+            book: Книга
+            progress: Вызывается с (извлечено страниц, всего страниц), если текст извлекается
+
+        Returns:
+            bool: True, если индекс книги актуален
+        """
+        with self._lock:
+            try:
+                if not os.path.exists(book.file_path):
+                    return False
+
+                stamp = file_stamp(book.file_path)
+                if book.page_count is None or (book.file_size, book.file_mtime) != stamp:
+                    # Книга добавлена до появления сведений о файле или файл изменился
+                    info = self.ingestion.inspect(book.file_path)
+                    book.page_count = info.page_count
+                    book.file_size = info.file_size
+                    book.file_mtime = info.file_mtime
+                    book.content_hash = info.content_hash
+                    book.pdf_metadata = info.metadata
+                    self.books.update_file_info(book)
+                    stamp = (info.file_size, info.file_mtime)
+
+                if self._indexed_stamp(book.id) == stamp:
+                    return True
+
+                pages = self.page_cache.load_pages(book.id, stamp)
+                if len(pages) < book.page_count:
+                    self.ingestion.extract_all(book, progress)
+                    pages = self.page_cache.load_pages(book.id, stamp)
+
+                first, last = fts_rowid_range(book.id)
+                with self.db.transaction() as cursor:
+                    cursor.execute('DELETE FROM book_pages_fts WHERE rowid BETWEEN ? AND ?',
+                                   (first, last))
+                    cursor.executemany('''
+                        INSERT INTO book_pages_fts (rowid, book_id, page_number, content)
+                        VALUES (?, ?, ?, ?)
+                    ''', [(first + page_number, book.id, page_number, content)
+                          for page_number, content in sorted(pages.items())
+                          if 0 <= page_number <= FTS_MAX_PAGE])
+                    cursor.execute('''
+                        INSERT OR REPLACE INTO book_fts_state (book_id, file_size, file_mtime)
+                        VALUES (?, ?, ?)
+                    ''', (book.id, stamp[0], stamp[1]))
+                return True
+            except Exception as e:
+                print(f"Ошибка при индексации книги: {e}")
+                return False
+
+    def index_books(self, books: Iterable[Book]) -> int:
+        """
+        Индексация нескольких книг
+
+        Returns:
+            int: Количество книг с актуальным индексом
+        """
+        return sum(1 for book in books if self.index_book(book))
+
+    def search(self, user_id: int, query: str, limit: int) -> List[SearchHit]:
+        """
+        Поиск страниц книг пользователя по тексту, лучшие совпадения первыми
+
+        Args:
+            user_id: ID пользователя
+            query: Текст запроса
+            limit: Максимальное количество результатов
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+
+        try:
+            with self.db.session() as cursor:
+                cursor.execute(f'''
+                    SELECT {_BOOK_SELECT}, f.page_number,
+                           snippet(book_pages_fts, 2, '[', ']', '…', 12)
+                    FROM book_pages_fts f
+                    JOIN books b ON b.id = f.book_id
+                    WHERE book_pages_fts MATCH ? AND b.user_id = ?
+                    ORDER BY f.rank
+                    LIMIT ?
+                ''', (match, user_id, limit))
+                width = len(BOOK_COLUMNS)
+                return [SearchHit(book=decode_book(cursor, row[:width]),
+                                  page_number=row[width], snippet=row[width + 1])
+                        for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Ошибка при поиске по книгам: {e}")
+            return []
+
+    def _indexed_stamp(self, book_id: int) -> Optional[FileStamp]:
+        """Отпечаток файла, по которому построен индекс книги (None, если индекса нет)"""
+        with self.db.session() as cursor:
+            cursor.execute('SELECT file_size, file_mtime FROM book_fts_state WHERE book_id = ?',
+                           (book_id,))
+            row = cursor.fetchone()
+        return None if row is None else (row[0], row[1])
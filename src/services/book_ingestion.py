@@ -0,0 +1,227 @@
+import hashlib
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, as_completed, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import PyPDF2
+from src.config import Config
+from src.db.models import Book
+from src.services.executor import BackgroundExecutor
+from src.services.page_cache import PageCache
+
+# Размер блока при подсчете хеша файла
+HASH_BLOCK_SIZE = 1024 * 1024
+
+ProgressCallback = Callable[[int, int], None]
+
+
+@dataclass(slots=True)
+class PdfInfo:
+    """Сведения о PDF-файле, собранные при добавлении книги"""
+    file_path: str
+    page_count: int
+    file_size: int
+    file_mtime: int
+    content_hash: str
+    metadata: Dict[str, str]
+
+
+@dataclass(slots=True)
+class ImportReport:
+    """Итог импорта папки с книгами"""
+    added: List[Book] = field(default_factory=list)
+    duplicates: int = 0
+    failed: List[str] = field(default_factory=list)
+
+
+def iter_pdf_files(directory: str) -> Iterator[str]:
+    """Ленивый обход папки и вложенных папок: пути PDF-файлов в порядке обхода"""
+    pending = [directory]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file() and entry.name.lower().endswith('.pdf'):
+                        yield entry.path
+        except OSError as e:
+            print(f"Ошибка при чтении папки: {e}")
+
+
+def inspect_pdf(file_path: str) -> PdfInfo:
+    """
+    Проверка PDF и сбор сведений о нем: число страниц, размер,
+    время изменения, SHA-256 содержимого и словарь метаданных.
+    Выполняется в пуле процессов, поэтому объявлена на уровне модуля
+
+    Raises:
+        OSError: Если файл недоступен
+        PyPDF2.errors.PdfReadError: Если файл не является корректным PDF
+    """
+    stat = os.stat(file_path)
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+        file.seek(0)
+        reader = PyPDF2.PdfReader(file)
+        page_count = len(reader.pages)
+        metadata = read_metadata(reader)
+
+    return PdfInfo(
+        file_path=file_path,
+        page_count=page_count,
+        file_size=stat.st_size,
+        file_mtime=stat.st_mtime_ns,
+        content_hash=digest.hexdigest(),
+        metadata=metadata
+    )
+
+
+def read_metadata(reader: PyPDF2.PdfReader) -> Dict[str, str]:
+    """Словарь метаданных PDF (/Title, /Author, ...) с ключами без '/' в нижнем регистре"""
+    try:
+        info = reader.metadata or {}
+        return {key.lstrip('/').lower(): str(value)
+                for key, value in info.items() if value is not None}
+    except Exception:
+        # Поврежденный словарь метаданных не мешает чтению книги
+        return {}
+
+
+def extract_pages(file_path: str, start: int, stop: int) -> List[str]:
+    """Извлечение текста страниц [start, stop) (выполняется в пуле процессов)"""
+    with open(file_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        stop = min(stop, len(reader.pages))
+        return [reader.pages[page].extract_text() for page in range(start, stop)]
+
+
+class BookIngestion:
+    """
+    Разбор добавляемых книг в пуле процессов: проверка файла,
+    сбор сведений о нем и предварительное извлечение текста всех страниц
+    """
+    def __init__(self, page_cache: PageCache):
+        self.page_cache = page_cache
+        self.executor = BackgroundExecutor()
+
+    def inspect(self, file_path: str) -> PdfInfo:
+        """Сведения о файле (блокирует вызывающий поток до конца разбора)"""
+        return self.executor.submit_process(inspect_pdf, file_path).result()
+
+    def inspect_many(self, paths: Iterator[str],
+                     progress: Optional[ProgressCallback] = None
+                     ) -> Iterator[Tuple[str, Optional[PdfInfo]]]:
+        """
+        Разбор файлов в пуле процессов. Одновременно в работе не больше
+        Config.PDF_IMPORT_WINDOW файлов, поэтому пути берутся из итератора
+        по мере освобождения пула
+
+        На разбор каждого файла отводится Config.PDF_IMPORT_TIMEOUT секунд
+        с момента его постановки в пул. Процесс с зависшим разбором
+        принудительно не завершается: пул процессов заменяется новым,
+        файлы, разбор которых еще не начался, ставятся в него заново,
+        а зависший процесс завершится сам, когда разбор закончится.
+
+        Args:
+            paths: Пути к файлам
+            progress: Вызывается с (разобрано файлов, найдено файлов)
+
+        Yields:
+            Tuple[str, Optional[PdfInfo]]: Путь и сведения о файле в порядке окончания
+                разбора; None, если файл не удалось разобрать или разбор не уложился
+                в Config.PDF_IMPORT_TIMEOUT секунд
+        """
+        paths = iter(paths)
+        pending: Dict[Future, Tuple[str, float]] = {}
+        found = done = 0
+        exhausted = False
+
+        def finish(path: str, info: Optional[PdfInfo]) -> Tuple[str, Optional[PdfInfo]]:
+            nonlocal done
+            done += 1
+            if progress:
+                progress(done, found)
+            return path, info
+
+        def submit(path: str):
+            future = self.executor.submit_process(inspect_pdf, path)
+            pending[future] = (path, time.monotonic() + Config.PDF_IMPORT_TIMEOUT)
+
+        while True:
+            while not exhausted and len(pending) < Config.PDF_IMPORT_WINDOW:
+                path = next(paths, None)
+                if path is None:
+                    exhausted = True
+                    break
+                found += 1
+                submit(path)
+            if not pending:
+                return
+
+            nearest = min(deadline for _, deadline in pending.values())
+            finished, _ = wait(pending, timeout=max(0.0, nearest - time.monotonic()),
+                               return_when=FIRST_COMPLETED)
+            for future in finished:
+                path, _ = pending.pop(future)
+                info = None
+                try:
+                    info = future.result()
+                except Exception as e:
+                    print(f"Ошибка при разборе файла {path}: {e}")
+                yield finish(path, info)
+
+            now = time.monotonic()
+            expired = [future for future, (_, deadline) in pending.items()
+                       if deadline <= now and not future.done()]
+            if not expired:
+                continue
+            # Файлы, разбор которых еще не начался, ставятся в новый пул заново
+            waiting = [future for future in pending if future.cancel()]
+            self.executor.restart_processes()
+            for future in waiting:
+                submit(pending.pop(future)[0])
+            for future in expired:
+                if future in pending:
+                    path, _ = pending.pop(future)
+                    print(f"Превышено время разбора файла: {path}")
+                    yield finish(path, None)
+
+    def extract_all(self, book: Book, progress: Optional[ProgressCallback] = None) -> int:
+        """
+        Извлечение текста всех страниц книги в кэш страниц.
+        Страницы делятся на блоки по Config.PDF_EXTRACT_CHUNK_SIZE,
+        блоки обрабатываются параллельно в пуле процессов
+
+        Args:
+            book: Добавленная книга (с page_count, file_size и file_mtime)
+            progress: Вызывается с (извлечено страниц, всего страниц) после каждого блока
+
+        Returns:
+            int: Количество извлеченных страниц
+        """
+        total = book.page_count or 0
+        chunk = Config.PDF_EXTRACT_CHUNK_SIZE
+        stamp = (book.file_size, book.file_mtime)
+        futures = {
+            self.executor.submit_process(extract_pages, book.file_path, start, start + chunk): start
+            for start in range(0, total, chunk)
+        }
+
+        done = 0
+        for future in as_completed(futures):
+            start = futures[future]
+            try:
+                pages = future.result()
+            except Exception as e:
+                print(f"Ошибка при извлечении текста страниц {start}-{start + chunk - 1}: {e}")
+                continue
+            self.page_cache.store_pages(book.id, stamp,
+                                        {start + offset: text for offset, text in enumerate(pages)})
+            done += len(pages)
+            if progress:
+                progress(done, total)
+        return done
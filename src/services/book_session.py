@@ -0,0 +1,62 @@
+import mmap
+import threading
+from typing import Optional
+import PyPDF2
+from src.services.page_cache import FileStamp, file_stamp
+
+class BookSession:
+    """
+    Открытая для чтения книга: файл, его отображение в память и PdfReader
+    создаются один раз и живут, пока книга открыта
+
+    PdfReader не потокобезопасен, поэтому извлечение текста
+    (в том числе фоновое) выполняется под блокировкой сессии.
+    """
+    def __init__(self, book_id: int, file_path: str):
+        self.book_id = book_id
+        self.file_path = file_path
+        self.stamp: FileStamp = file_stamp(file_path)
+        self.lock = threading.Lock()
+        self._file = open(file_path, 'rb')
+        self._buffer: Optional[mmap.mmap] = None
+        try:
+            # Страницы читаются из отображения файла без системных вызовов read()
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Пустой файл или ФС без поддержки mmap: читаем через обычный файл
+            self._buffer = None
+        try:
+            self.reader = PyPDF2.PdfReader(self._buffer if self._buffer is not None else self._file)
+            self.page_count = len(self.reader.pages)
+        except Exception:
+            self.close()
+            raise
+
+    def is_current(self) -> bool:
+        """Файл книги не изменился с момента открытия сессии"""
+        try:
+            return file_stamp(self.file_path) == self.stamp
+        except OSError:
+            return False
+
+    def extract_text(self, page_number: int) -> Optional[str]:
+        """
+        Извлечение текста страницы
+
+        Returns:
+            Optional[str]: Текст страницы или None, если номер вне диапазона
+        """
+        if not 0 <= page_number < self.page_count:
+            return None
+        with self.lock:
+            if self._file.closed:
+                return None
+            return self.reader.pages[page_number].extract_text()
+
+    def close(self):
+        """Освобождение файла и отображения"""
+        with self.lock:
+            if self._buffer is not None:
+                self._buffer.close()
+                self._buffer = None
+            self._file.close()
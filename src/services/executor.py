@@ -0,0 +1,238 @@
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Optional
+from src.config import Config
+
+class BackgroundExecutor:
+    """
+    Фоновое выполнение работы вне потока Tk (Singleton)
+
+    Запросы к БД выполняются по очереди в отдельном потоке БД,
+    работа с файлами и разбор PDF - в пуле потоков, тяжелая работа
+    с CPU (извлечение текста всей книги) - в пуле процессов. Результаты
+    возвращаются в главный цикл Tk: очередь результатов опрашивается
+    через after(), и обратные вызовы выполняются в потоке интерфейса.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._db_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db")
+            cls._instance._pool = ThreadPoolExecutor(max_workers=Config.EXECUTOR_WORKERS,
+                                                     thread_name_prefix="worker")
+            cls._instance._processes = None
+            cls._instance._results = queue.SimpleQueue()
+            cls._instance._calls = queue.SimpleQueue()
+            cls._instance._lock = threading.Lock()
+            cls._instance._pending = {}
+            cls._instance._generations = {}
+            cls._instance._streams = {}
+            cls._instance._root = None
+        return cls._instance
+
+    def __init__(self):
+        """
+        __new__ уже инициализировал все необходимые атрибуты
+        """
+        pass
+
+    def attach(self, root):
+        """
+        Подключение к главному окну: запуск опроса очереди результатов
+
+        Args:
+            root: Корневой виджет Tk, через after() которого доставляются результаты
+        """
+        self._root = root
+        root.after(Config.EXECUTOR_POLL_INTERVAL, self._drain)
+
+    def submit_db(self, fn: Callable, *args, **kwargs) -> Future:
+        """Выполнение функции в потоке БД"""
+        return self._db_worker.submit(fn, *args, **kwargs)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Выполнение функции в пуле потоков"""
+        return self._pool.submit(fn, *args, **kwargs)
+
+    def submit_process(self, fn: Callable, *args) -> Future:
+        """
+        Выполнение функции в пуле процессов (создается при первом обращении).
+        Функция и аргументы должны сериализоваться pickle
+        """
+        with self._lock:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=Config.PROCESS_POOL_WORKERS)
+        return self._processes.submit(fn, *args)
+
+    def restart_processes(self):
+        """
+        Замена пула процессов новым (например, после зависшей задачи).
+        Задачи, уже отправленные в прежний пул, выполняются его процессами,
+        новые - свежими процессами. Процессы прежнего пула принудительно
+        не завершаются и закрываются, когда доработают
+        """
+        with self._lock:
+            processes, self._processes = self._processes, None
+        if processes is not None:
+            processes.shutdown(wait=False)
+
+    def post(self, fn: Callable, *args):
+        """Вызов функции в потоке Tk (из любого потока, например для отчета о прогрессе)"""
+        self._calls.put((fn, args))
+
+    def run(self, fn: Callable, *args,
+            callback: Optional[Callable[[Any], None]] = None,
+            error_callback: Optional[Callable[[Exception], None]] = None,
+            key: Optional[str] = None,
+            db: bool = True) -> Future:
+        """
+        Фоновое выполнение с доставкой результата в поток интерфейса
+
+        Args:
+            fn: Функция для выполнения
+            *args: Аргументы функции
+            callback: Вызывается с результатом в потоке Tk
+            error_callback: Вызывается с исключением в потоке Tk
+            key: Ключ запроса: новый запрос с тем же ключом отменяет предыдущий,
+                и результат предыдущего уже не доставляется
+            db: True - поток БД, False - пул потоков
+
+        Returns:
+            Future: Будущий результат
+        """
+        generation = None
+        with self._lock:
+            if key is not None:
+                previous = self._pending.get(key)
+                if previous is not None:
+                    previous.cancel()
+                generation = self._generations.get(key, 0) + 1
+                self._generations[key] = generation
+
+            future = (self.submit_db if db else self.submit)(fn, *args)
+            if key is not None:
+                self._pending[key] = future
+
+        future.add_done_callback(
+            lambda done: self._results.put((done, key, generation, callback, error_callback))
+        )
+        return future
+
+    def stream(self, fn: Callable[..., Iterable], *args,
+               item_callback: Callable[[Any], None],
+               callback: Optional[Callable[[int], None]] = None,
+               error_callback: Optional[Callable[[Exception], None]] = None,
+               key: Optional[str] = None,
+               db: bool = False) -> Future:
+        """
+        Фоновый перебор итератора с доставкой каждого элемента в поток интерфейса
+        по мере получения
+
+        Args:
+            fn: Функция, возвращающая итератор (например, генератор)
+            *args: Аргументы функции
+            item_callback: Вызывается с каждым элементом в потоке Tk
+            callback: Вызывается с количеством элементов после окончания перебора
+            error_callback: Вызывается с исключением в потоке Tk
+            key: Ключ запроса: новый запрос с тем же ключом или cancel(key)
+                останавливают перебор, и еще не показанные элементы не доставляются
+            db: True - поток БД, False - пул потоков
+
+        Returns:
+            Future: Будущее количество полученных элементов
+        """
+        stopped = threading.Event()
+        if key is not None:
+            with self._lock:
+                previous = self._streams.get(key)
+                if previous is not None:
+                    previous.set()
+                self._streams[key] = stopped
+
+        def deliver(item):
+            if not stopped.is_set():
+                item_callback(item)
+
+        def consume() -> int:
+            count = 0
+            iterator = iter(fn(*args))
+            try:
+                for item in iterator:
+                    if stopped.is_set():
+                        break
+                    self.post(deliver, item)
+                    count += 1
+            finally:
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+                if key is not None:
+                    with self._lock:
+                        if self._streams.get(key) is stopped:
+                            del self._streams[key]
+            return count
+
+        return self.run(consume, callback=callback, error_callback=error_callback, key=key, db=db)
+
+    def cancel(self, key: str):
+        """Отмена запроса с указанным ключом (результат не будет доставлен)"""
+        with self._lock:
+            future = self._pending.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+            stopped = self._streams.pop(key, None)
+        if stopped is not None:
+            stopped.set()
+        if future is not None:
+            future.cancel()
+
+    def shutdown(self, wait: bool = True):
+        """Остановка потоков (при завершении приложения)"""
+        self._root = None
+        self._db_worker.shutdown(wait=wait, cancel_futures=True)
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=wait, cancel_futures=True)
+
+    def _drain(self):
+        """Доставка готовых результатов и отложенных вызовов в потоке Tk"""
+        while True:
+            try:
+                fn, args = self._calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Ошибка при вызове из фоновой задачи: {e}")
+
+        while True:
+            try:
+                future, key, generation, callback, error_callback = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            if key is not None:
+                with self._lock:
+                    if self._generations.get(key) != generation:
+                        continue
+                    if self._pending.get(key) is future:
+                        del self._pending[key]
+
+            if future.cancelled():
+                continue
+            error = future.exception()
+            try:
+                if error is not None:
+                    if error_callback:
+                        error_callback(error)
+                    else:
+                        print(f"Ошибка фоновой задачи: {error}")
+                elif callback:
+                    callback(future.result())
+            except Exception as e:
+                print(f"Ошибка при обработке результата фоновой задачи: {e}")
+
+        if self._root is not None:
+            self._root.after(Config.EXECUTOR_POLL_INTERVAL, self._drain)
@@ -0,0 +1,240 @@
+from dataclasses import dataclass
+from datetime import date
+from itertools import accumulate
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from src.db.database import Database
+from src.db.mappers import to_day
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy необязателен: без него используются битовые строки на целых числах Python
+    np = None
+
+
+@dataclass(slots=True)
+class CheckinMatrix:
+    """
+    Отметки привычек за период: строка на привычку, столбец на день
+
+    rows - булев массив NumPy (привычки x дни) или список целых чисел,
+    в которых бит i означает отметку в день start + i
+    """
+    habit_ids: List[int]
+    start: date
+    days: int
+    rows: Any
+
+
+class HabitAnalytics:
+    """
+    Аналитика выполнения привычек за несколько лет: серии, скользящая
+    доля выполнения, профиль по дням недели и календарная тепловая карта
+
+    Отметки загружаются одним запросом в матрицу «привычки x дни», и все
+    показатели считаются операциями над целыми строками матрицы: векторными
+    операциями NumPy или, если NumPy не установлен, побитовыми операциями
+    над целыми числами Python. Серии здесь считаются по дням независимо
+    от частоты привычки.
+    """
+    def __init__(self, use_numpy: Optional[bool] = None):
+        """
+        Args:
+            use_numpy: Использовать NumPy (по умолчанию - если установлен)
+        """
+        self.db = Database()
+        self.use_numpy = np is not None and (use_numpy is None or use_numpy)
+
+    def load(self, user_id: int, start: date, end: date) -> CheckinMatrix:
+        """
+        Загрузка отметок всех привычек пользователя за дни [start, end]
+
+        Отметки группируются в SQLite: на привычку приходит одна строка
+        со смещениями дней через запятую, которая разбирается целиком
+
+        Args:
+            user_id: ID пользователя
+            start: Первый день
+            end: Последний день (включительно)
+
+        Raises:
+            ValueError: Если end раньше start
+        """
+        days = (end - start).days + 1
+        if days <= 0:
+            raise ValueError("Конец периода раньше начала")
+        first = to_day(start)
+        with self.db.session() as cursor:
+            cursor.execute('SELECT id FROM habits WHERE user_id = ? ORDER BY id', (user_id,))
+            habit_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute('''
+                SELECT c.habit_id, group_concat(c.day - ?)
+                FROM habit_checkins c
+                JOIN habits h ON h.id = c.habit_id
+                WHERE h.user_id = ? AND c.day BETWEEN ? AND ?
+                GROUP BY c.habit_id
+            ''', (first, user_id, first, first + days - 1))
+            groups = cursor.fetchall()
+
+        index = {habit_id: i for i, habit_id in enumerate(habit_ids)}
+        if self.use_numpy:
+            rows = np.zeros((len(habit_ids), days), dtype=bool)
+            for habit_id, offsets in groups:
+                rows[index[habit_id], np.array(offsets.split(","), dtype=np.int64)] = True
+        else:
+            rows = [0] * len(habit_ids)
+            for habit_id, offsets in groups:
+                # Строка из '0' и '1' со старшим битом слева переводится в число целиком
+                marks = bytearray(b"0" * days)
+                for offset in map(int, offsets.split(",")):
+                    marks[days - 1 - offset] = ord("1")
+                rows[index[habit_id]] = int(marks, 2)
+        return CheckinMatrix(habit_ids, start, days, rows)
+
+    def longest_streaks(self, matrix: CheckinMatrix) -> List[int]:
+        """Самая длинная серия подряд отмеченных дней каждой привычки"""
+        if self._is_numpy(matrix):
+            # Длина серии в каждый день - число отметок с начала минус их число
+            # на последний пропущенный день
+            totals = np.cumsum(matrix.rows, axis=1, dtype=np.int32)
+            base = np.maximum.accumulate(np.where(matrix.rows, 0, totals), axis=1)
+            return (totals - base).max(axis=1, initial=0).tolist()
+
+        result = []
+        for bits in matrix.rows:
+            # Каждый шаг укорачивает все серии на день
+            length = 0
+            while bits:
+                bits &= bits >> 1
+                length += 1
+            result.append(length)
+        return result
+
+    def current_streaks(self, matrix: CheckinMatrix) -> List[int]:
+        """
+        Текущая серия каждой привычки: заканчивается последним днем матрицы
+        или днем раньше (сегодня еще можно отметить выполнение)
+        """
+        if self._is_numpy(matrix):
+            rows = matrix.rows
+            today = self._trailing_run(rows)
+            yesterday = self._trailing_run(rows[:, :-1])
+            return np.where(rows[:, -1], today, yesterday).tolist()
+
+        days = matrix.days
+        full = (1 << days) - 1
+        result = []
+        for bits in matrix.rows:
+            if bits >> (days - 1) & 1:
+                result.append(days - (~bits & full).bit_length())
+            else:
+                result.append(days - 1 - (~bits & (full >> 1)).bit_length())
+        return result
+
+    def rolling_rates(self, matrix: CheckinMatrix, window: int = 30) -> Sequence[Sequence[float]]:
+        """
+        Скользящая доля отмеченных дней за window дней
+
+        Returns:
+            Строка на привычку; элемент j - доля для окна, заканчивающегося
+            днем start + window - 1 + j (numpy.ndarray, если используется NumPy)
+
+        Raises:
+            ValueError: Если окно не помещается в период матрицы
+        """
+        if not 0 < window <= matrix.days:
+            raise ValueError("Окно должно быть от 1 дня до длины периода")
+
+        if self._is_numpy(matrix):
+            totals = np.zeros((matrix.rows.shape[0], matrix.days + 1), dtype=np.int32)
+            np.cumsum(matrix.rows, axis=1, out=totals[:, 1:])
+            return (totals[:, window:] - totals[:, :-window]) / window
+
+        result = []
+        for bits in matrix.rows:
+            marks = format(bits, f"0{matrix.days}b")[::-1]
+            totals = list(accumulate(map(int, marks), initial=0))
+            result.append([(after - before) / window
+                           for before, after in zip(totals, totals[window:])])
+        return result
+
+    def weekday_profiles(self, matrix: CheckinMatrix) -> List[List[float]]:
+        """Доля отмеченных дней по дням недели (понедельник - первый) для каждой привычки"""
+        if self._is_numpy(matrix):
+            weekdays = (matrix.start.weekday() + np.arange(matrix.days)) % 7
+            onehot = (weekdays[:, None] == np.arange(7)).astype(np.float32)
+            counts = matrix.rows.astype(np.float32) @ onehot
+            return (counts / np.maximum(onehot.sum(axis=0), 1)).tolist()
+
+        masks = self._weekday_masks(matrix)
+        sizes = [max(mask.bit_count(), 1) for mask in masks]
+        return [[(bits & mask).bit_count() / size for mask, size in zip(masks, sizes)]
+                for bits in matrix.rows]
+
+    def heatmap(self, matrix: CheckinMatrix, year: int,
+                habit_ids: Optional[Iterable[int]] = None) -> List[List[int]]:
+        """
+        Календарная тепловая карта года: 7 строк (дни недели с понедельника)
+        на столбец для каждой недели. Значение - количество отмеченных
+        привычек за день; дни вне года и вне периода матрицы - 0
+
+        Args:
+            matrix: Матрица отметок
+            year: Год
+            habit_ids: Учитывать только эти привычки (по умолчанию - все)
+        """
+        first = date(year, 1, 1)
+        lead = first.weekday()
+        length = (date(year + 1, 1, 1) - first).days
+        offset = (first - matrix.start).days
+        selected = self._select(matrix, habit_ids)
+
+        # Отметки за дни года, попадающие в период матрицы
+        begin, end = max(offset, 0), min(offset + length, matrix.days)
+        if self._is_numpy(matrix):
+            daily = np.zeros(length, dtype=np.int64)
+            if begin < end:
+                daily[begin - offset:end - offset] = matrix.rows[selected, begin:end].sum(axis=0)
+            cells = np.zeros(-(-(lead + length) // 7) * 7, dtype=np.int64)
+            cells[lead:lead + length] = daily
+            return cells.reshape(-1, 7).T.tolist()
+
+        daily = [0] * length
+        rows = [matrix.rows[i] for i in selected]
+        for day in range(begin, end):
+            daily[day - offset] = sum(bits >> day & 1 for bits in rows)
+        cells = [0] * lead + daily
+        cells += [0] * (-len(cells) % 7)
+        return [cells[weekday::7] for weekday in range(7)]
+
+    def _select(self, matrix: CheckinMatrix, habit_ids: Optional[Iterable[int]]) -> List[int]:
+        """Номера строк матрицы для указанных привычек"""
+        if habit_ids is None:
+            return list(range(len(matrix.habit_ids)))
+        index: Dict[int, int] = {habit_id: i for i, habit_id in enumerate(matrix.habit_ids)}
+        return [index[habit_id] for habit_id in habit_ids if habit_id in index]
+
+    @staticmethod
+    def _is_numpy(matrix: CheckinMatrix) -> bool:
+        """Матрица построена на NumPy"""
+        return np is not None and isinstance(matrix.rows, np.ndarray)
+
+    @staticmethod
+    def _trailing_run(rows) -> Any:
+        """Длина серии, заканчивающейся последним столбцом (NumPy)"""
+        if rows.shape[1] == 0:
+            return np.zeros(rows.shape[0], dtype=np.int64)
+        reversed_rows = rows[:, ::-1]
+        return np.where(reversed_rows.all(axis=1), rows.shape[1], np.argmin(reversed_rows, axis=1))
+
+    @staticmethod
+    def _weekday_masks(matrix: CheckinMatrix) -> List[int]:
+        """Битовые маски дней периода для каждого дня недели"""
+        # Маска «каждый седьмой день» строится удвоением, без цикла по дням
+        pattern, width = 1, 7
+        while width < matrix.days + 7:
+            pattern |= pattern << width
+            width *= 2
+        full = (1 << matrix.days) - 1
+        first = matrix.start.weekday()
+        return [(pattern << ((weekday - first) % 7)) & full for weekday in range(7)]
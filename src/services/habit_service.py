@@ -1,158 +1,200 @@
-from typing import List
-from datetime import datetime, time
-from src.db.models import Habit
-from src.db.database import Database
-from src.patterns.observer import NotificationManager
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from datetime import date, datetime
+from src.db.models import Habit, HabitFrequency, HabitSummary
+from src.patterns.observer import ChangeEvent, ChangeKind, EventBus
+from src.patterns.repository import HabitRepository
+from src.services.habit_stats import HabitStats
+from src.services.reminder_scheduler import ReminderScheduler
 
 class HabitService:
     """
     Сервис для работы с привычками
     """
     def __init__(self):
-        self.db = Database()
-        self.notification_manager = NotificationManager()
-
-    def create_habit(self, user_id: int, name: str, frequency: str,
+        self.repository = HabitRepository()
+        self.stats = HabitStats()
+        self.events = EventBus()
+        # Напоминания всех экземпляров сервиса отправляет общий планировщик
+        self.reminders = ReminderScheduler()
+        self.notification_manager = self.reminders.notification_manager
+
+    def create_habit(self, user_id: int, name: str, frequency: Union[HabitFrequency, str],
                     reminder_time: str = None) -> Habit:
         """
         Создание новой привычки
         """
-        try:
-            if not self.db.connect():
-                return None
-
-            self.db.begin_transaction()
-            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-            result = self.db.execute('''
-                INSERT INTO habits (user_id, name, frequency, reminder_time, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user_id, name, frequency, reminder_time, current_time))
-
-            if not result:
-                self.db.rollback()
-                return None
-
-            habit_id = result.lastrowid
-            self.db.commit()
+        habit = Habit(
+            id=None,
+            user_id=user_id,
+            name=name,
+            frequency=HabitFrequency.parse(frequency),
+            reminder_time=reminder_time,
+            created_at=datetime.now().replace(microsecond=0)
+        )
+        habit = self.repository.create(habit)
+        if habit is not None:
+            self.reminders.schedule(habit)
+        return habit
+
+    def create_habits(self, user_id: int,
+                      items: List[Tuple[str, Union[HabitFrequency, str], Optional[str]]]) -> List[Habit]:
+        """
+        Пакетное создание привычек одним executemany в одной транзакции
 
-            return Habit(
-                id=habit_id,
+        Args:
+            user_id: ID пользователя
+            items: Кортежи (название, частота, время напоминания)
+        """
+        now = datetime.now().replace(microsecond=0)
+        habits = [
+            Habit(
+                id=None,
                 user_id=user_id,
                 name=name,
-                frequency=frequency,
+                frequency=HabitFrequency.parse(frequency),
                 reminder_time=reminder_time,
-                created_at=datetime.strptime(current_time, '%Y-%m-%d %H:%M:%S')
+                created_at=now
             )
-        except Exception as e:
-            print(f"Ошибка при создании привычки: {e}")
-            self.db.rollback()
-            return None
-        finally:
-            self.db.close()
+            for name, frequency, reminder_time in items
+        ]
+        habits = self.repository.create_many(habits)
+        for habit in habits:
+            self.reminders.schedule(habit)
+        return habits
+
+    def get_user_habits(self, user_id: int, after: Optional[int] = None,
+                        limit: Optional[int] = None) -> List[Habit]:
+        """
+        Получение привычек пользователя (постранично, если задан limit)
 
-    def get_user_habits(self, user_id: int) -> List[Habit]:
+        Args:
+            user_id: ID пользователя
+            after: ID последней привычки предыдущей страницы (опционально)
+            limit: Размер страницы (опционально)
         """
-        Получение всех привычек пользователя
+        return self.repository.get_all(user_id, None if after is None else (after,), limit)
+
+    def iter_user_habits(self, user_id: int, after: Optional[int] = None) -> Iterator[Habit]:
         """
-        try:
-            if not self.db.connect():
-                return []
-
-            result = self.db.execute('SELECT * FROM habits WHERE user_id = ?', (user_id,))
-            if not result:
-                return []
-
-            habits = []
-            for row in result.fetchall():
-                habits.append(Habit(
-                    id=row[0],
-                    user_id=row[1],
-                    name=row[2],
-                    frequency=row[3],
-                    reminder_time=row[4],
-                    created_at=datetime.strptime(row[5], '%Y-%m-%d %H:%M:%S')
-                ))
-            return habits
-        except Exception as e:
-            print(f"Ошибка при получении привычек: {e}")
-            return []
-        finally:
-            self.db.close()
+        Ленивый перебор привычек пользователя
+        """
+        return self.repository.iter_all(user_id, None if after is None else (after,))
 
     def update_habit(self, habit: Habit) -> bool:
         """
         Обновление привычки
         """
+        if not self.repository.update(habit):
+            return False
+        self.reminders.schedule(habit)
         try:
-            if not self.db.connect():
-                return False
-
-            self.db.begin_transaction()
-            result = self.db.execute('''
-                UPDATE habits 
-                SET name = ?, frequency = ?, reminder_time = ?
-                WHERE id = ?
-            ''', (habit.name, habit.frequency, habit.reminder_time, habit.id))
-
-            if not result:
-                self.db.rollback()
-                return False
-
-            self.db.commit()
-            return True
+            # После изменения частоты серии считаются по другим периодам
+            self.stats.refresh(habit)
         except Exception as e:
-            print(f"Ошибка при обновлении привычки: {e}")
-            self.db.rollback()
-            return False
-        finally:
-            self.db.close()
+            print(f"Ошибка при пересчете сводки привычки: {e}")
+            return True
+        self._publish_summary(habit)
+        return True
 
     def delete_habit(self, habit_id: int) -> bool:
         """
         Удаление привычки
         """
-        try:
-            if not self.db.connect():
-                return False
+        if not self.repository.delete(habit_id):
+            return False
+        self.reminders.unschedule(habit_id)
+        return True
 
-            self.db.begin_transaction()
-            result = self.db.execute('DELETE FROM habits WHERE id = ?', (habit_id,))
+    def check_in(self, habit_id: int, day: Optional[date] = None) -> bool:
+        """
+        Отметка выполнения привычки. Сводка (серии, доля выполнения)
+        обновляется в той же транзакции
 
-            if not result:
-                self.db.rollback()
-                return False
+        Args:
+            habit_id: ID привычки
+            day: День выполнения (по умолчанию - сегодня)
 
-            self.db.commit()
-            return True
+        Returns:
+            bool: True, если отметка добавлена (False - день уже отмечен или ошибка)
+
+        Raises:
+            ValueError: Если день еще не наступил
+        """
+        day = day or date.today()
+        if day > date.today():
+            raise ValueError("Нельзя отметить выполнение привычки в будущем")
+        habit = self.repository.get_by_id(habit_id)
+        if habit is None:
+            return False
+        try:
+            added = self.stats.check_in(habit, day)
         except Exception as e:
-            print(f"Ошибка при удалении привычки: {e}")
-            self.db.rollback()
+            print(f"Ошибка при отметке выполнения привычки: {e}")
             return False
-        finally:
-            self.db.close()
+        if added:
+            self._publish_summary(habit)
+        return added
 
-    def check_reminders(self):
+    def undo_check_in(self, habit_id: int, day: Optional[date] = None) -> bool:
         """
-        Проверка напоминаний о привычках
+        Отмена отметки выполнения привычки с исправлением сводки
+
+        Args:
+            habit_id: ID привычки
+            day: День выполнения (по умолчанию - сегодня)
+
+        Returns:
+            bool: True, если отметка удалена
         """
+        habit = self.repository.get_by_id(habit_id)
+        if habit is None:
+            return False
         try:
-            current_time = datetime.now().strftime("%H:%M")
-            if not self.db.connect():
-                return
+            removed = self.stats.undo_check_in(habit, day or date.today())
+        except Exception as e:
+            print(f"Ошибка при отмене отметки привычки: {e}")
+            return False
+        if removed:
+            self._publish_summary(habit)
+        return removed
 
-            result = self.db.execute('''
-                SELECT * FROM habits 
-                WHERE reminder_time = ?
-            ''', (current_time,))
+    def get_habit_summary(self, habit_id: int) -> Optional[HabitSummary]:
+        """
+        Сводка выполнения привычки: текущая и самая длинная серия,
+        последняя отметка, количество отметок и доля выполнения
+        за последние Config.HABIT_RATE_WINDOW дней
+        """
+        habit = self.repository.get_by_id(habit_id)
+        if habit is None:
+            return None
+        try:
+            return self.stats.get_summary(habit)
+        except Exception as e:
+            print(f"Ошибка при получении сводки привычки: {e}")
+            return None
 
-            if not result:
-                return
+    def get_user_summaries(self, user_id: int) -> Dict[int, HabitSummary]:
+        """Сводки всех привычек пользователя по ID привычки"""
+        try:
+            return self.stats.get_user_summaries(user_id)
+        except Exception as e:
+            print(f"Ошибка при получении сводок привычек: {e}")
+            return {}
 
-            for habit in result.fetchall():
-                message = f"Напоминание: Время выполнить привычку '{habit[2]}'"
-                self.notification_manager.add_notification(message)
+    def _publish_summary(self, habit: Habit):
+        """Публикация обновленной сводки привычки после изменения отметок"""
+        try:
+            summary = self.stats.get_summary(habit)
         except Exception as e:
-            print(f"Ошибка при проверке напоминаний: {e}")
-        finally:
-            self.db.close()
\ No newline at end of file
+            print(f"Ошибка при получении сводки привычки: {e}")
+            return
+        self.events.publish((ChangeEvent("habit", ChangeKind.UPDATED, habit.id, habit.user_id,
+                                         {"summary": summary}, habit),))
+
+    def check_reminders(self):
+        """
+        Запуск планировщика напоминаний о привычках: напоминания загружаются
+        один раз и отправляются точно по расписанию, опрашивать метод не нужно
+        (повторный вызов ничего не делает)
+        """
+        self.reminders.start()
@@ -0,0 +1,316 @@
+import sqlite3
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, Optional
+from src.config import Config
+from src.db.database import Database
+from src.db.mappers import from_day, to_day, to_timestamp
+from src.db.models import Habit, HabitFrequency, HabitSummary
+
+# Средняя длина периода привычки в днях (для доли выполнения за окно)
+_PERIOD_DAYS = {
+    HabitFrequency.DAILY: 1,
+    HabitFrequency.WEEKLY: 7,
+    HabitFrequency.MONTHLY: 365.25 / 12
+}
+
+
+def period_of(frequency: HabitFrequency, day: int) -> int:
+    """
+    Номер периода привычки, в который попадает день (число дней от 1970-01-01):
+    день, неделя с понедельника или месяц
+    """
+    if frequency == HabitFrequency.WEEKLY:
+        # 1970-01-01 - четверг, неделя 0 начинается в понедельник 1969-12-29
+        return (day + 3) // 7
+    if frequency == HabitFrequency.MONTHLY:
+        value = from_day(day)
+        return value.year * 12 + value.month - 1
+    return day
+
+
+def period_days(frequency: HabitFrequency, period: int) -> tuple:
+    """Первый и последний день периода (включительно)"""
+    if frequency == HabitFrequency.WEEKLY:
+        return period * 7 - 3, period * 7 + 3
+    if frequency == HabitFrequency.MONTHLY:
+        year, month = divmod(period, 12)
+        first = to_day(date(year, month + 1, 1))
+        year, month = divmod(period + 1, 12)
+        return first, to_day(date(year, month + 1, 1)) - 1
+    return period, period
+
+
+@dataclass(slots=True)
+class _State:
+    """Строка таблицы habit_stats"""
+    current_streak: int = 0
+    longest_streak: int = 0
+    last_period: Optional[int] = None
+    last_day: Optional[int] = None
+    total_checkins: int = 0
+    recent_mask: int = 0
+
+
+class HabitStats:
+    """
+    Журнал выполнения привычек (habit_checkins) и сводка серий (habit_stats)
+
+    Серия - число подряд идущих периодов (дней, недель или месяцев
+    по частоте привычки) с отметкой. Сводка обновляется при каждой отметке
+    без пересчета истории: новая отметка продлевает или начинает текущую
+    серию, отметка задним числом и отмена отметки просматривают только
+    соседние периоды. Самая длинная серия пересчитывается по всей истории,
+    только если отменена отметка в самой длинной серии.
+    Отметки последних Config.HABIT_RATE_WINDOW дней хранятся битовой маской.
+    """
+    def __init__(self):
+        self.db = Database()
+        self.window = Config.HABIT_RATE_WINDOW
+
+    def check_in(self, habit: Habit, day: date) -> bool:
+        """
+        Отметка выполнения привычки за день
+
+        Returns:
+            bool: True, если отметка добавлена (False - день уже отмечен)
+        """
+        value = to_day(day)
+        with self.db.transaction() as cursor:
+            state = self._load(cursor, habit)
+            cursor.execute('''
+                INSERT OR IGNORE INTO habit_checkins (habit_id, day, created_at)
+                VALUES (?, ?, ?)
+            ''', (habit.id, value, to_timestamp(datetime.now())))
+            if cursor.rowcount == 0:
+                return False
+            self._add(cursor, habit, state, value)
+            self._save(cursor, habit, state)
+        return True
+
+    def undo_check_in(self, habit: Habit, day: date) -> bool:
+        """
+        Отмена отметки выполнения привычки за день
+
+        Returns:
+            bool: True, если отметка удалена (False - день не был отмечен)
+        """
+        value = to_day(day)
+        with self.db.transaction() as cursor:
+            state = self._load(cursor, habit)
+            cursor.execute('DELETE FROM habit_checkins WHERE habit_id = ? AND day = ?',
+                           (habit.id, value))
+            if cursor.rowcount == 0:
+                return False
+            self._remove(cursor, habit, state, value)
+            self._save(cursor, habit, state)
+        return True
+
+    def refresh(self, habit: Habit):
+        """
+        Приведение сводки к текущей частоте привычки: после изменения
+        частоты периоды другие, и сводка пересчитывается по всей истории
+        """
+        with self.db.transaction() as cursor:
+            cursor.execute('SELECT frequency FROM habit_stats WHERE habit_id = ?', (habit.id,))
+            row = cursor.fetchone()
+            if row is not None and row[0] != habit.frequency:
+                self._save(cursor, habit, self._replay(cursor, habit))
+
+    def get_summary(self, habit: Habit, today: Optional[date] = None) -> HabitSummary:
+        """Сводка выполнения привычки на сегодня"""
+        with self.db.session() as cursor:
+            state = self._load(cursor, habit)
+        return self._summary(habit.id, habit.frequency, state, today or date.today())
+
+    def get_user_summaries(self, user_id: int,
+                           today: Optional[date] = None) -> Dict[int, HabitSummary]:
+        """Сводки всех привычек пользователя одним запросом, по ID привычки"""
+        today = today or date.today()
+        with self.db.session() as cursor:
+            cursor.execute('''
+                SELECT h.id, h.frequency, s.current_streak, s.longest_streak,
+                       s.last_period, s.last_day, s.total_checkins, s.recent_mask
+                FROM habits h
+                LEFT JOIN habit_stats s ON s.habit_id = h.id
+                WHERE h.user_id = ?
+            ''', (user_id,))
+            rows = cursor.fetchall()
+        return {
+            row[0]: self._summary(row[0], HabitFrequency(row[1]),
+                                  _State(*row[2:]) if row[2] is not None else _State(), today)
+            for row in rows
+        }
+
+    def _summary(self, habit_id: int, frequency: HabitFrequency, state: _State,
+                 today: date) -> HabitSummary:
+        """Сводка с учетом текущей даты: серия прервана, если пропущен прошлый период"""
+        today = to_day(today)
+        current = state.current_streak
+        if state.last_period is None or state.last_period < period_of(frequency, today) - 1:
+            current = 0
+
+        recent = 0
+        if state.last_day is not None:
+            offset = today - state.last_day
+            if 0 <= offset < self.window:
+                recent = (state.recent_mask & ((1 << (self.window - offset)) - 1)).bit_count()
+            elif offset < 0:
+                recent = state.recent_mask.bit_count()
+        expected = self.window / _PERIOD_DAYS[frequency]
+        return HabitSummary(
+            habit_id=habit_id,
+            current_streak=current,
+            longest_streak=state.longest_streak,
+            last_checkin=from_day(state.last_day),
+            total_checkins=state.total_checkins,
+            completion_rate=min(100.0, recent / expected * 100)
+        )
+
+    def _add(self, cursor: sqlite3.Cursor, habit: Habit, state: _State, day: int):
+        """Учет новой отметки в сводке (отметка уже записана в habit_checkins)"""
+        state.total_checkins += 1
+
+        # Маска последних дней
+        if state.last_day is None or day > state.last_day:
+            shift = self.window if state.last_day is None else day - state.last_day
+            state.recent_mask = ((state.recent_mask << shift) | 1) & ((1 << self.window) - 1)
+            state.last_day = day
+        elif state.last_day - day < self.window:
+            state.recent_mask |= 1 << (state.last_day - day)
+
+        # Серии
+        period = period_of(habit.frequency, day)
+        if state.last_period is None or period > state.last_period:
+            continues = state.last_period == period - 1
+            state.current_streak = state.current_streak + 1 if continues else 1
+            state.last_period = period
+            state.longest_streak = max(state.longest_streak, state.current_streak)
+        elif period < state.last_period and self._count(cursor, habit, period) == 1:
+            # Отметка задним числом в пустой период может соединить две серии
+            after = self._run(cursor, habit, period + 1, forward=True)
+            length = self._run(cursor, habit, period - 1, forward=False) + 1 + after
+            state.longest_streak = max(state.longest_streak, length)
+            if period + after == state.last_period:
+                state.current_streak = length
+
+    def _remove(self, cursor: sqlite3.Cursor, habit: Habit, state: _State, day: int):
+        """Учет отмены отметки в сводке (отметка уже удалена из habit_checkins)"""
+        state.total_checkins -= 1
+
+        period = period_of(habit.frequency, day)
+        if self._count(cursor, habit, period) == 0:
+            before = self._run(cursor, habit, period - 1, forward=False)
+            after = self._run(cursor, habit, period + 1, forward=True)
+            if period == state.last_period:
+                last_day = self._last_day(cursor, habit)
+                state.last_period = None if last_day is None else period_of(habit.frequency, last_day)
+                state.current_streak = (0 if state.last_period is None
+                                        else self._run(cursor, habit, state.last_period, forward=False))
+            elif period > state.last_period - state.current_streak:
+                # Период был внутри текущей серии: она начинается после него
+                state.current_streak = after
+            if before + 1 + after == state.longest_streak:
+                state.longest_streak = self._longest(cursor, habit)
+
+        if day == state.last_day:
+            state.last_day = self._last_day(cursor, habit)
+            state.recent_mask = self._recent_mask(cursor, habit, state.last_day)
+        elif state.last_day - day < self.window:
+            state.recent_mask &= ~(1 << (state.last_day - day))
+
+    def _count(self, cursor: sqlite3.Cursor, habit: Habit, period: int) -> int:
+        """Количество отметок в периоде"""
+        first, last = period_days(habit.frequency, period)
+        cursor.execute('SELECT COUNT(*) FROM habit_checkins WHERE habit_id = ? AND day BETWEEN ? AND ?',
+                       (habit.id, first, last))
+        return cursor.fetchone()[0]
+
+    def _run(self, cursor: sqlite3.Cursor, habit: Habit, period: int, forward: bool) -> int:
+        """
+        Длина серии отмеченных периодов, начиная с period, назад или вперед.
+        Отметки читаются по индексу до первого пропущенного периода
+        """
+        first, last = period_days(habit.frequency, period)
+        if forward:
+            cursor.execute('SELECT day FROM habit_checkins WHERE habit_id = ? AND day >= ? ORDER BY day',
+                           (habit.id, first))
+        else:
+            cursor.execute('SELECT day FROM habit_checkins WHERE habit_id = ? AND day <= ? '
+                           'ORDER BY day DESC', (habit.id, last))
+        step = 1 if forward else -1
+        length = 0
+        expected = period
+        for (day,) in cursor:
+            current = period_of(habit.frequency, day)
+            if current == expected:
+                length += 1
+                expected += step
+            elif current != expected - step:
+                break
+        return length
+
+    def _longest(self, cursor: sqlite3.Cursor, habit: Habit) -> int:
+        """Самая длинная серия по всей истории"""
+        cursor.execute('SELECT day FROM habit_checkins WHERE habit_id = ? ORDER BY day', (habit.id,))
+        longest = length = 0
+        previous = None
+        for (day,) in cursor:
+            period = period_of(habit.frequency, day)
+            if period == previous:
+                continue
+            length = length + 1 if previous == period - 1 else 1
+            longest = max(longest, length)
+            previous = period
+        return longest
+
+    def _last_day(self, cursor: sqlite3.Cursor, habit: Habit) -> Optional[int]:
+        """Последний отмеченный день"""
+        cursor.execute('SELECT MAX(day) FROM habit_checkins WHERE habit_id = ?', (habit.id,))
+        return cursor.fetchone()[0]
+
+    def _recent_mask(self, cursor: sqlite3.Cursor, habit: Habit, last_day: Optional[int]) -> int:
+        """Маска отметок за окно, заканчивающееся днем last_day"""
+        if last_day is None:
+            return 0
+        cursor.execute('SELECT day FROM habit_checkins WHERE habit_id = ? AND day BETWEEN ? AND ?',
+                       (habit.id, last_day - self.window + 1, last_day))
+        mask = 0
+        for (day,) in cursor:
+            mask |= 1 << (last_day - day)
+        return mask
+
+    def _load(self, cursor: sqlite3.Cursor, habit: Habit) -> _State:
+        """
+        Сводка привычки (пустая, если отметок еще не было).
+        Сводка, построенная для другой частоты, пересчитывается по истории
+        """
+        cursor.execute('''
+            SELECT frequency, current_streak, longest_streak, last_period, last_day,
+                   total_checkins, recent_mask
+            FROM habit_stats WHERE habit_id = ?
+        ''', (habit.id,))
+        row = cursor.fetchone()
+        if row is None:
+            return _State()
+        if row[0] != habit.frequency:
+            return self._replay(cursor, habit)
+        return _State(*row[1:])
+
+    def _replay(self, cursor: sqlite3.Cursor, habit: Habit) -> _State:
+        """Построение сводки по всей истории отметок"""
+        state = _State()
+        cursor.execute('SELECT day FROM habit_checkins WHERE habit_id = ? ORDER BY day', (habit.id,))
+        for (day,) in cursor.fetchall():
+            self._add(cursor, habit, state, day)
+        return state
+
+    def _save(self, cursor: sqlite3.Cursor, habit: Habit, state: _State):
+        """Запись сводки привычки"""
+        cursor.execute('''
+            INSERT OR REPLACE INTO habit_stats
+                (habit_id, frequency, current_streak, longest_streak, last_period,
+                 last_day, total_checkins, recent_mask)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (habit.id, int(habit.frequency), state.current_streak, state.longest_streak,
+              state.last_period, state.last_day, state.total_checkins, state.recent_mask))
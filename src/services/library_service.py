@@ -1,21 +1,76 @@
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 import os
+import re
+import threading
 from datetime import datetime
-import PyPDF2
-from src.db.models import Book, Note
-from src.db.database import Database
+from src.config import Config
+from src.db.models import Book, Note, PageMatches, SearchHit
+from src.patterns.repository import BookRepository, NoteRepository
+from src.patterns.write_behind import WriteBehindBuffer
+from src.services.book_indexer import BookIndexer
+from src.services.book_ingestion import (BookIngestion, ImportReport, ProgressCallback,
+                                        iter_pdf_files)
+from src.services.book_session import BookSession
+from src.services.executor import BackgroundExecutor
+from src.services.page_cache import FileStamp, PageCache
+
+# Символов текста вокруг совпадения во фрагменте результата поиска в книге
+FIND_CONTEXT = 40
 
 class LibraryService:
     """
     Сервис для работы с библиотекой
     """
+    # Общие для всех экземпляров буферы позиций чтения по файлу базы данных:
+    # фрейм библиотеки, импорт и индексация видят одни и те же еще не записанные
+    # позиции, а фоновый поток и обработчик atexit создаются один раз на файл
+    position_buffers: Dict[str, WriteBehindBuffer[int, int]] = {}
+    _position_buffers_lock = threading.Lock()
+
     def __init__(self):
-        self.db = Database()
+        self.books = BookRepository()
+        self.notes = NoteRepository()
+        # Позиции чтения записываются отложенно: при быстром перелистывании
+        # в БД попадает только последняя страница каждой книги
+        with self._position_buffers_lock:
+            positions = self.position_buffers.get(self.books.db.db_path)
+            if positions is None:
+                positions = WriteBehindBuffer(self.books.update_current_pages,
+                                              Config.READING_POSITION_FLUSH_DELAY)
+                self.position_buffers[self.books.db.db_path] = positions
+        self.positions: WriteBehindBuffer[int, int] = positions
+        self.page_cache = PageCache()
+        self.ingestion = BookIngestion(self.page_cache)
+        self.indexer = BookIndexer(self.books, self.page_cache, self.ingestion)
+        self.executor = BackgroundExecutor()
+
+        # Сессия чтения открытой книги и фоновое извлечение страниц
+        self._session: Optional[BookSession] = None
+        self._session_lock = threading.Lock()
+        self._prefetch_lock = threading.Lock()
+        self._prefetching: Set[Tuple[int, int, FileStamp]] = set()
+        self._prefetched: Set[Tuple[int, int, FileStamp]] = set()
+        self.page_views = 0
+        self.prefetched_pages = 0
+        self.prefetch_hits = 0
 
     def add_book(self, user_id: int, title: str, author: str,
-                file_path: str) -> Optional[Book]:
+                file_path: str, extract_text: Optional[bool] = None,
+                progress: Optional[ProgressCallback] = None) -> Optional[Book]:
         """
         Добавление новой книги в библиотеку
+
+        Файл проверяется и разбирается в пуле процессов, вызывающий поток
+        ждет результата, поэтому интерфейс вызывает метод через BackgroundExecutor.
+
+        Args:
+            user_id: ID пользователя
+            title: Название книги
+            author: Автор книги
+            file_path: Путь к PDF-файлу
+            extract_text: Сразу извлечь текст всех страниц в кэш и добавить
+                его в поисковый индекс (по умолчанию Config.PDF_PREEXTRACT_TEXT)
+            progress: Вызывается с (извлечено страниц, всего страниц)
         """
         try:
             # Проверка PDF файла
@@ -23,193 +78,395 @@ class LibraryService:
                 print(f"Файл не найден: {file_path}")
                 return None
 
-            with open(file_path, 'rb') as file:
-                pdf = PyPDF2.PdfReader(file)
-                # Просто проверяем, что можем прочитать PDF
-                _ = len(pdf.pages)
-
-            if not self.db.connect():
-                return None
-
-            cursor = self.db.cursor
-            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-            cursor.execute('''
-                INSERT INTO books (user_id, title, author, file_path, current_page, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (user_id, title, author, file_path, 0, current_time))
-
-            book_id = cursor.lastrowid
-            self.db.conn.commit()
-
-            return Book(
-                id=book_id,
+            info = self.ingestion.inspect(file_path)
+            book = Book(
+                id=None,
                 user_id=user_id,
                 title=title,
                 author=author,
                 file_path=file_path,
                 current_page=0,
-                created_at=datetime.strptime(current_time, '%Y-%m-%d %H:%M:%S')
+                created_at=datetime.now().replace(microsecond=0),
+                page_count=info.page_count,
+                file_size=info.file_size,
+                file_mtime=info.file_mtime,
+                content_hash=info.content_hash,
+                pdf_metadata=info.metadata
             )
+            if self.books.create(book) is None:
+                return None
         except Exception as e:
             print(f"Ошибка при добавлении книги: {e}")
             return None
-        finally:
-            self.db.close()
 
-    def get_user_books(self, user_id: int) -> List[Book]:
+        if Config.PDF_PREEXTRACT_TEXT if extract_text is None else extract_text:
+            self.indexer.index_book(book, progress)
+        return book
+
+    def import_directory(self, user_id: int, directory: str,
+                         progress: Optional[ProgressCallback] = None) -> ImportReport:
         """
-        Получение всех книг пользователя
+        Импорт всех PDF-файлов папки (включая вложенные папки)
+
+        Папка обходится лениво, файлы разбираются в пуле процессов,
+        название и автор берутся из метаданных PDF (по умолчанию - имя файла).
+        Файлы, содержимое которых уже есть в библиотеке пользователя
+        или встречается в папке повторно, пропускаются. Все новые книги
+        добавляются одной транзакцией, текст страниц индексируется позже
+        в фоне (index_library). Вызывающий поток ждет окончания разбора,
+        поэтому интерфейс вызывает метод через BackgroundExecutor.
+
+        Args:
+            user_id: ID пользователя
+            directory: Путь к папке
+            progress: Вызывается с (разобрано файлов, найдено файлов)
+
+        Returns:
+            ImportReport: Добавленные книги, число дубликатов и пути файлов с ошибками
         """
+        report = ImportReport()
+        infos = {}
+        for path, info in self.ingestion.inspect_many(iter_pdf_files(directory), progress):
+            if info is None:
+                report.failed.append(path)
+            elif info.content_hash in infos:
+                report.duplicates += 1
+            else:
+                infos[info.content_hash] = info
+
         try:
-            if not self.db.connect():
-                return []
-
-            cursor = self.db.cursor
-            cursor.execute('SELECT * FROM books WHERE user_id = ?', (user_id,))
-
-            books = []
-            for row in cursor.fetchall():
-                books.append(Book(
-                    id=row[0],
-                    user_id=row[1],
-                    title=row[2],
-                    author=row[3],
-                    file_path=row[4],
-                    current_page=row[5],
-                    created_at=datetime.strptime(row[6], '%Y-%m-%d %H:%M:%S')
-                ))
-            return books
+            existing = self.books.find_hashes(user_id, infos)
         except Exception as e:
-            print(f"Ошибка при получении книг: {e}")
-            return []
-        finally:
-            self.db.close()
+            print(f"Ошибка при проверке дубликатов книг: {e}")
+            return report
+        report.duplicates += len(existing)
+
+        now = datetime.now().replace(microsecond=0)
+        books = [
+            Book(
+                id=None,
+                user_id=user_id,
+                title=(info.metadata.get("title", "").strip()
+                       or os.path.splitext(os.path.basename(info.file_path))[0]),
+                author=info.metadata.get("author", "").strip(),
+                file_path=info.file_path,
+                current_page=0,
+                created_at=now,
+                page_count=info.page_count,
+                file_size=info.file_size,
+                file_mtime=info.file_mtime,
+                content_hash=info.content_hash,
+                pdf_metadata=info.metadata
+            )
+            for content_hash, info in infos.items() if content_hash not in existing
+        ]
+        if books:
+            report.added = self.books.create_many(books)
+        return report
+
+    def index_library(self, user_id: int) -> int:
+        """
+        Добавление в поисковый индекс книг пользователя, которых в нем нет
+        или файлы которых изменились. Текст извлекается в пуле процессов,
+        поэтому метод вызывается в фоне
+
+        Returns:
+            int: Количество книг с актуальным индексом
+        """
+        return self.indexer.index_books(self.get_user_books(user_id))
+
+    def search(self, user_id: int, query: str,
+               limit: int = Config.BOOK_SEARCH_LIMIT) -> List[SearchHit]:
+        """
+        Полнотекстовый поиск по содержимому книг пользователя
+
+        Args:
+            user_id: ID пользователя
+            query: Искомые слова (последнее слово ищется как начало слова)
+            limit: Максимальное количество результатов
+
+        Returns:
+            List[SearchHit]: Книга, номер страницы и фрагмент текста
+                с выделенными совпадениями, лучшие совпадения первыми
+        """
+        hits = self.indexer.search(user_id, query, limit)
+        for hit in hits:
+            self._apply_position(hit.book)
+        return hits
+
+    def get_user_books(self, user_id: int, after: Optional[int] = None,
+                       limit: Optional[int] = None) -> List[Book]:
+        """
+        Получение книг пользователя (постранично, если задан limit)
+
+        Args:
+            user_id: ID пользователя
+            after: ID последней книги предыдущей страницы (опционально)
+            limit: Размер страницы (опционально)
+        """
+        books = self.books.get_all(user_id, None if after is None else (after,), limit)
+        for book in books:
+            self._apply_position(book)
+        return books
+
+    def iter_user_books(self, user_id: int, after: Optional[int] = None) -> Iterator[Book]:
+        """
+        Ленивый перебор книг пользователя
+        """
+        return map(self._apply_position,
+                   self.books.iter_all(user_id, None if after is None else (after,)))
 
     def update_current_page(self, book_id: int, page: int) -> bool:
         """
-        Обновление текущей страницы книги
+        Обновление текущей страницы книги. Запись отложенная:
+        см. flush_positions()
         """
-        try:
-            if not self.db.connect():
-                return False
-
-            cursor = self.db.cursor
-            cursor.execute('''
-                UPDATE books 
-                SET current_page = ?
-                WHERE id = ?
-            ''', (page, book_id))
-            self.db.conn.commit()
-            return True
-        except Exception as e:
-            print(f"Ошибка при обновлении страницы: {e}")
-            return False
-        finally:
-            self.db.close()
+        self.positions.put(book_id, page)
+        return True
 
-    def add_note(self, book_id: int, page_number: int, content: str) -> Optional[Note]:
+    def flush_positions(self, book_id: Optional[int] = None) -> int:
         """
-        Добавление заметки к книге
+        Немедленная запись отложенных позиций чтения
+        (при смене книги и закрытии приложения)
+
+        Args:
+            book_id: Записать позицию только этой книги (по умолчанию - всех)
+
+        Returns:
+            int: Количество записанных позиций
         """
-        try:
-            if not self.db.connect():
-                return None
+        return self.positions.flush(None if book_id is None else (book_id,))
 
-            cursor = self.db.cursor
-            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    def _apply_position(self, book: Optional[Book]) -> Optional[Book]:
+        """Подстановка еще не записанной позиции чтения"""
+        if book is not None:
+            book.current_page = self.positions.get(book.id, book.current_page)
+        return book
 
-            cursor.execute('''
-                INSERT INTO notes (book_id, page_number, content, created_at)
-                VALUES (?, ?, ?, ?)
-            ''', (book_id, page_number, content, current_time))
+    def add_note(self, book_id: int, page_number: int, content: str) -> Optional[Note]:
+        """
+        Добавление заметки к книге
+        """
+        note = Note(
+            id=None,
+            book_id=book_id,
+            page_number=page_number,
+            content=content,
+            created_at=datetime.now().replace(microsecond=0)
+        )
+        return self.notes.create(note)
 
-            note_id = cursor.lastrowid
-            self.db.conn.commit()
+    def add_notes(self, book_id: int, items: List[Tuple[int, str]]) -> List[Note]:
+        """
+        Пакетное добавление заметок к книге одним executemany в одной транзакции
 
-            return Note(
-                id=note_id,
+        Args:
+            book_id: ID книги
+            items: Кортежи (номер страницы, текст заметки)
+        """
+        now = datetime.now().replace(microsecond=0)
+        notes = [
+            Note(
+                id=None,
                 book_id=book_id,
                 page_number=page_number,
                 content=content,
-                created_at=datetime.strptime(current_time, '%Y-%m-%d %H:%M:%S')
+                created_at=now
             )
-        except Exception as e:
-            print(f"Ошибка при добавлении заметки: {e}")
-            return None
-        finally:
-            self.db.close()
+            for page_number, content in items
+        ]
+        return self.notes.create_many(notes)
 
-    def get_book_notes(self, book_id: int) -> List[Note]:
+    def get_book_notes(self, book_id: int, after: Optional[Tuple[int, int]] = None,
+                       limit: Optional[int] = None) -> List[Note]:
         """
-        Получение всех заметок к книге
+        Получение заметок к книге в порядке страниц (постранично, если задан limit)
+
+        Args:
+            book_id: ID книги
+            after: Ключ (page_number, id) последней заметки предыдущей страницы (опционально)
+            limit: Размер страницы (опционально)
         """
-        try:
-            if not self.db.connect():
-                return []
-
-            cursor = self.db.cursor
-            cursor.execute('SELECT * FROM notes WHERE book_id = ?', (book_id,))
-
-            notes = []
-            for row in cursor.fetchall():
-                notes.append(Note(
-                    id=row[0],
-                    book_id=row[1],
-                    page_number=row[2],
-                    content=row[3],
-                    created_at=datetime.strptime(row[4], '%Y-%m-%d %H:%M:%S')
-                ))
-            return notes
-        except Exception as e:
-            print(f"Ошибка при получении заметок: {e}")
-            return []
-        finally:
-            self.db.close()
+        return self.notes.get_all(book_id, after, limit)
+
+    def iter_book_notes(self, book_id: int,
+                        after: Optional[Tuple[int, int]] = None) -> Iterator[Note]:
+        """
+        Ленивый перебор заметок к книге
+        """
+        return self.notes.iter_all(book_id, after)
 
     def get_page_content(self, book_id: int, page_number: int) -> str:
         """
-        Получение содержимого страницы книги
+        Получение содержимого страницы книги.
+        Извлеченный текст кэшируется в памяти и в таблице book_pages,
+        а следующие страницы заранее извлекаются в фоне
         """
         try:
             book = self.get_book_by_id(book_id)
             if not book or not os.path.exists(book.file_path):
                 return ""
 
-            with open(book.file_path, 'rb') as file:
-                pdf = PyPDF2.PdfReader(file)
-                if 0 <= page_number < len(pdf.pages):
-                    return pdf.pages[page_number].extract_text()
-            return ""
+            session = self._open_session(book)
+            content = self.page_cache.get(book_id, page_number, session.stamp)
+            with self._prefetch_lock:
+                self.page_views += 1
+                key = (book_id, page_number, session.stamp)
+                if content is not None and key in self._prefetched:
+                    self._prefetched.discard(key)
+                    self.prefetch_hits += 1
+
+            if content is None:
+                content = session.extract_text(page_number)
+                if content is None:
+                    return ""
+                self.page_cache.put(book_id, page_number, session.stamp, content)
+
+            self._schedule_prefetch(session, page_number)
+            return content
         except Exception as e:
             print(f"Ошибка при чтении PDF: {e}")
             return ""
 
-    def get_book_by_id(self, book_id: int) -> Optional[Book]:
+    def find_in_book(self, book_id: int, text: str) -> Iterator[PageMatches]:
         """
-        Получение книги по ID
+        Поиск текста в книге без полнотекстового индекса: страницы
+        просматриваются по порядку, уже извлеченный текст берется из кэша,
+        остальные страницы извлекаются и сохраняются в кэш пачками.
+        Регистр не учитывается, пробелы и переносы строк между словами
+        считаются одинаковыми
+
+        Генератор выдает результат каждой просмотренной страницы (в том числе
+        без совпадений), поэтому перебор можно остановить между страницами
+        и показывать ход поиска. Выполняется в фоне: BackgroundExecutor.stream
+
+        Args:
+            book_id: ID книги
+            text: Искомый текст
+
+        Yields:
+            PageMatches: Номер страницы, число страниц и фрагменты
+                с выделенными совпадениями
         """
-        try:
-            if not self.db.connect():
-                return None
+        words = text.split()
+        book = self.get_book_by_id(book_id)
+        if not words or not book or not os.path.exists(book.file_path):
+            return
 
-            cursor = self.db.cursor
-            cursor.execute('SELECT * FROM books WHERE id = ?', (book_id,))
-            book_data = cursor.fetchone()
-
-            if book_data:
-                return Book(
-                    id=book_data[0],
-                    user_id=book_data[1],
-                    title=book_data[2],
-                    author=book_data[3],
-                    file_path=book_data[4],
-                    current_page=book_data[5],
-                    created_at=datetime.strptime(book_data[6], '%Y-%m-%d %H:%M:%S')
+        pattern = re.compile(r"\s+".join(map(re.escape, words)), re.IGNORECASE)
+        session = self._open_session(book)
+        extracted: Dict[int, str] = {}
+        try:
+            for page_number in range(session.page_count):
+                content = self.page_cache.get(book_id, page_number, session.stamp)
+                if content is None:
+                    content = session.extract_text(page_number)
+                    if content is None:
+                        # Сессия закрыта (книга закрыта во время поиска)
+                        return
+                    extracted[page_number] = content
+                    if len(extracted) >= Config.PDF_EXTRACT_CHUNK_SIZE:
+                        self.page_cache.store_pages(book_id, session.stamp, extracted)
+                        extracted = {}
+                yield PageMatches(
+                    page_number=page_number,
+                    page_count=session.page_count,
+                    snippets=[self._snippet(content, match) for match in pattern.finditer(content)]
                 )
-            return None
+        finally:
+            # Извлеченный текст сохраняется и при остановке поиска
+            if extracted:
+                self.page_cache.store_pages(book_id, session.stamp, extracted)
+
+    @staticmethod
+    def _snippet(content: str, match: re.Match) -> str:
+        """Фрагмент текста вокруг совпадения, совпадение выделено []"""
+        start = max(0, match.start() - FIND_CONTEXT)
+        end = min(len(content), match.end() + FIND_CONTEXT)
+        snippet = (content[start:match.start()] + "[" + match.group() + "]"
+                   + content[match.end():end])
+        snippet = " ".join(snippet.split())
+        return ("…" if start else "") + snippet + ("…" if end < len(content) else "")
+
+    def close_book(self):
+        """Закрытие сессии чтения текущей книги (файл и PdfReader)"""
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def get_prefetch_stats(self) -> dict:
+        """
+        Метрики фонового извлечения страниц
+
+        Returns:
+            dict: page_views (запрошено страниц), prefetched (извлечено заранее),
+                prefetch_hits (запросов, обслуженных заранее извлеченной страницей),
+                hit_rate (доля таких запросов, %)
+        """
+        with self._prefetch_lock:
+            return {
+                "page_views": self.page_views,
+                "prefetched": self.prefetched_pages,
+                "prefetch_hits": self.prefetch_hits,
+                "hit_rate": (self.prefetch_hits / self.page_views) * 100 if self.page_views else 0
+            }
+
+    def _open_session(self, book: Book) -> BookSession:
+        """Сессия чтения книги: открывается заново при смене книги или изменении файла"""
+        with self._session_lock:
+            session = self._session
+            if session is not None and session.book_id == book.id and session.is_current():
+                return session
+            if session is not None:
+                session.close()
+            with self._prefetch_lock:
+                self._prefetched.clear()
+            self._session = BookSession(book.id, book.file_path)
+            return self._session
+
+    def _schedule_prefetch(self, session: BookSession, page_number: int):
+        """Фоновое извлечение следующих Config.PDF_PREFETCH_DEPTH страниц и предыдущей"""
+        pages = [*range(page_number + 1, page_number + 1 + Config.PDF_PREFETCH_DEPTH), page_number - 1]
+        for page in pages:
+            if not 0 <= page < session.page_count:
+                continue
+            key = (session.book_id, page, session.stamp)
+            with self._prefetch_lock:
+                if key in self.page_cache.memory or key in self._prefetching:
+                    continue
+                self._prefetching.add(key)
+            try:
+                self.executor.submit(self._prefetch_page, session, page)
+            except RuntimeError:
+                # Пул уже остановлен (завершение приложения)
+                with self._prefetch_lock:
+                    self._prefetching.discard(key)
+                return
+
+    def _prefetch_page(self, session: BookSession, page_number: int):
+        """Извлечение страницы в кэш (выполняется в пуле потоков)"""
+        key = (session.book_id, page_number, session.stamp)
+        try:
+            if self._session is not session:
+                return
+            content = self.page_cache.get(session.book_id, page_number, session.stamp)
+            if content is None:
+                content = session.extract_text(page_number)
+                if content is None:
+                    return
+                self.page_cache.put(session.book_id, page_number, session.stamp, content)
+            with self._prefetch_lock:
+                self._prefetched.add(key)
+                self.prefetched_pages += 1
         except Exception as e:
-            print(f"Ошибка при получении книги: {e}")
-            return None
+            print(f"Ошибка при фоновом извлечении страницы: {e}")
         finally:
-            self.db.close()
\ No newline at end of file
+            with self._prefetch_lock:
+                self._prefetching.discard(key)
+
+    def get_book_by_id(self, book_id: int) -> Optional[Book]:
+        """
+        Получение книги по ID
+        """
+        return self._apply_position(self.books.get_by_id(book_id))
\ No newline at end of file
@@ -0,0 +1,154 @@
+import os
+import zlib
+from typing import Dict, Optional, Tuple
+from src.config import Config
+from src.db.database import Database
+from src.patterns.cache import LRUCache
+
+# Отпечаток файла книги: (размер в байтах, время изменения в наносекундах)
+FileStamp = Tuple[int, int]
+
+
+def file_stamp(file_path: str) -> FileStamp:
+    """Отпечаток файла, по которому определяется, что кэш страниц устарел"""
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class PageCache:
+    """
+    Двухуровневый кэш извлеченного текста страниц PDF
+
+    Первый уровень - LRU декодированных страниц в памяти, второй -
+    таблица book_pages со сжатым zlib текстом. Ключ записи включает
+    отпечаток файла, поэтому после изменения файла книги старый текст
+    не возвращается, а устаревшие строки таблицы удаляются.
+    """
+    def __init__(self):
+        self.db = Database()
+        self.memory: LRUCache[Tuple[int, int, FileStamp], str] = LRUCache(Config.PAGE_CACHE_SIZE)
+        self.disk_hits = 0
+        self.disk_misses = 0
+
+    def get(self, book_id: int, page_number: int, stamp: FileStamp) -> Optional[str]:
+        """
+        Текст страницы из кэша
+
+        Args:
+            book_id: ID книги
+            page_number: Номер страницы
+            stamp: Текущий отпечаток файла книги
+
+        Returns:
+            Optional[str]: Текст страницы или None, если его нет в кэше
+        """
+        key = (book_id, page_number, stamp)
+        content = self.memory.get(key)
+        if content is not None:
+            return content
+
+        try:
+            with self.db.session() as cursor:
+                cursor.execute('''
+                    SELECT content, file_size, file_mtime FROM book_pages
+                    WHERE book_id = ? AND page_number = ?
+                ''', (book_id, page_number))
+                row = cursor.fetchone()
+        except Exception as e:
+            print(f"Ошибка при чтении кэша страниц: {e}")
+            return None
+
+        if row is None:
+            self.disk_misses += 1
+            return None
+        if (row[1], row[2]) != stamp:
+            self.disk_misses += 1
+            self.invalidate(book_id, stamp)
+            return None
+
+        self.disk_hits += 1
+        content = zlib.decompress(row[0]).decode("utf-8")
+        self.memory.put(key, content)
+        return content
+
+    def put(self, book_id: int, page_number: int, stamp: FileStamp, content: str):
+        """Сохранение извлеченного текста страницы в оба уровня кэша"""
+        self.memory.put((book_id, page_number, stamp), content)
+        data = zlib.compress(content.encode("utf-8"), Config.PAGE_CACHE_COMPRESSION_LEVEL)
+        try:
+            with self.db.transaction() as cursor:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO book_pages
+                        (book_id, page_number, file_size, file_mtime, content)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (book_id, page_number, stamp[0], stamp[1], data))
+        except Exception as e:
+            print(f"Ошибка при записи кэша страниц: {e}")
+
+    def store_pages(self, book_id: int, stamp: FileStamp, pages: Dict[int, str]):
+        """
+        Сохранение текста нескольких страниц только в таблицу book_pages
+        одной транзакцией (предварительное извлечение всей книги не вытесняет
+        из памяти страницы, которые читаются сейчас)
+        """
+        level = Config.PAGE_CACHE_COMPRESSION_LEVEL
+        try:
+            with self.db.transaction() as cursor:
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO book_pages
+                        (book_id, page_number, file_size, file_mtime, content)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', [(book_id, page_number, stamp[0], stamp[1],
+                       zlib.compress(content.encode("utf-8"), level))
+                      for page_number, content in pages.items()])
+        except Exception as e:
+            print(f"Ошибка при записи кэша страниц: {e}")
+
+    def load_pages(self, book_id: int, stamp: FileStamp) -> Dict[int, str]:
+        """
+        Текст всех сохраненных в таблице book_pages страниц книги
+        с текущим отпечатком файла (кэш в памяти не заполняется)
+
+        Returns:
+            Dict[int, str]: {номер страницы: текст}
+        """
+        try:
+            with self.db.session() as cursor:
+                cursor.execute('''
+                    SELECT page_number, content FROM book_pages
+                    WHERE book_id = ? AND file_size = ? AND file_mtime = ?
+                ''', (book_id, stamp[0], stamp[1]))
+                return {row[0]: zlib.decompress(row[1]).decode("utf-8")
+                        for row in cursor.fetchall()}
+        except Exception as e:
+            print(f"Ошибка при чтении кэша страниц: {e}")
+            return {}
+
+    def invalidate(self, book_id: int, stamp: Optional[FileStamp] = None):
+        """
+        Сброс кэша страниц книги
+
+        Args:
+            book_id: ID книги
+            stamp: Текущий отпечаток файла: удаляются только строки с другим
+                отпечатком (по умолчанию удаляются все страницы книги)
+        """
+        self.memory.discard_where(lambda key: key[0] == book_id and key[2] != stamp)
+        try:
+            with self.db.transaction() as cursor:
+                if stamp is None:
+                    cursor.execute('DELETE FROM book_pages WHERE book_id = ?', (book_id,))
+                else:
+                    cursor.execute('''
+                        DELETE FROM book_pages
+                        WHERE book_id = ? AND (file_size != ? OR file_mtime != ?)
+                    ''', (book_id, stamp[0], stamp[1]))
+        except Exception as e:
+            print(f"Ошибка при сбросе кэша страниц: {e}")
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Счетчики попаданий и промахов обоих уровней"""
+        return {
+            "memory": self.memory.stats(),
+            "disk": {"hits": self.disk_hits, "misses": self.disk_misses}
+        }
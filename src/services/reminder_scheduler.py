@@ -0,0 +1,187 @@
+import heapq
+import itertools
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+from src.db.models import Habit, HabitFrequency
+from src.patterns.observer import NotificationManager
+from src.patterns.repository import HabitRepository
+from src.services.executor import BackgroundExecutor
+
+# Тема уведомлений о привычках в NotificationManager
+REMINDER_TOPIC = "habit_reminder"
+
+def parse_reminder_time(value: Optional[str]) -> Optional[time]:
+    """Время напоминания из строки ЧЧ:ММ (None, если время не задано или некорректно)"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value.strip(), "%H:%M").time()
+    except ValueError:
+        return None
+
+
+def next_reminder(habit: Habit, after: datetime) -> Optional[datetime]:
+    """
+    Ближайшее напоминание о привычке строго позже after.
+    Как и в календаре, ежедневные привычки напоминают каждый день,
+    еженедельные - по понедельникам, ежемесячные - первого числа
+
+    Returns:
+        Optional[datetime]: Время напоминания или None, если время напоминания не задано
+    """
+    at = parse_reminder_time(habit.reminder_time)
+    if at is None:
+        return None
+
+    day = after.date()
+    if habit.frequency == HabitFrequency.WEEKLY:
+        day += timedelta(days=-day.weekday() % 7)
+    elif habit.frequency == HabitFrequency.MONTHLY and day.day != 1:
+        day = _next_month(day)
+
+    fire = datetime.combine(day, at)
+    if fire > after:
+        return fire
+    if habit.frequency == HabitFrequency.WEEKLY:
+        return fire + timedelta(weeks=1)
+    if habit.frequency == HabitFrequency.MONTHLY:
+        return datetime.combine(_next_month(day), at)
+    return fire + timedelta(days=1)
+
+
+def _next_month(day: date) -> date:
+    """Первое число следующего месяца"""
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+class ReminderScheduler:
+    """
+    Планировщик напоминаний о привычках (Singleton)
+
+    Напоминания всех привычек загружаются один раз в очередь с приоритетом
+    (min-heap) по времени следующего срабатывания. Один фоновый поток спит
+    до ближайшего напоминания, поэтому между напоминаниями процессор не
+    используется. При создании, изменении и удалении привычки меняется только
+    ее запись; устаревшие записи кучи отбрасываются при извлечении.
+
+    Пропущенное напоминание (компьютер был в спящем режиме) показывается
+    один раз, после чего назначается следующее по расписанию.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.repository = HabitRepository()
+            # Наблюдатели - виджеты Tk, поэтому сводки доставляются в потоке интерфейса
+            cls._instance.notification_manager = NotificationManager(dispatch=BackgroundExecutor().post)
+            cls._instance._heap: List[Tuple[datetime, int, int]] = []
+            cls._instance._scheduled: Dict[int, Tuple[int, Habit]] = {}
+            cls._instance._counter = itertools.count()
+            cls._instance._condition = threading.Condition()
+            cls._instance._thread = None
+            cls._instance._stopped = False
+        return cls._instance
+
+    def __init__(self):
+        """
+        __new__ уже инициализировал все необходимые атрибуты
+        """
+        pass
+
+    def start(self):
+        """Загрузка напоминаний и запуск фонового потока (повторный вызов ничего не делает)"""
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="reminders", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Остановка фонового потока (при завершении приложения)"""
+        with self._condition:
+            self._stopped = True
+            thread, self._thread = self._thread, None
+            self._condition.notify()
+        if thread is not None:
+            thread.join()
+
+    def schedule(self, habit: Habit):
+        """
+        Назначение (или перенос) напоминания о созданной или измененной привычке.
+        Привычка без времени напоминания снимается с расписания
+        """
+        with self._condition:
+            self._schedule(habit, datetime.now())
+            self._condition.notify()
+
+    def unschedule(self, habit_id: int):
+        """Снятие с расписания напоминания об удаленной привычке"""
+        with self._condition:
+            self._scheduled.pop(habit_id, None)
+
+    def next_fire_time(self) -> Optional[datetime]:
+        """Время ближайшего напоминания (None, если напоминаний нет)"""
+        with self._condition:
+            self._discard_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def _schedule(self, habit: Habit, after: datetime):
+        """Запись в расписание (вызывается под блокировкой)"""
+        fire = next_reminder(habit, after)
+        if fire is None:
+            self._scheduled.pop(habit.id, None)
+            return
+        sequence = next(self._counter)
+        self._scheduled[habit.id] = (sequence, habit)
+        heapq.heappush(self._heap, (fire, sequence, habit.id))
+
+    def _discard_stale(self):
+        """Удаление из вершины кучи записей удаленных и перенесенных напоминаний"""
+        while self._heap:
+            _, sequence, habit_id = self._heap[0]
+            entry = self._scheduled.get(habit_id)
+            if entry is not None and entry[0] == sequence:
+                return
+            heapq.heappop(self._heap)
+
+    def _load(self):
+        """Первичная загрузка напоминаний всех привычек"""
+        with self._condition:
+            # Запрос под блокировкой: изменения привычек во время загрузки ждут ее окончания
+            habits = self.repository.find_with_reminders()
+            now = datetime.now()
+            for habit in habits:
+                # Привычки, измененные во время загрузки, уже в расписании
+                if habit.id not in self._scheduled:
+                    self._schedule(habit, now)
+
+    def _run(self):
+        """Фоновый поток: ожидание ближайшего напоминания и отправка уведомлений"""
+        self._load()
+        while True:
+            with self._condition:
+                while True:
+                    if self._stopped:
+                        return
+                    self._discard_stale()
+                    now = datetime.now()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    timeout = (self._heap[0][0] - now).total_seconds() if self._heap else None
+                    self._condition.wait(timeout)
+
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    _, sequence, habit_id = heapq.heappop(self._heap)
+                    entry = self._scheduled.get(habit_id)
+                    if entry is None or entry[0] != sequence:
+                        continue
+                    due.append(entry[1])
+                    self._schedule(entry[1], now)
+
+            for habit in due:
+                message = f"Напоминание: Время выполнить привычку '{habit.name}'"
+                self.notification_manager.add_notification(message, REMINDER_TOPIC)
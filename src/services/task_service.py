@@ -1,5 +1,5 @@
-from typing import List
-from src.db.models import Task
+from typing import Any, Iterator, List, Optional, Tuple, Union
+from src.db.models import Task, TaskStatus
 from src.patterns.task_factory import TaskFactory
 from src.patterns.repository import TaskRepository
 from datetime import datetime
@@ -21,75 +21,108 @@ class TaskService:
         task = creator.create_task(user_id, title, description)
         return self.repository.create(task)
 
-    def get_user_tasks(self, user_id: int, status: str = None,
+    def create_tasks(self, user_id: int, items: List[Tuple[str, Optional[str], str]]) -> List[Task]:
+        """
+        Пакетное создание задач (импорт, начальное наполнение)
+
+        Args:
+            user_id: ID пользователя
+            items: Кортежи (название, описание, тип задачи)
+        """
+        tasks = [
+            self.task_factory.get_task_creator(task_type).create_task(user_id, title, description)
+            for title, description, task_type in items
+        ]
+        return self.repository.create_many(tasks)
+
+    def get_user_tasks(self, user_id: int, status: Union[TaskStatus, str] = None,
                       search_query: str = None,
                       sort_by: str = "priority",
-                      sort_order: str = "desc") -> List[Task]:
+                      sort_order: str = "desc",
+                      limit: int = None,
+                      after: Optional[Tuple[Any, int]] = None) -> List[Task]:
         """
         Получение всех задач пользователя с фильтрацией и сортировкой
 
         Args:
             user_id: ID пользователя
-            status: Статус для фильтрации (опционально)
+            status: Статус или его название для фильтрации (опционально)
             search_query: Поисковый запрос (опционально)
             sort_by: Поле для сортировки ('priority', 'created_at')
             sort_order: Порядок сортировки ('asc', 'desc')
+            limit: Максимальное количество задач (опционально)
+            after: Ключ последней задачи предыдущей страницы (опционально)
         """
-        tasks = self.repository.get_all(user_id)
+        return self.repository.query(
+            user_id,
+            status=status,
+            search_query=search_query,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            limit=limit,
+            after=after
+        )
 
-        # Фильтрация по статусу
-        if status:
-            tasks = [task for task in tasks if task.status == status]
-
-        # Поиск по названию
-        if search_query:
-            search_query = search_query.lower()
-            tasks = [task for task in tasks if search_query in task.title.lower()]
+    def get_tasks_created_between(self, user_id: int, start: datetime, end: datetime) -> List[Task]:
+        """
+        Задачи пользователя, созданные в промежутке [start, end)
+        (например, за месяц календаря), по убыванию приоритета
+        """
+        return self.repository.find_created_between(user_id, start, end)
 
-        # Сортировка
-        reverse = sort_order == "desc"
-        if sort_by == "priority":
-            tasks.sort(key=lambda x: x.priority, reverse=reverse)
-        elif sort_by == "created_at":
-            tasks.sort(key=lambda x: x.created_at, reverse=reverse)
+    def iter_user_tasks(self, user_id: int, status: Union[TaskStatus, str] = None,
+                        search_query: str = None,
+                        sort_by: str = "priority",
+                        sort_order: str = "desc") -> Iterator[Task]:
+        """
+        Ленивый перебор задач пользователя (без загрузки всего списка в память)
+        """
+        return self.repository.iter_query(
+            user_id,
+            status=status,
+            search_query=search_query,
+            sort_by=sort_by,
+            sort_order=sort_order
+        )
 
-        return tasks
+    def get_page_key(self, task: Task, sort_by: str = "priority") -> Tuple[Any, int]:
+        """
+        Ключ задачи для запроса следующей страницы (параметр after)
+        """
+        return self.repository.page_key(task, sort_by)
 
-    def update_task_status(self, task_id: int, new_status: str):
+    def update_task_status(self, task_id: int, new_status: Union[TaskStatus, str]) -> bool:
         """
         Обновление статуса задачи
         """
-        task = self.repository.get_by_id(task_id)
-        if task:
-            task.status = new_status
-            self.repository.update(task)
+        return self.repository.patch(task_id, status=new_status) > 0
+
+    def update_tasks_status(self, task_ids: List[int], new_status: Union[TaskStatus, str]) -> int:
+        """
+        Обновление статуса нескольких задач в одной транзакции
 
-    def update_task_priority(self, task_id: int, new_priority: int):
+        Returns:
+            int: Количество обновленных задач
+        """
+        return self.repository.patch_many(task_ids, status=new_status)
+
+    def update_task_priority(self, task_id: int, new_priority: int) -> bool:
         """
         Обновление приоритета задачи
         """
-        task = self.repository.get_by_id(task_id)
-        if task:
-            task.priority = new_priority
-            self.repository.update(task)
+        return self.repository.patch(task_id, priority=new_priority) > 0
 
-    def update_task_color(self, task_id: int, new_color: str):
+    def update_task_color(self, task_id: int, new_color: str) -> bool:
         """
         Обновление цвета задачи
         """
-        task = self.repository.get_by_id(task_id)
-        if task:
-            task.color = new_color
-            self.repository.update(task)
+        return self.repository.patch(task_id, color=new_color) > 0
 
-    def update_task_description(self, task_id: int, new_description: str):
+    def update_task_description(self, task_id: int, new_description: str) -> bool:
         """
         Обновление описания задачи
         """
-        task = self.repository.get_by_id(task_id)
-        if task:
-            task.description = new_description
-            self.repository.update(task)
+        return self.repository.patch(task_id, description=new_description) > 0
 
     def delete_task(self, task_id: int):
         """
@@ -100,24 +133,35 @@ class TaskService:
     def get_task_statistics(self, user_id: int) -> dict:
         """
         Получение статистики по задачам пользователя
-        """
-        tasks = self.get_user_tasks(user_id)
-        total_tasks = len(tasks)
 
-        if not total_tasks:
-            return {
-                "total": 0,
-                "completed": 0,
-                "in_progress": 0,
-                "completion_rate": 0
-            }
+        Returns:
+            dict: total, completed, in_progress, completion_rate, а также
+                by_status (количество по статусам) и by_priority (по приоритетам)
+        """
+        by_status = {}
+        by_priority = {}
+        for status, priority, count in self.repository.get_counts(user_id):
+            by_status[status.label] = by_status.get(status.label, 0) + count
+            by_priority[priority] = by_priority.get(priority, 0) + count
 
-        completed = len([t for t in tasks if t.status == "completed"])
-        in_progress = len([t for t in tasks if t.status == "in_progress"])
+        total_tasks = sum(by_status.values())
+        completed = by_status.get("completed", 0)
 
         return {
             "total": total_tasks,
             "completed": completed,
-            "in_progress": in_progress,
-            "completion_rate": (completed / total_tasks) * 100
-        }
\ No newline at end of file
+            "in_progress": by_status.get("in_progress", 0),
+            "completion_rate": (completed / total_tasks) * 100 if total_tasks else 0,
+            "by_status": by_status,
+            "by_priority": by_priority
+        }
+
+    def get_cache_stats(self) -> dict:
+        """
+        Счетчики кэша задач для мониторинга
+
+        Returns:
+            dict: items (кэш задач по ID) и queries (кэш выборок),
+                для каждого size, max_size, hits, misses
+        """
+        return self.repository.cache_stats()
@@ -1,19 +1,26 @@
 import customtkinter as ctk
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import calendar
 from src.services.task_service import TaskService
 from src.services.habit_service import HabitService
-from typing import Dict, Any
+from src.services.executor import BackgroundExecutor
+from src.db.models import TaskStatus, HabitFrequency
+from src.patterns.observer import ChangeKind, ChangeObserver, EventBus
+from typing import Dict, Any, Optional, Set, Tuple
 
-class CalendarFrame(ctk.CTkFrame):
+class CalendarFrame(ctk.CTkFrame, ChangeObserver):
     """
     Фрейм для отображения календаря с задачами и привычками
+
+    Месяц загружается целиком при переключении, изменения задач и привычек
+    приходят событиями EventBus и перерисовывают только затронутые дни
     """
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
         self.task_service = TaskService()
         self.habit_service = HabitService()
+        self.executor = BackgroundExecutor()
 
         # Текущая дата
         self.current_date = datetime.now()
@@ -21,8 +28,18 @@ class CalendarFrame(ctk.CTkFrame):
         # Словарь для хранения ячеек календаря
         self.calendar_cells: Dict[tuple, Dict[str, Any]] = {}
 
+        # События показанного месяца: ячейка каждого дня, незавершенные
+        # задачи по дням, день каждой задачи и привычки по ID
+        self.day_cells: Dict[date, tuple] = {}
+        self.day_tasks: Dict[date, Dict[int, Any]] = {}
+        self.task_days: Dict[int, date] = {}
+        self.habits: Dict[int, Any] = {}
+
         self.create_widgets()
 
+        # Подписываемся на изменения задач и привычек
+        EventBus().attach(self, topics=("task", "habit"))
+
     def create_widgets(self):
         """Создание элементов интерфейса календаря"""
         # Верхняя панель с навигацией
@@ -118,7 +135,10 @@ class CalendarFrame(ctk.CTkFrame):
         return f"{months[self.current_date.month - 1]} {self.current_date.year}"
 
     def update_calendar(self):
-        """Обновление отображения календаря"""
+        """
+        Обновление отображения календаря. Задачи и привычки читаются
+        и раскладываются по дням в потоке БД, виджеты заполняются по готовности
+        """
         # Обновление заголовка
         self.month_label.configure(text=self.get_month_year_string())
 
@@ -130,17 +150,18 @@ class CalendarFrame(ctk.CTkFrame):
             cell["date_label"].configure(text="")
             cell["events_text"].delete("1.0", "end")
             cell["frame"].configure(fg_color=("gray90", "gray13"))
+        self.day_cells = {}
+        self.day_tasks = {}
+        self.task_days = {}
+        self.habits = {}
 
         # Получение данных пользователя
         current_user = self.controller.auth_service.get_current_user()
         if not current_user:
+            self.executor.cancel(f"calendar:{id(self)}")
             return
 
-        # Получение задач и привычек
-        tasks = self.task_service.get_user_tasks(current_user.id)
-        habits = self.habit_service.get_user_habits(current_user.id)
-
-        # Заполнение календаря
+        today = datetime.now()
         for week_num, week in enumerate(cal):
             for day_num, day in enumerate(week):
                 if day != 0:
@@ -148,43 +169,136 @@ class CalendarFrame(ctk.CTkFrame):
 
                     # Установка даты
                     cell["date_label"].configure(text=str(day))
+                    self.day_cells[date(self.current_date.year, self.current_date.month, day)] = (
+                        week_num, day_num
+                    )
 
                     # Проверка текущего дня
-                    if (day == datetime.now().day and 
-                        self.current_date.month == datetime.now().month and
-                        self.current_date.year == datetime.now().year):
+                    if (day == today.day and
+                        self.current_date.month == today.month and
+                        self.current_date.year == today.year):
                         cell["frame"].configure(fg_color=("lightblue", "darkblue"))
 
-                    # Добавление задач и привычек
-                    events_text = ""
+        # Задачи и привычки загружаются в фоне
+        self.executor.run(
+            self.collect_events,
+            current_user.id,
+            self.current_date.year,
+            self.current_date.month,
+            callback=self.show_events,
+            key=f"calendar:{id(self)}"
+        )
+
+    def collect_events(self, user_id: int, year: int, month: int) -> Tuple[Dict[date, dict], dict]:
+        """
+        Сбор событий месяца (выполняется в потоке БД)
+
+        Returns:
+            Tuple: Незавершенные задачи месяца по дню создания и привычки по ID
+        """
+        first = datetime(year, month, 1)
+        following = datetime(year + month // 12, month % 12 + 1, 1)
+
+        # Задачи только этого месяца (отбор по индексу в SQLite) и привычки
+        tasks = self.task_service.get_tasks_created_between(user_id, first, following)
+        habits = self.habit_service.get_user_habits(user_id)
+
+        # Незавершенные задачи по дате создания
+        day_tasks: Dict[date, Dict[int, Any]] = {}
+        for task in tasks:
+            if task.status != TaskStatus.COMPLETED:
+                day_tasks.setdefault(self.task_date(task), {})[task.id] = task
+        return day_tasks, {habit.id: habit for habit in habits}
+
+    def show_events(self, events: Tuple[Dict[date, dict], dict]):
+        """Заполнение ячеек календаря событиями"""
+        self.day_tasks, self.habits = events
+        self.task_days = {task_id: day for day, tasks in self.day_tasks.items() for task_id in tasks}
+        for day in self.day_cells:
+            self.show_day(day)
+
+    def show_day(self, day: date):
+        """Перерисовка событий одного дня"""
+        # Задачи в порядке списка задач: по приоритету, затем новые выше
+        tasks = sorted(self.day_tasks.get(day, {}).values(), key=lambda task: (-task.priority, -task.id))
+        events_text = "".join(f"• {task.title}\n" for task in tasks)
+        events_text += "".join(self.habit_line(habit, day) for habit in self.habits.values())
+
+        cell = self.calendar_cells[self.day_cells[day]]
+        cell["events_text"].delete("1.0", "end")
+        cell["events_text"].insert("1.0", events_text)
+
+    @staticmethod
+    def task_date(task) -> date:
+        """День создания задачи"""
+        return task.created_at.date()
+
+    @staticmethod
+    def habit_line(habit, day: date) -> str:
+        """Строка привычки в ячейке дня (пустая, если в этот день привычки нет)"""
+        if habit.frequency == HabitFrequency.DAILY:
+            return f"□ {habit.name}\n"
+        if habit.frequency == HabitFrequency.WEEKLY and day.weekday() == 0:
+            return f"□ {habit.name} (нед.)\n"
+        if habit.frequency == HabitFrequency.MONTHLY and day.day == 1:
+            return f"□ {habit.name} (мес.)\n"
+        return ""
+
+    def on_change(self, event):
+        """
+        Обработка изменения задачи или привычки (реализация интерфейса
+        ChangeObserver): перерисовываются только дни, где событие было или стало
+        """
+        current_user = self.controller.auth_service.get_current_user()
+        if not self.day_cells or not current_user or event.owner_id != current_user.id:
+            return
 
-                    # Проверка задач на этот день
-                    day_date = datetime(
-                        self.current_date.year,
-                        self.current_date.month,
-                        day
-                    )
+        if event.entity == "task":
+            days = self.apply_task_change(event)
+        else:
+            days = self.apply_habit_change(event)
+        for day in days:
+            self.show_day(day)
+
+    def apply_task_change(self, event) -> Set[date]:
+        """Перенос задачи в данных месяца, возвращает затронутые дни"""
+        days = set()
+        old_day = self.task_days.pop(event.id, None)
+        if old_day is not None:
+            del self.day_tasks[old_day][event.id]
+            days.add(old_day)
+        if event.kind is ChangeKind.DELETED:
+            return days
+
+        # События создания и изменения задач содержат задачу целиком
+        task = event.item
+        if task is None or task.status == TaskStatus.COMPLETED:
+            return days
+
+        day = self.task_date(task)
+        if day in self.day_cells:
+            self.day_tasks.setdefault(day, {})[task.id] = task
+            self.task_days[task.id] = day
+            days.add(day)
+        return days
+
+    def apply_habit_change(self, event) -> Set[date]:
+        """Замена привычки в данных месяца, возвращает затронутые дни"""
+        old = self.habits.get(event.id)
+        habit: Optional[Any] = None if event.kind is ChangeKind.DELETED else event.item
+        if habit is None:
+            if event.kind is ChangeKind.DELETED:
+                self.habits.pop(event.id, None)
+            else:
+                return set()
+        else:
+            self.habits[event.id] = habit
+            # Отметки выполнения и прочие поля на календарь не влияют
+            if old is not None and (old.name, old.frequency) == (habit.name, habit.frequency):
+                return set()
 
-                    for task in tasks:
-                        if not isinstance(task.created_at, str):
-                            task_date = task.created_at
-                        else:
-                            task_date = datetime.strptime(task.created_at, "%Y-%m-%d %H:%M:%S")
-
-                        if task_date.date() == day_date.date() and task.status != "completed":
-                            events_text += f"• {task.title}\n"
-
-                    # Проверка привычек
-                    for habit in habits:
-                        if habit.frequency == "daily":
-                            events_text += f"□ {habit.name}\n"
-                        elif habit.frequency == "weekly" and day_date.weekday() == 0:
-                            events_text += f"□ {habit.name} (нед.)\n"
-                        elif habit.frequency == "monthly" and day == 1:
-                            events_text += f"□ {habit.name} (мес.)\n"
-
-                    cell["events_text"].delete("1.0", "end")
-                    cell["events_text"].insert("1.0", events_text)
+        return {day for day in self.day_cells
+                if any(self.habit_line(item, day) for item in (old, habit) if item is not None)}
 
     def previous_month(self):
         """Переход к предыдущему месяцу"""
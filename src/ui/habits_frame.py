@@ -1,11 +1,17 @@
 import customtkinter as ctk
+from datetime import date
+from src.config import Config
 from src.services.habit_service import HabitService
+from src.services.reminder_scheduler import REMINDER_TOPIC
 from src.services.ai_service import AIService
-from src.patterns.observer import Observer
+from src.patterns.observer import ChangeKind, ChangeObserver, EventBus, Observer
 
-class HabitsFrame(ctk.CTkFrame, Observer):
+class HabitsFrame(ctk.CTkFrame, Observer, ChangeObserver):
     """
     Фрейм для управления привычками
+
+    Изменения привычек и их отметок приходят событиями EventBus
+    и перерисовывают только строку измененной привычки
     """
     def __init__(self, parent, controller):
         super().__init__(parent)
@@ -13,8 +19,16 @@ class HabitsFrame(ctk.CTkFrame, Observer):
         self.habit_service = HabitService()
         self.ai_service = AIService()
 
-        # Подписываемся на уведомления
-        self.habit_service.notification_manager.attach(self)
+        # Подписываемся на напоминания (менеджер хранит слабую ссылку на фрейм)
+        self.notification_window = None
+        self.notification_label = None
+        self.habit_service.notification_manager.attach(self, topics=(REMINDER_TOPIC,))
+
+        # Показанные привычки, их сводки и строки по ID привычки
+        self.habits = {}
+        self.summaries = {}
+        self.habit_widgets = {}
+        EventBus().attach(self, topics=("habit",))
 
         self.create_widgets()
 
@@ -86,6 +100,7 @@ class HabitsFrame(ctk.CTkFrame, Observer):
         if not current_user:
             return
 
+        # Строка привычки появится по событию habit_created
         self.habit_service.create_habit(
             user_id=current_user.id,
             name=name,
@@ -95,12 +110,19 @@ class HabitsFrame(ctk.CTkFrame, Observer):
 
         self.habit_entry.delete(0, "end")
         self.time_entry.delete(0, "end")
-        self.refresh_habits()
 
-    def create_habit_widget(self, habit):
-        """Создание виджета для привычки"""
+    def create_habit_widget(self, habit, summary=None, before=None):
+        """
+        Создание виджета для привычки
+
+        Args:
+            habit: Привычка
+            summary: Сводка выполнения (опционально)
+            before: Строка, перед которой вставляется виджет (по умолчанию - в конец)
+        """
         frame = ctk.CTkFrame(self.habits_frame)
-        frame.pack(fill="x", padx=5, pady=2)
+        frame.pack(fill="x", padx=5, pady=2, before=before)
+        self.habit_widgets[habit.id] = frame
 
         # Название привычки
         name_label = ctk.CTkLabel(frame, text=habit.name)
@@ -109,7 +131,7 @@ class HabitsFrame(ctk.CTkFrame, Observer):
         # Частота
         frequency_label = ctk.CTkLabel(
             frame,
-            text=f"Частота: {habit.frequency}"
+            text=f"Частота: {habit.frequency.label}"
         )
         frequency_label.pack(side="left", padx=5)
 
@@ -121,6 +143,25 @@ class HabitsFrame(ctk.CTkFrame, Observer):
             )
             time_label.pack(side="left", padx=5)
 
+        # Серии и доля выполнения
+        if summary:
+            summary_label = ctk.CTkLabel(
+                frame,
+                text=f"Серия: {summary.current_streak} (рекорд {summary.longest_streak}), "
+                     f"за {Config.HABIT_RATE_WINDOW} дней: {summary.completion_rate:.0f}%"
+            )
+            summary_label.pack(side="left", padx=5)
+
+        # Отметка выполнения за сегодня (повторное нажатие отменяет отметку)
+        done_today = summary is not None and summary.last_checkin == date.today()
+        check_button = ctk.CTkButton(
+            frame,
+            text="✓ Выполнено" if done_today else "Отметить",
+            width=100,
+            command=lambda: self.toggle_check_in(habit.id, done_today)
+        )
+        check_button.pack(side="right", padx=5)
+
         # Кнопка AI-анализа
         ai_button = ctk.CTkButton(
             frame,
@@ -189,6 +230,9 @@ class HabitsFrame(ctk.CTkFrame, Observer):
         # Очистка текущего списка
         for widget in self.habits_frame.winfo_children():
             widget.destroy()
+        self.habits = {}
+        self.summaries = {}
+        self.habit_widgets = {}
 
         current_user = self.controller.auth_service.get_current_user()
         if not current_user:
@@ -196,28 +240,73 @@ class HabitsFrame(ctk.CTkFrame, Observer):
 
         # Получение и отображение привычек
         habits = self.habit_service.get_user_habits(current_user.id)
+        self.summaries = self.habit_service.get_user_summaries(current_user.id)
         for habit in habits:
-            self.create_habit_widget(habit)
+            self.habits[habit.id] = habit
+            self.create_habit_widget(habit, self.summaries.get(habit.id))
+
+    def on_change(self, event):
+        """
+        Обработка изменения привычки (реализация интерфейса ChangeObserver):
+        строка привычки удаляется, добавляется в конец или заменяется на месте
+        """
+        current_user = self.controller.auth_service.get_current_user()
+        if not current_user or event.owner_id != current_user.id:
+            return
+
+        old_widget = self.habit_widgets.pop(event.id, None)
+        if event.kind is ChangeKind.DELETED:
+            self.habits.pop(event.id, None)
+            self.summaries.pop(event.id, None)
+            if old_widget is not None:
+                old_widget.destroy()
+            return
+
+        habit = event.item if event.item is not None else self.habits.get(event.id)
+        if habit is None:
+            return
+        self.habits[event.id] = habit
+        if "summary" in event.changes:
+            self.summaries[event.id] = event.changes["summary"]
+
+        # Новые привычки идут в конце списка, как в выборке по ID
+        self.create_habit_widget(habit, self.summaries.get(event.id), before=old_widget)
+        if old_widget is not None:
+            old_widget.destroy()
+
+    def toggle_check_in(self, habit_id: int, done_today: bool):
+        """Отметка выполнения привычки за сегодня или ее отмена (строка обновится по событию)"""
+        if done_today:
+            self.habit_service.undo_check_in(habit_id)
+        else:
+            self.habit_service.check_in(habit_id)
 
     def delete_habit(self, habit_id: int):
         """Удаление привычки"""
         self.habit_service.delete_habit(habit_id)
-        self.refresh_habits()
 
     def update(self, message: str):
         """
-        Обработка уведомлений (реализация интерфейса Observer)
+        Обработка уведомлений (реализация интерфейса Observer).
+        Если окно напоминания еще открыто, новая сводка добавляется в него
         """
+        if self.notification_window is not None and self.notification_window.winfo_exists():
+            text = self.notification_label.cget("text")
+            self.notification_label.configure(text=f"{text}\n\n{message}")
+            self.notification_window.lift()
+            return
+
         notification = ctk.CTkToplevel(self)
-        notification.geometry("300x100")
         notification.title("Напоминание")
 
-        label = ctk.CTkLabel(notification, text=message)
-        label.pack(pady=20)
+        label = ctk.CTkLabel(notification, text=message, justify="left", wraplength=360)
+        label.pack(padx=20, pady=20)
 
         button = ctk.CTkButton(
             notification,
             text="OK",
             command=notification.destroy
         )
-        button.pack()
\ No newline at end of file
+        button.pack(pady=(0, 20))
+        self.notification_window = notification
+        self.notification_label = label
\ No newline at end of file
@@ -1,19 +1,36 @@
 import customtkinter as ctk
+from dataclasses import replace
 from tkinter import filedialog
+from src.config import Config
 from src.services.library_service import LibraryService
+from src.services.executor import BackgroundExecutor
+from src.patterns.observer import ChangeKind, ChangeObserver, EventBus
 
-class LibraryFrame(ctk.CTkFrame):
+class LibraryFrame(ctk.CTkFrame, ChangeObserver):
     """
     Фрейм для работы с библиотекой
+
+    Добавленные, измененные и удаленные книги и заметки приходят событиями
+    EventBus и меняют только свои строки списка
     """
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
         self.library_service = LibraryService()
+        self.executor = BackgroundExecutor()
         self.current_book = None
+        self.find_count = 0
+
+        # Показанные книги и их строки по ID книги, заметки открытой книги
+        self.books = {}
+        self.book_widgets = {}
+        self.notes = []
 
         self.create_widgets()
 
+        # Подписываемся на изменения книг и заметок
+        EventBus().attach(self, topics=("book", "note"))
+
     def create_widgets(self):
         """Создание элементов интерфейса"""
         # Основной контейнер
@@ -32,6 +49,40 @@ class LibraryFrame(ctk.CTkFrame):
         )
         add_button.pack(pady=5)
 
+        import_button = ctk.CTkButton(
+            left_panel,
+            text="Импорт папки",
+            command=self.import_directory
+        )
+        import_button.pack(pady=5)
+
+        # Ход добавления книги (показывается только во время разбора файла)
+        self.import_label = ctk.CTkLabel(left_panel, text="")
+        self.import_progress = ctk.CTkProgressBar(left_panel)
+        self.import_progress.set(0)
+
+        # Полнотекстовый поиск по содержимому книг
+        search_panel = ctk.CTkFrame(left_panel)
+        search_panel.pack(fill="x", pady=5)
+
+        self.search_entry = ctk.CTkEntry(
+            search_panel,
+            placeholder_text="Поиск по книгам"
+        )
+        self.search_entry.pack(side="left", fill="x", expand=True, padx=5)
+        self.search_entry.bind("<Return>", lambda event: self.search_books())
+
+        search_button = ctk.CTkButton(
+            search_panel,
+            text="Найти",
+            width=70,
+            command=self.search_books
+        )
+        search_button.pack(side="right", padx=5)
+
+        # Результаты поиска (показываются только после поиска)
+        self.results_frame = ctk.CTkScrollableFrame(left_panel, height=200)
+
         # Список книг
         self.books_frame = ctk.CTkScrollableFrame(left_panel)
         self.books_frame.pack(fill="both", expand=True)
@@ -57,6 +108,24 @@ class LibraryFrame(ctk.CTkFrame):
         )
         go_button.pack(side="left", padx=5)
 
+        find_button = ctk.CTkButton(
+            control_panel,
+            text="Найти в книге",
+            command=self.find_in_book
+        )
+        find_button.pack(side="right", padx=5)
+
+        self.find_entry = ctk.CTkEntry(
+            control_panel,
+            placeholder_text="Текст в книге"
+        )
+        self.find_entry.pack(side="right", padx=5)
+        self.find_entry.bind("<Return>", lambda event: self.find_in_book())
+
+        # Результаты поиска в книге (показываются по мере просмотра страниц)
+        self.find_label = ctk.CTkLabel(self.reader_frame, text="")
+        self.find_results = ctk.CTkScrollableFrame(self.reader_frame, height=150)
+
         # Область для текста
         self.text_area = ctk.CTkTextbox(self.reader_frame)
         self.text_area.pack(fill="both", expand=True, pady=5)
@@ -109,72 +178,268 @@ class LibraryFrame(ctk.CTkFrame):
         if not current_user:
             return
 
-        book = self.library_service.add_book(
-            user_id=current_user.id,
-            title=title,
-            author=author,
-            file_path=file_path
+        # Разбор файла и извлечение текста идут в фоне, интерфейс показывает ход
+        self.show_import_progress(0, 0, title)
+        self.executor.run(
+            self.library_service.add_book,
+            current_user.id,
+            title,
+            author,
+            file_path,
+            None,
+            lambda done, total: self.executor.post(self.show_import_progress, done, total, title),
+            callback=self.book_added,
+            error_callback=lambda error: self.book_added(None),
+            db=False
         )
 
-        if book:
-            self.refresh_books()
+    def show_import_progress(self, done: int, total: int, title: str):
+        """Отображение хода добавления книги"""
+        if total:
+            self.import_label.configure(text=f"{title}: {done} из {total} стр.")
+            self.import_progress.set(done / total)
+        else:
+            self.import_label.configure(text=f"{title}: проверка файла...")
+            self.import_progress.set(0)
+        self.import_label.pack(pady=(5, 0))
+        self.import_progress.pack(fill="x", padx=5, pady=(0, 5))
+
+    def book_added(self, book):
+        """Завершение добавления книги (строка книги добавляется по событию book_created)"""
+        self.import_label.pack_forget()
+        self.import_progress.pack_forget()
+        if not book:
+            print("Не удалось добавить книгу")
+
+    def import_directory(self):
+        """Импорт всех PDF-файлов выбранной папки"""
+        directory = filedialog.askdirectory()
+        if not directory:
+            return
 
-    def create_book_widget(self, book):
-        """Создание виджета для книги"""
+        current_user = self.controller.auth_service.get_current_user()
+        if not current_user:
+            return
+
+        self.show_directory_progress(0, 0)
+        self.executor.run(
+            self.library_service.import_directory,
+            current_user.id,
+            directory,
+            lambda done, found: self.executor.post(self.show_directory_progress, done, found),
+            callback=self.directory_imported,
+            error_callback=lambda error: print(f"Ошибка при импорте папки: {error}"),
+            db=False
+        )
+
+    def show_directory_progress(self, done: int, found: int):
+        """Отображение хода импорта папки"""
+        self.import_label.configure(text=f"Импорт: разобрано {done} из {found} файлов")
+        self.import_progress.set(done / found if found else 0)
+        self.import_label.pack(pady=(5, 0))
+        self.import_progress.pack(fill="x", padx=5, pady=(0, 5))
+
+    def directory_imported(self, report):
+        """Завершение импорта папки"""
+        self.import_progress.pack_forget()
+        self.import_label.configure(
+            text=f"Добавлено: {len(report.added)}, дубликатов: {report.duplicates}, "
+                 f"ошибок: {len(report.failed)}"
+        )
+        # Строки новых книг уже добавлены по событиям, остается проиндексировать текст
+        self.index_library()
+
+    def create_book_widget(self, book, before=None):
+        """
+        Создание виджета для книги
+
+        Args:
+            book: Книга
+            before: Строка, перед которой вставляется виджет (по умолчанию - в конец)
+        """
         frame = ctk.CTkFrame(self.books_frame)
-        frame.pack(fill="x", padx=5, pady=2)
+        frame.pack(fill="x", padx=5, pady=2, before=before)
+        self.book_widgets[book.id] = frame
 
         title_label = ctk.CTkLabel(
             frame,
             text=f"{book.title}\nАвтор: {book.author}"
+                 + (f"\nСтраниц: {book.page_count}" if book.page_count else "")
         )
         title_label.pack(side="left", padx=5)
 
         open_button = ctk.CTkButton(
             frame,
             text="Открыть",
-            command=lambda: self.open_book(book)
+            command=lambda: self.open_book(self.books.get(book.id, book))
         )
         open_button.pack(side="right", padx=5)
 
-    def open_book(self, book):
-        """Открытие книги для чтения"""
+    def open_book(self, book, page_number=None):
+        """
+        Открытие книги для чтения
+
+        Args:
+            book: Книга
+            page_number: Открыть на этой странице (по умолчанию - на текущей)
+        """
+        if self.current_book and self.current_book.id != book.id:
+            # Позиция в предыдущей книге записывается сразу при переключении
+            self.executor.submit_db(self.library_service.flush_positions, self.current_book.id)
+            self.hide_find_results()
         self.current_book = book
-        self.load_page(book.current_page)
+        self.load_page(book.current_page if page_number is None else page_number)
         self.refresh_notes()
 
+    def find_in_book(self):
+        """
+        Поиск текста в открытой книге. Страницы просматриваются в фоне,
+        совпадения показываются по мере нахождения; новый запрос
+        останавливает предыдущий поиск
+        """
+        key = f"find:{id(self)}"
+        text = self.find_entry.get().strip()
+        if not self.current_book or not text:
+            self.executor.cancel(key)
+            self.hide_find_results()
+            return
+
+        for widget in self.find_results.winfo_children():
+            widget.destroy()
+        self.find_count = 0
+        self.find_label.configure(text="Поиск...")
+        self.find_label.pack(fill="x", pady=(5, 0), before=self.text_area)
+        self.find_results.pack(fill="x", pady=5, before=self.text_area)
+
+        book = self.current_book
+        self.executor.stream(
+            self.library_service.find_in_book,
+            book.id,
+            text,
+            item_callback=lambda matches: self.show_page_matches(book, matches),
+            callback=lambda pages: self.find_finished(book),
+            error_callback=lambda error: print(f"Ошибка при поиске в книге: {error}"),
+            key=key
+        )
+
+    def show_page_matches(self, book, matches):
+        """Отображение совпадений на очередной просмотренной странице"""
+        for snippet in matches.snippets:
+            if self.find_count >= Config.BOOK_SEARCH_LIMIT:
+                # Достаточно результатов: остальные страницы не просматриваются
+                self.executor.cancel(f"find:{id(self)}")
+                self.find_label.configure(
+                    text=f"Показаны первые {self.find_count} совпадений"
+                )
+                return
+            self.find_count += 1
+            button = ctk.CTkButton(
+                self.find_results,
+                text=f"Стр. {matches.page_number}: {snippet}",
+                anchor="w",
+                command=lambda page=matches.page_number: self.open_book(book, page)
+            )
+            button.pack(fill="x", padx=5, pady=2)
+
+        self.find_label.configure(
+            text=f"Просмотрено {matches.page_number + 1} из {matches.page_count} стр., "
+                 f"найдено: {self.find_count}"
+        )
+
+    def find_finished(self, book):
+        """Завершение поиска в книге"""
+        if book is self.current_book:
+            self.find_label.configure(text=f"Поиск завершен, найдено: {self.find_count}")
+
+    def hide_find_results(self):
+        """Скрытие результатов поиска в книге"""
+        self.executor.cancel(f"find:{id(self)}")
+        self.find_label.pack_forget()
+        self.find_results.pack_forget()
+
+    def search_books(self):
+        """Поиск по содержимому книг (запрос выполняется в фоне)"""
+        query = self.search_entry.get().strip()
+        if not query:
+            self.results_frame.pack_forget()
+            return
+
+        current_user = self.controller.auth_service.get_current_user()
+        if not current_user:
+            return
+
+        self.executor.run(
+            self.library_service.search,
+            current_user.id,
+            query,
+            callback=self.show_search_results,
+            key=f"search:{id(self)}"
+        )
+
+    def show_search_results(self, hits):
+        """Отображение результатов поиска"""
+        for widget in self.results_frame.winfo_children():
+            widget.destroy()
+
+        if not hits:
+            ctk.CTkLabel(self.results_frame, text="Ничего не найдено").pack(pady=5)
+
+        for hit in hits:
+            button = ctk.CTkButton(
+                self.results_frame,
+                text=f"{hit.book.title}, стр. {hit.page_number}\n{hit.snippet}",
+                anchor="w",
+                command=lambda hit=hit: self.open_book(hit.book, hit.page_number)
+            )
+            button.pack(fill="x", padx=5, pady=2)
+
+        self.results_frame.pack(fill="x", pady=5, before=self.books_frame)
+
     def load_page(self, page_number: int):
-        """Загрузка страницы книги"""
+        """
+        Загрузка страницы книги. Текст извлекается в пуле потоков,
+        запрос предыдущей страницы при быстром перелистывании отменяется
+        """
         if not self.current_book:
             print("Нет открытой книги")
             return
 
-        try:
-            # Проверка валидности номера страницы
-            if page_number < 0:
-                print("Номер страницы не может быть отрицательным")
-                return
+        # Проверка валидности номера страницы
+        if page_number < 0:
+            print("Номер страницы не может быть отрицательным")
+            return
 
-            content = self.library_service.get_page_content(
-                self.current_book.id,
-                page_number
-            )
+        book = self.current_book
+        self.executor.run(
+            self.library_service.get_page_content,
+            book.id,
+            page_number,
+            callback=lambda content: self.show_page(book, page_number, content),
+            error_callback=self.show_page_error,
+            key=f"page:{id(self)}",
+            db=False
+        )
 
-            if content is None:
-                print("Не удалось загрузить содержимое страницы")
-                return
+    def show_page(self, book, page_number: int, content: str):
+        """Отображение загруженной страницы и сохранение позиции чтения"""
+        if book is not self.current_book:
+            return
 
-            self.text_area.delete("1.0", "end")
-            self.text_area.insert("1.0", content)
+        if content is None:
+            print("Не удалось загрузить содержимое страницы")
+            return
 
-            self.library_service.update_current_page(
-                self.current_book.id,
-                page_number
-            )
-        except Exception as e:
-            print(f"Ошибка при загрузке страницы: {e}")
-            self.text_area.delete("1.0", "end")
-            self.text_area.insert("1.0", "Ошибка при загрузке страницы")
+        self.text_area.delete("1.0", "end")
+        self.text_area.insert("1.0", content)
+
+        book.current_page = page_number
+        self.library_service.update_current_page(book.id, page_number)
+
+    def show_page_error(self, error: Exception):
+        """Отображение ошибки загрузки страницы"""
+        print(f"Ошибка при загрузке страницы: {error}")
+        self.text_area.delete("1.0", "end")
+        self.text_area.insert("1.0", "Ошибка при загрузке страницы")
 
     def go_to_page(self):
         """Переход на указанную страницу"""
@@ -205,6 +470,7 @@ class LibraryFrame(ctk.CTkFrame):
             return
 
         current_page = self.current_book.current_page
+        # Заметка появится в списке по событию note_created
         self.library_service.add_note(
             self.current_book.id,
             current_page,
@@ -212,17 +478,19 @@ class LibraryFrame(ctk.CTkFrame):
         )
 
         self.note_entry.delete(0, "end")
-        self.refresh_notes()
 
     def refresh_notes(self):
         """Обновление списка заметок"""
         if not self.current_book:
             return
 
-        self.notes_list.delete("1.0", "end")
-        notes = self.library_service.get_book_notes(self.current_book.id)
+        self.notes = self.library_service.get_book_notes(self.current_book.id)
+        self.show_notes()
 
-        for note in notes:
+    def show_notes(self):
+        """Отображение заметок открытой книги"""
+        self.notes_list.delete("1.0", "end")
+        for note in self.notes:
             self.notes_list.insert(
                 "end",
                 f"Страница {note.page_number}:\n{note.content}\n\n"
@@ -232,6 +500,8 @@ class LibraryFrame(ctk.CTkFrame):
         """Обновление списка книг"""
         for widget in self.books_frame.winfo_children():
             widget.destroy()
+        self.books = {}
+        self.book_widgets = {}
 
         current_user = self.controller.auth_service.get_current_user()
         if not current_user:
@@ -239,4 +509,64 @@ class LibraryFrame(ctk.CTkFrame):
 
         books = self.library_service.get_user_books(current_user.id)
         for book in books:
-            self.create_book_widget(book)
\ No newline at end of file
+            self.books[book.id] = book
+            self.create_book_widget(book)
+
+        self.index_library()
+
+    def index_library(self):
+        """Индексация текста книг пользователя, которых еще нет в поисковом индексе"""
+        current_user = self.controller.auth_service.get_current_user()
+        if not current_user:
+            return
+
+        # Индексация идет в фоне, более ранний незавершенный запуск отменяется
+        self.executor.run(
+            self.library_service.index_library,
+            current_user.id,
+            key=f"index:{id(self)}",
+            db=False
+        )
+
+    def on_change(self, event):
+        """
+        Обработка изменения книги или заметки (реализация интерфейса ChangeObserver)
+        """
+        if event.entity == "note":
+            self.apply_note_change(event)
+            return
+
+        current_user = self.controller.auth_service.get_current_user()
+        if not current_user or event.owner_id != current_user.id:
+            return
+
+        if event.kind is ChangeKind.DELETED:
+            self.books.pop(event.id, None)
+            widget = self.book_widgets.pop(event.id, None)
+            if widget is not None:
+                widget.destroy()
+            return
+
+        if event.item is None:
+            # Например, сохранение текущей страницы: строка книги не меняется
+            if event.id in self.books:
+                self.books[event.id] = replace(self.books[event.id], **event.changes)
+            return
+
+        # Новые книги идут в конце списка, измененные заменяются на месте
+        self.books[event.id] = event.item
+        old_widget = self.book_widgets.pop(event.id, None)
+        self.create_book_widget(event.item, before=old_widget)
+        if old_widget is not None:
+            old_widget.destroy()
+
+    def apply_note_change(self, event):
+        """Изменение списка заметок открытой книги без повторной выборки"""
+        if not self.current_book or event.owner_id != self.current_book.id:
+            return
+
+        self.notes = [note for note in self.notes if note.id != event.id]
+        if event.kind is not ChangeKind.DELETED and event.item is not None:
+            self.notes.append(event.item)
+            self.notes.sort(key=lambda note: (note.page_number, note.id))
+        self.show_notes()
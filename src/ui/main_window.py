@@ -5,6 +5,10 @@ from src.ui.habits_frame import HabitsFrame
 from src.ui.library_frame import LibraryFrame
 from src.ui.calendar_frame import CalendarFrame
 from src.services.auth_service import AuthService
+from src.services.executor import BackgroundExecutor
+from src.services.reminder_scheduler import ReminderScheduler
+from src.patterns.observer import EventBus
+from src.db.database import Database
 from src.config import Config
 
 class MainWindow(ctk.CTk):
@@ -19,6 +23,17 @@ class MainWindow(ctk.CTk):
         print("Создание сервиса аутентификации...")
         self.auth_service = AuthService()
 
+        # Доставка результатов фоновых запросов в главный цикл
+        self.executor = BackgroundExecutor()
+        self.executor.attach(self)
+
+        # События изменений сущностей доставляются фреймам в потоке интерфейса
+        EventBus().dispatch = self.executor.post
+
+        # Напоминания о привычках: планировщик спит до ближайшего напоминания
+        self.reminders = ReminderScheduler()
+        self.reminders.start()
+
         # Настройка окна
         self.title("Life Manager")
         self.geometry(f"{Config.WINDOW_WIDTH}x{Config.WINDOW_HEIGHT}")
@@ -68,8 +83,33 @@ class MainWindow(ctk.CTk):
         print("Отображение начального фрейма...")
         # Показываем соответствующий фрейм
         self._show_initial_frame()
+
+        # Периодическое обслуживание базы данных
+        self.db = Database()
+        self.after(Config.DB_MAINTENANCE_INTERVAL * 1000, self._run_db_maintenance)
+
+        # Отложенные записи сохраняются до закрытия окна
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
         print("Инициализация MainWindow завершена")
 
+    def _on_close(self):
+        """Закрытие окна: запись отложенных изменений и выход из главного цикла"""
+        try:
+            library = self.frames.get("library")
+            if library:
+                library.library_service.flush_positions()
+                library.library_service.close_book()
+        finally:
+            self.destroy()
+
+    def _run_db_maintenance(self):
+        """
+        Обслуживание базы данных по таймеру (PRAGMA optimize, контрольная точка WAL).
+        Выполняется в потоке БД, таймер перезапускается в потоке Tk
+        """
+        self.executor.submit_db(self.db.maintenance)
+        self.after(Config.DB_MAINTENANCE_INTERVAL * 1000, self._run_db_maintenance)
+
     def _setup_theme(self):
         """Настройка темы приложения"""
         # Создаем контейнер для логотипа и кнопки темы
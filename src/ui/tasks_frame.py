@@ -1,25 +1,39 @@
 import customtkinter as ctk
 from src.services.task_service import TaskService
 from src.services.ai_service import AIService
+from src.services.executor import BackgroundExecutor
+from src.db.models import TaskStatus
+from src.patterns.observer import ChangeKind, ChangeObserver, EventBus
 from src.config import Config
 
-class TasksFrame(ctk.CTkFrame):
+class TasksFrame(ctk.CTkFrame, ChangeObserver):
     """
     Фрейм для управления задачами
+
+    Список загружается целиком только при смене фильтров и сортировки,
+    изменения задач приходят событиями EventBus и меняют только свои строки
     """
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
         self.task_service = TaskService()
         self.ai_service = AIService()
+        self.executor = BackgroundExecutor()
 
         # Параметры фильтрации и сортировки
         self.current_status = None
         self.current_sort_by = "priority"
         self.current_sort_order = "desc"
 
-        self.create_widgets()
+        # Показанные задачи в порядке списка и их строки по ID задачи
         self.tasks = []
+        self.task_widgets = {}
+        self.stats_pending = False
+
+        self.create_widgets()
+
+        # Подписываемся на изменения задач
+        EventBus().attach(self, topics=("task",))
 
     def create_widgets(self):
         """Создание элементов интерфейса"""
@@ -117,7 +131,8 @@ class TasksFrame(ctk.CTkFrame):
         filter_frame = ctk.CTkFrame(self)
         filter_frame.pack(fill="x", padx=10, pady=5)
 
-        statuses = [None, "new", "in_progress", "completed", "cancelled"]
+        statuses = [None, TaskStatus.NEW, TaskStatus.IN_PROGRESS,
+                    TaskStatus.COMPLETED, TaskStatus.CANCELLED]
         status_names = ["Все", "Новые", "В работе", "Завершённые", "Отменённые"]
 
         for status, name in zip(statuses, status_names):
@@ -139,8 +154,15 @@ class TasksFrame(ctk.CTkFrame):
         if not current_user:
             return
 
-        stats = self.task_service.get_task_statistics(current_user.id)
+        self.executor.run(
+            self.task_service.get_task_statistics,
+            current_user.id,
+            callback=self.show_stats,
+            key=f"task_stats:{id(self)}"
+        )
 
+    def show_stats(self, stats: dict):
+        """Отображение статистики"""
         self.stats_labels["total"].configure(text=f"Всего: {stats['total']}")
         self.stats_labels["completed"].configure(text=f"Завершено: {stats['completed']}")
         self.stats_labels["in_progress"].configure(text=f"В работе: {stats['in_progress']}")
@@ -160,7 +182,8 @@ class TasksFrame(ctk.CTkFrame):
         if not current_user:
             return
 
-        task = self.task_service.create_task(
+        # Строка задачи появится по событию task_created
+        self.task_service.create_task(
             user_id=current_user.id,
             title=title,
             description=description,
@@ -169,17 +192,23 @@ class TasksFrame(ctk.CTkFrame):
 
         self.task_entry.delete(0, "end")
         self.description_entry.delete(0, "end")
-        self.refresh_tasks()
 
-    def create_task_widget(self, task):
-        """Создание виджета для задачи"""
+    def create_task_widget(self, task, before=None):
+        """
+        Создание виджета для задачи
+
+        Args:
+            task: Задача
+            before: Строка, перед которой вставляется виджет (по умолчанию - в конец)
+        """
         frame = ctk.CTkFrame(self.tasks_frame)
-        frame.pack(fill="x", padx=5, pady=2)
+        frame.pack(fill="x", padx=5, pady=2, before=before)
+        self.task_widgets[task.id] = frame
 
         # Статус
         status_btn = ctk.CTkButton(
             frame,
-            text="✓" if task.status == "completed" else "○",
+            text="✓" if task.status == TaskStatus.COMPLETED else "○",
             width=30,
             command=lambda: self.toggle_task_status(task)
         )
@@ -258,14 +287,15 @@ class TasksFrame(ctk.CTkFrame):
         ).pack(pady=10)
 
     def refresh_tasks(self):
-        """Обновление списка задач"""
-        # Очистка текущего списка
-        for widget in self.tasks_frame.winfo_children():
-            widget.destroy()
-
+        """
+        Обновление списка задач. Выборка выполняется в потоке БД,
+        более ранний незавершенный запрос (например, при наборе поиска) отменяется
+        """
         # Получение текущего пользователя
         current_user = self.controller.auth_service.get_current_user()
         if not current_user:
+            self.executor.cancel(f"tasks:{id(self)}")
+            self.show_tasks([])
             return
 
         # Получение параметров фильтрации и сортировки
@@ -273,38 +303,102 @@ class TasksFrame(ctk.CTkFrame):
         sort_by = self.sort_var.get() if hasattr(self, 'sort_var') else "priority"
         sort_order = self.order_var.get() if hasattr(self, 'order_var') else "desc"
 
-        # Получение и отображение задач
-        tasks = self.task_service.get_user_tasks(
+        # Получение задач в фоне и отображение по готовности
+        self.executor.run(
+            self.task_service.get_user_tasks,
             current_user.id,
-            status=self.current_status,
-            search_query=search_query,
-            sort_by=sort_by,
-            sort_order=sort_order
+            self.current_status,
+            search_query,
+            sort_by,
+            sort_order,
+            callback=self.show_tasks,
+            key=f"tasks:{id(self)}"
         )
 
-        for task in tasks:
+        # Обновление статистики
+        self.update_stats()
+
+    def show_tasks(self, tasks):
+        """Отображение списка задач"""
+        # Очистка текущего списка
+        for widget in self.tasks_frame.winfo_children():
+            widget.destroy()
+        self.task_widgets = {}
+        self.tasks = list(tasks)
+
+        for task in self.tasks:
             self.create_task_widget(task)
 
-        # Обновление статистики
+    def on_change(self, event):
+        """
+        Обработка изменения задачи (реализация интерфейса ChangeObserver):
+        строка задачи удаляется, заменяется или вставляется на свое место
+        по текущим фильтрам и сортировке без повторной выборки списка
+        """
+        current_user = self.controller.auth_service.get_current_user()
+        if not current_user or event.owner_id != current_user.id:
+            return
+
+        # События создания и изменения задач содержат задачу целиком
+        index = next((i for i, task in enumerate(self.tasks) if task.id == event.id), None)
+        task = None if event.kind is ChangeKind.DELETED else event.item
+
+        if index is not None:
+            del self.tasks[index]
+            self.task_widgets.pop(event.id).destroy()
+        if task is not None and self.matches_filters(task):
+            self.insert_task(task)
+        self.schedule_stats_update()
+
+    def matches_filters(self, task) -> bool:
+        """Подходит ли задача под текущие фильтр по статусу и поиск"""
+        if self.current_status is not None and task.status != TaskStatus.parse(self.current_status):
+            return False
+        search_query = self.search_entry.get()
+        return not search_query or search_query.lower() in task.title.lower()
+
+    def insert_task(self, task):
+        """Вставка строки задачи на место по текущей сортировке"""
+        sort_by = self.sort_var.get()
+        descending = self.order_var.get() == "desc"
+        key = (getattr(task, sort_by), task.id)
+
+        position = len(self.tasks)
+        for i, other in enumerate(self.tasks):
+            other_key = (getattr(other, sort_by), other.id)
+            if (other_key < key) if descending else (other_key > key):
+                position = i
+                break
+
+        before = self.task_widgets[self.tasks[position].id] if position < len(self.tasks) else None
+        self.tasks.insert(position, task)
+        self.create_task_widget(task, before)
+
+    def schedule_stats_update(self):
+        """Обновление статистики один раз после пачки событий"""
+        if not self.stats_pending:
+            self.stats_pending = True
+            self.after_idle(self.flush_stats_update)
+
+    def flush_stats_update(self):
+        """Запуск отложенного обновления статистики"""
+        self.stats_pending = False
         self.update_stats()
 
     def toggle_task_status(self, task):
-        """Переключение статуса задачи"""
-        new_status = "completed" if task.status != "completed" else "new"
+        """Переключение статуса задачи (строка обновится по событию task_updated)"""
+        new_status = TaskStatus.COMPLETED if task.status != TaskStatus.COMPLETED else TaskStatus.NEW
         self.task_service.update_task_status(task.id, new_status)
-        self.refresh_tasks()
 
     def change_priority(self, task, delta):
         """Изменение приоритета задачи"""
         new_priority = task.priority + delta
         if 0 <= new_priority <= 3:
             self.task_service.update_task_priority(task.id, new_priority)
-            self.refresh_tasks()
 
     def delete_task(self, task):
         """Удаление задачи"""
         self.task_service.delete_task(task.id)
-        self.refresh_tasks()
 
     def apply_filters(self):
         """Применение фильтров"""
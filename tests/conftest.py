@@ -0,0 +1,32 @@
+import sqlite3
+import pytest
+from src.config import Config
+from src.db.database import Database
+
+
+@pytest.fixture(autouse=True)
+def db(tmp_path, monkeypatch):
+    """Отдельный файл базы данных на каждый тест"""
+    monkeypatch.setattr(Config, "DB_PATH", str(tmp_path / "test.db"))
+    database = Database()
+    assert database.initialize()
+    yield database
+    Database.close_all()
+
+
+@pytest.fixture
+def user_id(db) -> int:
+    """ID тестового пользователя"""
+    with db.transaction() as cursor:
+        cursor.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)",
+                       ("user", "hash"))
+        return cursor.lastrowid
+
+
+
+@pytest.fixture
+def memory_conn():
+    """Соединение с пустой базой в памяти (без автоматических транзакций)"""
+    conn = sqlite3.connect(":memory:", isolation_level=None)
+    yield conn
+    conn.close()
@@ -0,0 +1,17 @@
+import pytest
+from src.services.book_indexer import FTS_MAX_PAGE, build_match_query, fts_rowid_range
+
+
+@pytest.mark.parametrize("text, query", [
+    ("война и мир", '"война" "и" "мир"*'),
+    ('NEAR("a" OR b)', '"NEAR" "a" "OR" "b"*'),
+    ("  ...  ", ""),
+])
+def test_build_match_query(text, query):
+    assert build_match_query(text) == query
+
+
+def test_rowid_ranges_of_books_do_not_overlap():
+    first, last = fts_rowid_range(7)
+    assert last - first == FTS_MAX_PAGE
+    assert fts_rowid_range(8)[0] == last + 1
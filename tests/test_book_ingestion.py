@@ -0,0 +1,37 @@
+import time
+import pytest
+from src.config import Config
+from src.services import book_ingestion
+from src.services.book_ingestion import BookIngestion
+
+
+def fake_inspect(path: str) -> str:
+    """Разбор, длящийся столько секунд, сколько указано в пути"""
+    time.sleep(float(path))
+    return path
+
+
+@pytest.fixture
+def ingestion(monkeypatch):
+    monkeypatch.setattr(book_ingestion, "inspect_pdf", fake_inspect)
+    monkeypatch.setattr(Config, "PDF_IMPORT_TIMEOUT", 0.5)
+    monkeypatch.setattr(Config, "PDF_IMPORT_WINDOW", 4)
+    monkeypatch.setattr(Config, "PROCESS_POOL_WORKERS", 4)
+    ingestion = BookIngestion(None)
+    ingestion.executor.restart_processes()
+    yield ingestion
+    ingestion.executor.restart_processes()
+
+
+def test_inspect_many_times_out_each_file(ingestion):
+    """Медленные файлы не задерживают остальные, время ожидания считается для каждого файла"""
+    paths = ["3", "3", "0.1", "0.1", "0.2", "0"]
+    progress = []
+    started = time.monotonic()
+    results = dict(ingestion.inspect_many(iter(paths), lambda done, found: progress.append(done)))
+    elapsed = time.monotonic() - started
+
+    assert results == {"3": None, "0.1": "0.1", "0.2": "0.2", "0": "0"}
+    assert progress == list(range(1, len(paths) + 1))
+    # Два зависших файла дают одно ожидание, а не по одному на каждый
+    assert elapsed < 2
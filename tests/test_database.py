@@ -0,0 +1,91 @@
+import sqlite3
+import threading
+import pytest
+from src.db.database import ConnectionManager, Database
+
+
+def count_users(db: Database) -> int:
+    with db.session() as cursor:
+        return cursor.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+
+def test_nested_transaction_of_another_instance_joins_outer(db):
+    """Вложенная транзакция другого экземпляра Database выполняется в рамках внешней"""
+    other = Database()
+    with db.transaction() as cursor:
+        cursor.execute("INSERT INTO users (username, password_hash) VALUES ('a', 'p')")
+        with other.transaction() as inner:
+            inner.execute("INSERT INTO users (username, password_hash) VALUES ('b', 'p')")
+        # Выход из вложенной области не фиксирует и не откатывает внешнюю транзакцию
+        assert db.conn.in_transaction
+        with other.session() as reader:
+            reader.execute("SELECT 1")
+        assert db.conn.in_transaction
+    assert count_users(Database()) == 2
+
+
+def test_exception_rolls_back_outer_transaction(db):
+    """Исключение во вложенной области откатывает всю внешнюю транзакцию"""
+    other = Database()
+    with pytest.raises(RuntimeError):
+        with db.transaction() as cursor:
+            cursor.execute("INSERT INTO users (username, password_hash) VALUES ('a', 'p')")
+            with other.transaction() as inner:
+                inner.execute("INSERT INTO users (username, password_hash) VALUES ('b', 'p')")
+                raise RuntimeError("сбой")
+    assert count_users(db) == 0
+
+
+def test_uncommitted_changes_rolled_back_on_release(db):
+    """Незавершенная транзакция откатывается при возврате соединения в пул"""
+    assert db.connect()
+    db.begin_transaction()
+    db.execute("INSERT INTO users (username, password_hash) VALUES ('a', 'p')")
+    db.close()
+    assert db.conn is None
+    assert count_users(db) == 0
+
+
+
+def test_connection_reused_within_thread(db):
+    """Поток получает одно и то же соединение, другие потоки - свои"""
+    manager = ConnectionManager.for_path(db.db_path)
+    with db.session():
+        first = db.conn
+    other_instance = Database()
+    with other_instance.session():
+        assert other_instance.conn is first
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(manager.acquire()))
+    thread.start()
+    thread.join()
+    assert other[0] is not first
+    manager.release(other[0])
+
+
+def test_close_all_replaces_connections(db):
+    """После close_all() поток получает новое соединение"""
+    with db.session():
+        first = db.conn
+    Database.close_all()
+    with db.session() as cursor:
+        assert db.conn is not first
+        assert cursor.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0
+
+
+def test_insert_many_returns_consecutive_ids(db):
+    ids = db.insert_many("INSERT INTO users (username, password_hash) VALUES (?, ?)",
+                         [(f"user{i}", "p") for i in range(5)])
+    with db.session() as cursor:
+        rows = cursor.execute("SELECT id, username FROM users ORDER BY id").fetchall()
+    assert ids == [row[0] for row in rows]
+    assert [row[1] for row in rows] == [f"user{i}" for i in range(5)]
+
+
+def test_insert_many_is_one_transaction(db):
+    """Ошибка в любой строке пакета отменяет всю вставку"""
+    with pytest.raises(sqlite3.IntegrityError):
+        db.insert_many("INSERT INTO users (username, password_hash) VALUES (?, ?)",
+                       [("same", "p"), ("other", "p"), ("same", "p")])
+    assert count_users(db) == 0
@@ -0,0 +1,81 @@
+import random
+from datetime import date, timedelta
+import pytest
+from src.config import Config
+from src.db.mappers import to_day
+from src.db.models import HabitFrequency
+from src.services.habit_service import HabitService
+from src.services.habit_stats import period_of
+
+# Средняя длина периода в днях, как в HabitStats
+PERIOD_DAYS = {
+    HabitFrequency.DAILY: 1,
+    HabitFrequency.WEEKLY: 7,
+    HabitFrequency.MONTHLY: 365.25 / 12
+}
+
+
+def brute_force(frequency: HabitFrequency, days: set, today: date):
+    """Сводка по всем отметкам заново: (текущая серия, рекорд, последний день, всего, доля)"""
+    periods = sorted({period_of(frequency, to_day(day)) for day in days})
+    longest = current = 0
+    previous = None
+    for period in periods:
+        current = current + 1 if previous == period - 1 else 1
+        longest = max(longest, current)
+        previous = period
+    if not periods or periods[-1] < period_of(frequency, to_day(today)) - 1:
+        current = 0
+
+    window = Config.HABIT_RATE_WINDOW
+    recent = sum(1 for day in days if 0 <= (today - day).days < window)
+    rate = min(100, recent / (window / PERIOD_DAYS[frequency]) * 100)
+    return current, longest, max(days, default=None), len(days), rate
+
+
+@pytest.mark.parametrize("frequency", list(HabitFrequency))
+def test_incremental_summary_matches_brute_force(user_id, frequency):
+    """Сводка, обновляемая при каждой отметке и ее отмене, совпадает с полным пересчетом"""
+    service = HabitService()
+    habit = service.create_habit(user_id, "Привычка", frequency)
+    today = date.today()
+    span = 120 if frequency == HabitFrequency.DAILY else 400
+    rng = random.Random(frequency.value)
+    days = set()
+
+    for _ in range(400):
+        day = today - timedelta(days=rng.randint(0, span))
+        if rng.random() < 0.6:
+            assert service.check_in(habit.id, day) == (day not in days)
+            days.add(day)
+        else:
+            assert service.undo_check_in(habit.id, day) == (day in days)
+            days.discard(day)
+
+        summary = service.get_habit_summary(habit.id)
+        current, longest, last, total, rate = brute_force(frequency, days, today)
+        assert (summary.current_streak, summary.longest_streak,
+                summary.last_checkin, summary.total_checkins) == (current, longest, last, total)
+        assert summary.completion_rate == pytest.approx(rate)
+
+
+def test_frequency_change_recomputes_summary(user_id):
+    service = HabitService()
+    habit = service.create_habit(user_id, "Привычка", HabitFrequency.WEEKLY)
+    today = date.today()
+    days = {today - timedelta(days=offset) for offset in (0, 1, 2, 5, 9)}
+    for day in days:
+        service.check_in(habit.id, day)
+
+    habit.frequency = HabitFrequency.DAILY
+    assert service.update_habit(habit)
+    summary = service.get_habit_summary(habit.id)
+    expected = brute_force(HabitFrequency.DAILY, days, today)
+    assert (summary.current_streak, summary.longest_streak) == expected[:2] == (3, 3)
+
+
+def test_check_in_in_future_rejected(user_id):
+    service = HabitService()
+    habit = service.create_habit(user_id, "Привычка", HabitFrequency.DAILY)
+    with pytest.raises(ValueError):
+        service.check_in(habit.id, date.today() + timedelta(days=1))
@@ -0,0 +1,41 @@
+import atexit
+import pytest
+from src.config import Config
+from src.db.database import Database
+from src.services.library_service import LibraryService
+
+
+@pytest.fixture
+def book_id(db, user_id) -> int:
+    with db.transaction() as cursor:
+        cursor.execute("INSERT INTO books (user_id, title, file_path) VALUES (?, 'Книга', 'book.pdf')",
+                       (user_id,))
+        return cursor.lastrowid
+
+
+def test_positions_shared_between_services(book_id):
+    """Еще не записанная позиция видна всем экземплярам сервиса"""
+    frame, indexer = LibraryService(), LibraryService()
+    assert frame.positions is indexer.positions
+    frame.update_current_page(book_id, 42)
+    assert indexer.get_book_by_id(book_id).current_page == 42
+
+    assert indexer.flush_positions() == 1
+    with Database().session() as cursor:
+        stored = cursor.execute("SELECT current_page FROM books WHERE id = ?", (book_id,)).fetchone()
+    assert stored == (42,)
+
+
+def test_positions_buffer_per_database(tmp_path, monkeypatch):
+    first = LibraryService().positions
+    monkeypatch.setattr(Config, "DB_PATH", str(tmp_path / "other.db"))
+    assert Database().initialize()
+    assert LibraryService().positions is not first
+
+
+def test_closed_buffer_leaves_atexit(monkeypatch):
+    unregistered = []
+    monkeypatch.setattr(atexit, "unregister", unregistered.append)
+    positions = LibraryService().positions
+    positions.close()
+    assert unregistered == [positions.close]
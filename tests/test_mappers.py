@@ -0,0 +1,43 @@
+import time
+from datetime import datetime, timedelta
+import pytest
+from src.db.mappers import from_timestamp, to_timestamp
+from src.services.task_service import TaskService
+
+
+@pytest.fixture(params=["UTC", "America/New_York", "Asia/Kolkata"])
+def timezone(request, monkeypatch):
+    """Локальный часовой пояс процесса на время теста"""
+    if not hasattr(time, "tzset"):
+        pytest.skip("time.tzset недоступен на этой платформе")
+    monkeypatch.setenv("TZ", request.param)
+    time.tzset()
+    yield request.param
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_timestamp_round_trip(timezone):
+    """Наивное время переводится в секунды и обратно без сдвига на часовой пояс"""
+    for moment in (datetime(1970, 1, 1), datetime(2026, 3, 8, 2, 30), datetime(2026, 11, 1, 1, 30, 15)):
+        assert from_timestamp(to_timestamp(moment)) == moment
+    assert to_timestamp(datetime(1970, 1, 2)) == 86400
+
+
+def test_legacy_string_timestamps_decoded(timezone):
+    assert from_timestamp("2024-05-01 12:34:56") == datetime(2024, 5, 1, 12, 34, 56)
+    assert from_timestamp(None) is None
+
+
+def test_created_at_stored_and_read_back(timezone, user_id):
+    """created_at задачи и выборка по диапазону не зависят от часового пояса"""
+    service = TaskService()
+    task = service.create_task(user_id, "Задача")
+    stored = service.repository.get_by_id(task.id)
+    assert stored.created_at == task.created_at.replace(microsecond=0)
+
+    second = timedelta(seconds=1)
+    found = service.get_tasks_created_between(user_id, stored.created_at, stored.created_at + second)
+    assert [item.id for item in found] == [task.id]
+    assert service.get_tasks_created_between(user_id, stored.created_at + second,
+                                             stored.created_at + timedelta(days=1)) == []
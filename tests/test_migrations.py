@@ -0,0 +1,103 @@
+import sqlite3
+import pytest
+from src.db import migrations
+from src.db.migrations import LATEST_VERSION, MIGRATIONS, apply_migrations, get_schema_version
+from src.services.book_indexer import fts_rowid_range
+
+
+@pytest.fixture
+def partial_migrations(monkeypatch):
+    """Применение миграций только до указанной версии (включительно)"""
+    def apply_until(conn, version: int):
+        monkeypatch.setattr(migrations, "MIGRATIONS",
+                            [migration for migration in MIGRATIONS if migration.version <= version])
+        apply_migrations(conn)
+        monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS)
+    return apply_until
+
+
+def test_versions_are_consecutive():
+    assert [migration.version for migration in MIGRATIONS] == list(range(1, LATEST_VERSION + 1))
+
+
+def test_fresh_database_reaches_latest_version(memory_conn):
+    assert apply_migrations(memory_conn) == LATEST_VERSION
+    assert get_schema_version(memory_conn) == LATEST_VERSION
+    # Повторный запуск ничего не применяет
+    assert apply_migrations(memory_conn) == LATEST_VERSION
+
+
+@pytest.mark.parametrize("version", range(1, LATEST_VERSION))
+def test_upgrade_from_each_version(memory_conn, partial_migrations, version):
+    """Данные, созданные на любой версии схемы, переживают обновление до последней"""
+    partial_migrations(memory_conn, version)
+    memory_conn.execute("INSERT INTO users (username, password_hash) VALUES ('u', 'p')")
+    # До миграции 6 статус и частота хранятся названиями, после - кодами
+    status, frequency = ("completed", "weekly") if version < 6 else (2, 1)
+    memory_conn.execute("INSERT INTO tasks (user_id, title, status) VALUES (1, 't', ?)", (status,))
+    memory_conn.execute("INSERT INTO habits (user_id, name, frequency) VALUES (1, 'h', ?)", (frequency,))
+
+    assert apply_migrations(memory_conn) == LATEST_VERSION
+    assert memory_conn.execute("SELECT title, status FROM tasks").fetchall() == [("t", 2)]
+    assert memory_conn.execute("SELECT name, frequency FROM habits").fetchall() == [("h", 1)]
+    assert memory_conn.execute("SELECT status, count FROM task_counters").fetchall() == [(2, 1)]
+
+
+
+def test_failed_migration_rolled_back(memory_conn, monkeypatch):
+    """Прерванная миграция откатывается целиком, и версия схемы не меняется"""
+    broken = migrations.Migration(version=LATEST_VERSION + 1, description="Сбой",
+                                  statements=("CREATE TABLE extra (id INTEGER)", "SELECT * FROM missing"))
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS + [broken])
+    with pytest.raises(sqlite3.OperationalError):
+        apply_migrations(memory_conn)
+    assert get_schema_version(memory_conn) == LATEST_VERSION
+    assert memory_conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE name = 'extra'").fetchone()[0] == 0
+
+
+def test_secondary_indexes_created(memory_conn):
+    apply_migrations(memory_conn)
+    indexes = {row[0] for row in memory_conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")}
+    assert {"idx_tasks_user_created_at", "idx_tasks_user_status_priority",
+            "idx_habits_user_id"} <= indexes
+
+
+def test_v6_keeps_autoincrement_counter_of_empty_tables(memory_conn, partial_migrations):
+    """Пересборка таблиц в миграции 6 не сбрасывает счетчик ID, даже если строк нет"""
+    partial_migrations(memory_conn, 5)
+    memory_conn.execute("INSERT INTO users (username, password_hash) VALUES ('u', 'p')")
+    for _ in range(3):
+        memory_conn.execute("INSERT INTO tasks (user_id, title) VALUES (1, 't')")
+        memory_conn.execute("INSERT INTO habits (user_id, name, frequency) VALUES (1, 'h', 'daily')")
+    memory_conn.execute("DELETE FROM tasks")
+    memory_conn.execute("DELETE FROM habits")
+
+    apply_migrations(memory_conn)
+    task_id = memory_conn.execute("INSERT INTO tasks (user_id, title) VALUES (1, 't')").lastrowid
+    habit_id = memory_conn.execute(
+        "INSERT INTO habits (user_id, name, frequency) VALUES (1, 'h', 0)").lastrowid
+    assert (task_id, habit_id) == (4, 4)
+
+
+
+def test_v11_renumbers_fts_rows_and_deletes_them_with_book(memory_conn, partial_migrations):
+    partial_migrations(memory_conn, 10)
+    memory_conn.execute("INSERT INTO users (username, password_hash) VALUES ('u', 'p')")
+    for book_id in (1, 2):
+        memory_conn.execute("INSERT INTO books (user_id, title) VALUES (1, 'b')")
+        memory_conn.executemany(
+            "INSERT INTO book_pages_fts (book_id, page_number, content) VALUES (?, ?, ?)",
+            [(book_id, page, f"страница {page}") for page in range(3)])
+
+    apply_migrations(memory_conn)
+    first, last = fts_rowid_range(2)
+    rows = memory_conn.execute(
+        "SELECT rowid, page_number FROM book_pages_fts WHERE book_id = 2 ORDER BY rowid").fetchall()
+    assert rows == [(first + page, page) for page in range(3)]
+    assert last - first == (1 << 20) - 1
+
+    memory_conn.execute("DELETE FROM books WHERE id = 1")
+    assert memory_conn.execute(
+        "SELECT DISTINCT book_id FROM book_pages_fts").fetchall() == [(2,)]
@@ -0,0 +1,18 @@
+import pytest
+from src.db.models import HabitFrequency, Task, TaskStatus
+
+
+@pytest.mark.parametrize("value", [TaskStatus.COMPLETED, "completed", "COMPLETED", 2])
+def test_coded_enum_parse(value):
+    assert TaskStatus.parse(value) is TaskStatus.COMPLETED
+
+
+def test_coded_enum_rejects_unknown_values():
+    with pytest.raises(ValueError):
+        TaskStatus.parse("done")
+    with pytest.raises(ValueError):
+        HabitFrequency.parse(7)
+
+
+def test_models_have_no_instance_dict():
+    assert not hasattr(Task.__new__(Task), "__dict__")
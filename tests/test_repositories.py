@@ -0,0 +1,92 @@
+from datetime import datetime
+import pytest
+from src.db.models import Habit, HabitFrequency
+from src.patterns.observer import ChangeKind, ChangeObserver, EventBus
+from src.patterns.repository import HabitRepository, TableRepository
+
+
+@pytest.fixture
+def habits(user_id):
+    repository = HabitRepository()
+    created = repository.create_many([
+        Habit(None, user_id, f"Привычка {i}", HabitFrequency.DAILY, None, datetime(2026, 1, 1))
+        for i in range(5)
+    ])
+    return repository, created
+
+
+def test_statements_compiled_from_metadata():
+    assert HabitRepository.UPDATE_SQL == (
+        "UPDATE habits SET name = ?, frequency = ?, reminder_time = ? WHERE id = ? RETURNING user_id")
+    assert HabitRepository.UPDATE_MANY_SQL == (
+        "UPDATE habits SET name = ?, frequency = ?, reminder_time = ? WHERE id = ?")
+    assert TableRepository.UPDATE_MANY_SQL == ""
+
+
+def test_crud_round_trip(habits, user_id):
+    repository, created = habits
+    habit = repository.get_by_id(created[0].id)
+    assert habit == created[0]
+
+    habit.name = "Зарядка"
+    habit.frequency = HabitFrequency.WEEKLY
+    assert repository.update(habit)
+    assert repository.get_by_id(habit.id) == habit
+
+    assert repository.delete(habit.id)
+    assert repository.get_by_id(habit.id) is None
+    assert [item.id for item in repository.get_all(user_id)] == [item.id for item in created[1:]]
+
+
+def test_update_many_counts_rows(habits, user_id):
+    repository, created = habits
+    for habit in created:
+        habit.reminder_time = "08:00"
+    missing = Habit(10_000, user_id, "Нет в БД", HabitFrequency.DAILY, None, datetime(2026, 1, 1))
+    assert repository.update_many(created + [missing]) == len(created)
+    assert {habit.reminder_time for habit in repository.get_all(user_id)} == {"08:00"}
+    assert repository.update_many([]) == 0
+
+
+class Recorder(ChangeObserver):
+    def __init__(self):
+        self.events = []
+
+    def on_change(self, event):
+        self.events.append(event)
+
+
+@pytest.fixture
+def recorder():
+    recorder = Recorder()
+    EventBus().attach(recorder, ["habit_updated"])
+    yield recorder
+    EventBus().detach(recorder)
+
+
+def test_update_events_carry_only_changed_fields(habits, recorder):
+    repository, created = habits
+    habit = created[0]
+    habit.name = "Зарядка"
+    assert repository.update(habit)
+
+    created[1].frequency = HabitFrequency.WEEKLY
+    created[2].reminder_time = "07:30"
+    assert repository.update_many(created[:3]) == 3
+
+    assert [(event.id, event.changes) for event in recorder.events] == [
+        (habit.id, {"name": "Зарядка"}),
+        (created[0].id, {}),
+        (created[1].id, {"frequency": HabitFrequency.WEEKLY}),
+        (created[2].id, {"reminder_time": "07:30"}),
+    ]
+    assert all(event.kind is ChangeKind.UPDATED and event.item is not None
+               for event in recorder.events)
+
+
+def test_update_of_missing_record_publishes_nothing(habits, recorder, user_id):
+    repository, _ = habits
+    missing = Habit(10_000, user_id, "Нет в БД", HabitFrequency.DAILY, None, datetime(2026, 1, 1))
+    repository.update(missing)
+    repository.update_many([missing])
+    assert recorder.events == []
@@ -0,0 +1,192 @@
+import random
+from datetime import datetime
+import pytest
+from src.config import Config
+from src.db.database import Database
+from src.db.mappers import to_timestamp
+from src.db.models import TaskStatus
+from src.patterns.repository import TaskRepository
+from src.services.task_service import TaskService
+
+
+@pytest.fixture
+def service() -> TaskService:
+    return TaskService()
+
+
+@pytest.fixture
+def tasks(service, user_id):
+    """Задачи со случайными приоритетами и статусами"""
+    rng = random.Random(7)
+    created = service.create_tasks(user_id, [(f"Задача {i}", None, "simple") for i in range(40)])
+    for task in created:
+        service.update_task_priority(task.id, rng.randint(0, 3))
+        service.update_task_status(task.id, rng.choice(list(TaskStatus)))
+    return created
+
+
+@pytest.mark.parametrize("sort_by", ["priority", "created_at"])
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+def test_query_sorts_in_sql(service, user_id, tasks, sort_by, sort_order):
+    """Сортировка на стороне SQLite совпадает с сортировкой в Python (id - второй ключ)"""
+    stored = service.get_user_tasks(user_id, sort_by=sort_by, sort_order=sort_order)
+    expected = sorted(stored, key=lambda task: (getattr(task, sort_by), task.id),
+                      reverse=sort_order == "desc")
+    assert [task.id for task in stored] == [task.id for task in expected]
+    assert len(stored) == len(tasks)
+
+
+def test_query_filters_by_status(service, user_id, tasks):
+    for status in TaskStatus:
+        found = service.get_user_tasks(user_id, status=status)
+        assert all(task.status == status for task in found)
+        # Статус можно передать и названием
+        assert [task.id for task in service.get_user_tasks(user_id, status=status.label)] == \
+            [task.id for task in found]
+    assert sum(len(service.get_user_tasks(user_id, status=status)) for status in TaskStatus) == len(tasks)
+
+
+def test_search_ignores_case_of_cyrillic(service, user_id):
+    service.create_task(user_id, "Купить МОЛОКО")
+    service.create_task(user_id, "Позвонить врачу")
+    assert [task.title for task in service.get_user_tasks(user_id, search_query="молоко")] == \
+        ["Купить МОЛОКО"]
+    assert service.get_user_tasks(user_id, search_query="хлеб") == []
+
+
+@pytest.mark.parametrize("sort_by", ["priority", "created_at", "id"])
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+def test_keyset_pagination_matches_full_query(service, user_id, tasks, sort_by, sort_order):
+    """Постраничная выборка по ключу последней задачи дает тот же порядок, что и полная"""
+    expected = service.get_user_tasks(user_id, sort_by=sort_by, sort_order=sort_order)
+    pages, after = [], None
+    while True:
+        page = service.get_user_tasks(user_id, sort_by=sort_by, sort_order=sort_order,
+                                      limit=7, after=after)
+        if not page:
+            break
+        pages.extend(page)
+        after = service.get_page_key(page[-1], sort_by)
+    assert [task.id for task in pages] == [task.id for task in expected]
+    assert len(expected) == len(tasks)
+
+
+
+def test_iter_user_tasks_streams_same_rows(service, user_id, tasks):
+    expected = service.get_user_tasks(user_id, sort_by="created_at", sort_order="asc")
+    streamed = list(service.iter_user_tasks(user_id, sort_by="created_at", sort_order="asc"))
+    assert [task.id for task in streamed] == [task.id for task in expected]
+
+
+def test_counters_follow_inserts_updates_and_deletes(service, user_id, tasks):
+    """Счетчики task_counters, которые ведут триггеры, совпадают с прямым подсчетом"""
+    for task in tasks[:5]:
+        service.delete_task(task.id)
+    service.update_tasks_status([task.id for task in tasks[5:15]], TaskStatus.IN_PROGRESS)
+
+    stored = service.get_user_tasks(user_id)
+    statistics = service.get_task_statistics(user_id)
+    assert statistics["total"] == len(stored) == len(tasks) - 5
+
+    by_status, by_priority = {}, {}
+    for task in stored:
+        by_status[task.status.label] = by_status.get(task.status.label, 0) + 1
+        by_priority[task.priority] = by_priority.get(task.priority, 0) + 1
+    assert statistics["by_status"] == by_status
+    assert statistics["by_priority"] == by_priority
+
+
+
+def test_patch_updates_only_given_fields(service, user_id):
+    task = service.create_task(user_id, "Задача", "Описание")
+    assert service.repository.patch(task.id, status=TaskStatus.COMPLETED, priority=3) == 1
+    stored = service.repository.get_by_id(task.id)
+    assert (stored.status, stored.priority) == (TaskStatus.COMPLETED, 3)
+    assert (stored.title, stored.description) == ("Задача", "Описание")
+    assert service.repository.patch(task.id + 1000, priority=1) == 0
+
+
+def test_patch_rejects_unknown_fields(service, user_id):
+    task = service.create_task(user_id, "Задача")
+    with pytest.raises(ValueError):
+        service.repository.patch(task.id, user_id=2)
+    with pytest.raises(ValueError):
+        service.repository.patch(task.id)
+
+
+def test_patch_many_spans_batches(service, user_id, monkeypatch):
+    created = service.create_tasks(user_id, [(f"Задача {i}", None, "simple") for i in range(10)])
+    monkeypatch.setattr(service.repository, "PATCH_BATCH_SIZE", 3)
+    assert service.update_tasks_status([task.id for task in created], "completed") == 10
+    assert len(service.get_user_tasks(user_id, status=TaskStatus.COMPLETED)) == 10
+
+
+def test_create_tasks_assigns_ids_in_order(service, user_id):
+    created = service.create_tasks(user_id, [("Первая", None, "simple"),
+                                             ("Вторая", "Описание", "urgent")])
+    stored = {task.id: task for task in service.get_user_tasks(user_id)}
+    assert [stored[task.id].title for task in created] == ["Первая", "Вторая"]
+    assert stored[created[1].id].priority == created[1].priority
+
+
+def test_find_created_between_bounds(service, user_id, db):
+    bounds = [datetime(2026, 9, 30, 23, 59, 59), datetime(2026, 10, 1),
+              datetime(2026, 10, 31, 23, 59, 59), datetime(2026, 11, 1)]
+    for moment in bounds:
+        task = service.create_task(user_id, str(moment))
+        with db.transaction() as cursor:
+            cursor.execute("UPDATE tasks SET created_at = ? WHERE id = ?",
+                           (to_timestamp(moment), task.id))
+
+    found = service.get_tasks_created_between(user_id, datetime(2026, 10, 1), datetime(2026, 11, 1))
+    assert sorted(task.title for task in found) == [str(bounds[1]), str(bounds[2])]
+
+
+def test_cache_hands_out_copies(service, user_id):
+    task = service.create_task(user_id, "Задача")
+    cached = service.repository.get_by_id(task.id)
+    cached.title = "Изменено без сохранения"
+    assert service.repository.get_by_id(task.id).title == "Задача"
+
+    listed = service.get_user_tasks(user_id)
+    listed[0].priority = 99
+    assert service.get_user_tasks(user_id)[0].priority == task.priority
+
+
+def test_cache_invalidated_by_writes(service, user_id):
+    task = service.create_task(user_id, "Задача")
+    assert [item.id for item in service.get_user_tasks(user_id, status=TaskStatus.NEW)] == [task.id]
+
+    assert service.update_task_status(task.id, TaskStatus.COMPLETED)
+    assert service.get_user_tasks(user_id, status=TaskStatus.NEW) == []
+    assert service.repository.get_by_id(task.id).status == TaskStatus.COMPLETED
+
+    # Изменение через другой экземпляр репозитория видно и этому
+    TaskRepository().patch(task.id, title="Новое название")
+    assert service.get_user_tasks(user_id)[0].title == "Новое название"
+
+    service.delete_task(task.id)
+    assert service.get_user_tasks(user_id) == []
+    assert service.repository.get_by_id(task.id) is None
+
+
+def test_cache_is_per_database_file(service, user_id, tmp_path, monkeypatch):
+    service.create_task(user_id, "Задача")
+    assert service.get_user_tasks(user_id)
+
+    monkeypatch.setattr(Config, "DB_PATH", str(tmp_path / "other.db"))
+    assert Database().initialize()
+    other = TaskRepository()
+    assert other.cache is not service.repository.cache
+    assert other.query(user_id) == []
+
+
+
+def test_cache_counts_hits(service, user_id):
+    task = service.create_task(user_id, "Задача")
+    service.repository.get_by_id(task.id)
+    before = service.get_cache_stats()
+    service.repository.get_by_id(task.id)
+    after = service.get_cache_stats()
+    assert sum(counts["hits"] for counts in after.values()) == \
+        sum(counts["hits"] for counts in before.values()) + 1